@@ -0,0 +1,104 @@
+import datetime
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .. import trace
+from .data_fetch import FTCEventsClient, ResponseCache, RateLimiter
+from .script_writer import ScriptWriter
+from .season_index import IndexClient, SeasonIndex
+
+# event types that actually have matches worth recapping
+RECAP_EVENT_TYPES = ("Qualifier", "League Meet", "League Tournament", "Championship", "Super Qualifier", "FIRST Championship")
+
+def season_event_codes(client, types=RECAP_EVENT_TYPES, finished_only=True):
+    """Returns the codes of every event this season worth writing a script for."""
+    now = datetime.datetime.now()
+    codes = []
+    for event in client.fetch("events")['events']:
+        if types and event['typeName'] not in types:
+            continue
+        if finished_only and client.date_parse(event['dateEnd']) > now:
+            continue
+        codes.append(event['code'])
+    return sorted(codes)
+
+# each worker process builds its own client around the shared rate limiter
+_worker_client = None
+
+def _init_worker(username, token, cache_dir, rate_limiter, index_path=None):
+    global _worker_client
+    if index_path:
+        _worker_client = IndexClient(SeasonIndex(index_path))
+        return
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    _worker_client = FTCEventsClient(username, token, cache=cache, rate_limiter=rate_limiter)
+
+def _write_script(event_code, out_dir):
+    try:
+        with trace.span("event", event_code=event_code):
+            script = ScriptWriter(event_code, _worker_client).full_script()
+    except Exception:
+        return event_code, traceback.format_exc()
+    with open(os.path.join(out_dir, event_code + ".txt"), "w") as f:
+        f.write(script)
+    return event_code, None
+
+def generate_season(username, token, out_dir, event_codes=None, workers=None, rate=5.0, burst=5, cache_dir=".ftc_cache",
+                    index_path=None):
+    """Writes a script for every event in the season to out_dir/<event code>.txt using a pool of worker processes.
+
+    With index_path, everything is read out of that SeasonIndex instead of the api.
+    Returns a dict of event code -> traceback for every event that failed; a failing event doesn't stop the batch."""
+    os.makedirs(out_dir, exist_ok=True)
+    rate_limiter = RateLimiter(rate, burst)
+    if event_codes is None:
+        if index_path:
+            with SeasonIndex(index_path) as index:
+                event_codes = season_event_codes(IndexClient(index))
+        else:
+            cache = ResponseCache(cache_dir) if cache_dir else None
+            event_codes = season_event_codes(FTCEventsClient(username, token, cache=cache, rate_limiter=rate_limiter))
+
+    failures = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(username, token, cache_dir, rate_limiter, index_path)) as pool:
+        futures = [pool.submit(_write_script, code, out_dir) for code in event_codes]
+        for fut in as_completed(futures):
+            code, error = fut.result()
+            if error is None:
+                print(f" > {code}: ok")
+            else:
+                print(f" > {code}: FAILED\n{error}")
+                failures[code] = error
+
+    print(f" > wrote {len(event_codes) - len(failures)}/{len(event_codes)} scripts to {out_dir}")
+    return failures
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Write recap scripts for every event in the season.")
+    parser.add_argument("out_dir", help="directory to write <event code>.txt scripts into")
+    parser.add_argument("--events", nargs="+", default=None, help="only these event codes instead of the whole season")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--rate", type=float, default=5.0, help="max api requests per second across all workers")
+    parser.add_argument("--burst", type=int, default=5, help="how many requests can go out back to back before --rate kicks in")
+    parser.add_argument("--cache_dir", default=".ftc_cache", help="response cache directory, empty to disable")
+    parser.add_argument("--index", default=None, help="read events out of this season index (see recap.backend.season_index) instead of the api")
+    parser.add_argument("--trace", default=None, help="write a Chrome trace of every worker's fetches and sections to this path")
+    args = parser.parse_args()
+
+    if args.trace:
+        trace.enable(args.trace)
+    # the index doesn't need api credentials
+    creds = {"username": None, "token": None}
+    if args.index is None:
+        with open("token") as f:
+            creds = json.load(f)
+    failures = generate_season(creds['username'], creds['token'], args.out_dir, event_codes=args.events,
+                               workers=args.workers, rate=args.rate, burst=args.burst, cache_dir=args.cache_dir,
+                               index_path=args.index)
+    if failures:
+        with open(os.path.join(args.out_dir, "failures.json"), "w") as f:
+            json.dump(failures, f, indent=2)
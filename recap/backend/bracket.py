@@ -0,0 +1,105 @@
+class EventElimsSeries:
+    """One playoff series: a best of 3 in the classic semis/finals bracket, often a single match in bigger formats."""
+    # only the scores are kept, not the schedule they came from
+    __slots__ = ("series", "level", "winner", "num_rounds", "red_alliance", "blue_alliance", "red_scores", "blue_scores",
+                 "red_wins", "blue_wins")
+
+    def __init__(self, data, series, red_alliance, blue_alliance, level=None):
+        self.series = series
+        self.level = level
+        self.winner = "red"
+        self.num_rounds = 0
+        self.red_alliance = red_alliance
+        self.blue_alliance = blue_alliance
+        self.red_scores = []
+        self.blue_scores = []
+        self.red_wins = 0
+        self.blue_wins = 0
+
+        for match in data:
+            if match['series'] == self.series and (level is None or match.get('tournamentLevel') == level):
+                self.add(match)
+
+    def add(self, match):
+        """Adds a match of this series, if it's been played."""
+        red, blue = match['scoreRedFinal'], match['scoreBlueFinal']
+        if red is None or blue is None:
+            # not played yet
+            return
+        self.red_alliance.scores.append(red)
+        self.blue_alliance.scores.append(blue)
+        self.red_scores.append(red)
+        self.blue_scores.append(blue)
+        if red > blue:
+            self.red_wins += 1
+        elif blue > red:
+            self.blue_wins += 1
+        # update the number of rounds
+        if match['matchNumber'] > self.num_rounds:
+            self.num_rounds = match['matchNumber']
+            self.winner = "red" if red > blue else "blue"
+
+    def winning_alliance(self):
+        return self.red_alliance if self.winner == "red" else self.blue_alliance
+
+    def losing_alliance(self):
+        return self.blue_alliance if self.winner == "red" else self.red_alliance
+
+    @property
+    def undefeated(self):
+        """Whether the winner took the series without losing a match."""
+        return (self.blue_wins if self.winner == "red" else self.red_wins) == 0
+
+class Bracket:
+    """Every playoff series at an event, indexed in one pass over the playoff schedule.
+
+    Which alliance plays on which side of a series comes from the teams in its matches rather than from assumed
+    seeding, so any number of alliances and any format (classic semis/finals, double elimination...) works.
+    Series keep the order they first show up in the schedule, and alliance scores are filled in along the way.
+    """
+    def __init__(self, schedule, alliances):
+        by_team = {team.number: alliance for alliance in alliances for team in alliance.teams}
+        # (tournament level, series number) -> series
+        self.series = {}
+        has_finals = False
+        for match in schedule:
+            key = (match.get('tournamentLevel'), match['series'])
+            has_finals = has_finals or key[0] == "FINAL"
+            series = self.series.get(key)
+            if series is None:
+                red, blue = self._sides(match, by_team)
+                if red is None:
+                    # teams aren't filled in until the earlier rounds are decided
+                    continue
+                series = self.series[key] = EventElimsSeries((), key[1], red, blue, level=key[0])
+            series.add(match)
+
+        # the series named as the finals (None until its teams are known), otherwise whichever series comes last
+        if has_finals:
+            finals = [s for s in self.series.values() if s.level == "FINAL"]
+            self.final = finals[-1] if finals else None
+        else:
+            self.final = list(self.series.values())[-1] if self.series else None
+        self.others = [s for s in self.series.values() if s is not self.final]
+
+    @staticmethod
+    def _sides(match, by_team):
+        red = blue = None
+        for team in match['teams']:
+            alliance = by_team.get(team['teamNumber'])
+            if alliance is None:
+                continue
+            if team['station'].startswith("Red"):
+                red = red or alliance
+            else:
+                blue = blue or alliance
+        if red is None or blue is None or red is blue:
+            return None, None
+        return red, blue
+
+    def rounds(self):
+        """The non-final series grouped by tournament level, in bracket order."""
+        rounds = {}
+        for series in self.others:
+            rounds.setdefault(series.level, []).append(series)
+        return rounds
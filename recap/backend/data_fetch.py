@@ -1,22 +1,284 @@
 import requests
 import base64
 import datetime
+import email.utils
+import hashlib
+import json
+import multiprocessing
+import random
+import threading
+import time
+
+from .. import trace
+from ..disk_lru import DiskLRU
 
 BASE_API_URL = "https://ftc-api.firstinspires.org/v2.0"
 SEASON = 2021
+
+# how long (in seconds) responses for events that are still running stay fresh.
+# responses for events that have ended are kept until they get evicted.
+LIVE_TTLS = {
+    "events": 3600,
+    "teams": 3600,
+    "schedule": 60,
+    "rankings": 60,
+    "alliances": 120,
+    "awards": 300,
+}
+DEFAULT_TTL = 300
+
+class ResponseCache:
+    """On-disk cache of ftc-api responses, keyed by path + params.
+
+    Entries are one json file each. The least recently used entries get evicted once the cache grows past max_bytes,
+    and stale entries are revalidated with ETag/If-Modified-Since rather than refetched if the api gave us validators.
+    """
+    def __init__(self, cache_dir=".ftc_cache", max_bytes=256 * 1024 * 1024, ttls=None, default_ttl=DEFAULT_TTL,
+                 finished_grace=datetime.timedelta(days=2)):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttls = dict(LIVE_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.finished_grace = finished_grace
+        # event code -> datetime the event ended
+        self._event_ends = {}
+        self._store = DiskLRU(cache_dir, ".json", max_bytes)
+
+    @staticmethod
+    def key(path, params):
+        blob = json.dumps([SEASON, path, sorted((k, str(v)) for k, v in params.items())])
+        return hashlib.sha1(blob.encode()).hexdigest() + ".json"
+
+    def get(self, path, params):
+        """Returns the cached entry for a request (fresh or not), or None."""
+        name = self.key(path, params)
+        try:
+            with open(self._store.path(name)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._store.touch(name)
+        return entry
+
+    def put(self, path, params, body, headers=None):
+        headers = headers or {}
+        entry = {
+            "path": path,
+            "params": {k: str(v) for k, v in params.items()},
+            "fetched": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "body": body,
+        }
+        self._write(self.key(path, params), entry)
+        return entry
+
+    def revalidated(self, path, params, entry):
+        """Marks an entry as fresh again after the api answered 304 Not Modified."""
+        entry["fetched"] = time.time()
+        self._write(self.key(path, params), entry)
+        return entry
+
+    def is_fresh(self, path, params, entry):
+        ttl = self.ttl(path, params)
+        return ttl is None or time.time() - entry["fetched"] < ttl
+
+    def ttl(self, path, params):
+        """Seconds a response stays fresh, or None if the event it belongs to is over."""
+        endpoint = path.split("/")[0]
+        event_code = params.get("eventCode")
+        if event_code is None and "/" in path:
+            event_code = path.split("/")[1]
+
+        if event_code is not None and self._event_finished(event_code):
+            return None
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    @staticmethod
+    def validators(entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def clear(self):
+        self._store.clear()
+
+    def _event_finished(self, event_code):
+        end = self._event_ends.get(event_code)
+        if end is None:
+            # the events listing for this code is usually the first thing fetched, so it's probably on disk
+            entry = self.get("events", {"eventCode": event_code})
+            if entry is None or not entry["body"].get("events"):
+                return False
+            end = FTCEventsClient.date_parse(entry["body"]["events"][0]["dateEnd"])
+            self._event_ends[event_code] = end
+        return datetime.datetime.now() > end + self.finished_grace
+
+    def _write(self, name, entry):
+        self._store.write(name, json.dumps(entry).encode())
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second on average, in bursts of up to `burst`.
+
+    The bucket lives in shared memory, so one limiter handed to pool workers (threads or processes) throttles all
+    of them together."""
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._lock = multiprocessing.Lock()
+        # tokens can go negative, that's callers who've reserved a slot and are sleeping until it comes up
+        self._tokens = multiprocessing.RawValue('d', burst)
+        self._last = multiprocessing.RawValue('d', time.monotonic())
+
+    def _refill(self, now):
+        # caller holds the lock
+        self._tokens.value = min(self.burst, self._tokens.value + (now - self._last.value) * self.rate)
+        self._last.value = now
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens.value -= 1
+            wait = -self._tokens.value / self.rate if self._tokens.value < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Holds everyone off for `seconds`, e.g. when the api tells us to back off."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens.value = min(self._tokens.value, -seconds * self.rate)
+
+# statuses worth trying again after a while
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class Transport:
+    """The http side of FTCEventsClient: a requests.Session with a sized connection pool, timeouts, rate limiting,
+    and retries with exponential backoff that honor Retry-After. Keeps per-endpoint latency and retry counters."""
+    def __init__(self, pool_size=16, timeout=30, max_retries=5, backoff=0.5, max_backoff=60, rate_limiter=None):
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limiter: RateLimiter = rate_limiter
+        self._lock = threading.Lock()
+        # endpoint -> {"requests", "retries", "failures", "seconds", "max_seconds"}
+        self.stats = {}
+
+    def get(self, url, endpoint, headers, params):
+        """Returns the response, retrying throttled/failed requests. The last response is returned as is
+        (for the caller to raise_for_status on) once retries run out."""
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                r = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._count(endpoint, time.perf_counter() - start, failed=attempt >= self.max_retries)
+                if attempt >= self.max_retries:
+                    raise
+                r = None
+            else:
+                retry = r.status_code in RETRY_STATUSES
+                self._count(endpoint, time.perf_counter() - start, failed=retry and attempt >= self.max_retries)
+                if not retry or attempt >= self.max_retries:
+                    return r
+
+            delay = self._retry_delay(r, attempt)
+            if r is not None and r.status_code == 429 and self.rate_limiter is not None:
+                # everyone sharing the limiter is about to get throttled too
+                self.rate_limiter.pause(delay)
+            with self._lock:
+                self.stats[endpoint]["retries"] += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, r, attempt):
+        retry_after = r.headers.get("Retry-After") if r is not None else None
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                try:
+                    when = email.utils.parsedate_to_datetime(retry_after)
+                    return min(self.max_backoff, max(0.0, when.timestamp() - time.time()))
+                except (TypeError, ValueError):
+                    pass
+        # exponential backoff with some jitter so workers don't all retry in lockstep
+        return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _count(self, endpoint, seconds, failed=False):
+        with self._lock:
+            stats = self.stats.setdefault(endpoint, {"requests": 0, "retries": 0, "failures": 0, "seconds": 0.0, "max_seconds": 0.0})
+            stats["requests"] += 1
+            stats["failures"] += failed
+            stats["seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def summary(self):
+        lines = []
+        for endpoint, stats in sorted(self.stats.items()):
+            mean = stats["seconds"] / stats["requests"] if stats["requests"] else 0
+            lines.append(f"{endpoint:<10} {stats['requests']:5d} requests  {stats['retries']:3d} retries  {stats['failures']:3d} failed  "
+                         f"{mean * 1000:7.1f} ms mean  {stats['max_seconds'] * 1000:7.1f} ms max")
+        return "\n".join(lines)
+
 class FTCEventsClient:
-    def __init__(self, username, token):
+    def __init__(self, username, token, cache=None, rate_limiter=None, recorder=None, transport=None):
         self.username = username
         self.token = token
         self._b64 = base64.b64encode(f"{self.username}:{self.token}".encode()).decode()
-        self.session = requests.Session()
+        self.transport: Transport = transport if transport is not None else Transport(rate_limiter=rate_limiter)
+        self.cache: ResponseCache = cache
+        # if set, every response (cached or not) gets added to this FixtureBundle
+        self.recorder = recorder
+
+    @property
+    def session(self):
+        return self.transport.session
 
     def fetch(self, path, **params):
-        r = self.session.get(f"{BASE_API_URL}/{SEASON}/{path}", headers={"Authorization": "Basic " + self._b64}, params=params)
+        endpoint = path.split("/")[0]
+        with trace.span("fetch " + endpoint, "net", path=path, params=params) as span:
+            data = self._get(path, endpoint, params, span)
+        if self.recorder is not None:
+            self.recorder.add(path, params, data)
+        return data
+
+    def _get(self, path, endpoint, params, span):
+        entry = None
+        headers = {"Authorization": "Basic " + self._b64}
+        span["cache"] = "off"
+        if self.cache is not None:
+            entry = self.cache.get(path, params)
+            span["cache"] = "miss"
+            if entry is not None:
+                if self.cache.is_fresh(path, params, entry):
+                    span["cache"] = "hit"
+                    return entry["body"]
+                headers.update(self.cache.validators(entry))
+
+        r = self.transport.get(f"{BASE_API_URL}/{SEASON}/{path}", endpoint, headers, params)
+        span["bytes"] = len(r.content)
+        if r.status_code == 304 and entry is not None:
+            span["cache"] = "revalidated"
+            return self.cache.revalidated(path, params, entry)["body"]
         r.raise_for_status()
-        return r.json()
-    
+        data = r.json()
+        if self.cache is not None:
+            self.cache.put(path, params, data, r.headers)
+        return data
+
     @classmethod
     def date_parse(cls, date_str):
         return datetime.datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S")
-
@@ -0,0 +1,86 @@
+import gzip
+import json
+import threading
+
+from .data_fetch import FTCEventsClient, SEASON
+from .script_writer import ScriptWriter
+
+class FixtureBundle:
+    """A set of recorded ftc-api responses, saved as one gzipped json file."""
+    def __init__(self, responses=None, season=SEASON):
+        self.season = season
+        # (path, params) key -> response body
+        self.responses = {} if responses is None else responses
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path, params):
+        return (path, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+    def add(self, path, params, body):
+        with self._lock:
+            self.responses[self.key(path, params)] = body
+
+    def get(self, path, params):
+        return self.responses[self.key(path, params)]
+
+    def save(self, fname):
+        blob = {
+            "season": self.season,
+            "responses": [{"path": path, "params": dict(params), "body": body} for (path, params), body in self.responses.items()],
+        }
+        with gzip.open(fname, "wt") as f:
+            json.dump(blob, f)
+
+    @classmethod
+    def load(cls, fname):
+        with gzip.open(fname, "rt") as f:
+            blob = json.load(f)
+        bundle = cls(season=blob["season"])
+        for resp in blob["responses"]:
+            bundle.add(resp["path"], resp["params"], resp["body"])
+        return bundle
+
+class ReplayClient:
+    """Stands in for FTCEventsClient, serving responses out of a FixtureBundle with no network."""
+    def __init__(self, bundle):
+        self.bundle: FixtureBundle = bundle
+
+    def fetch(self, path, **params):
+        try:
+            return self.bundle.get(path, params)
+        except KeyError:
+            raise KeyError(f"No recorded response for {path} {params}") from None
+
+    @classmethod
+    def date_parse(cls, date_str):
+        return FTCEventsClient.date_parse(date_str)
+
+def record_event(client, event_code):
+    """Fetches everything a ScriptWriter needs for an event and returns the responses as a FixtureBundle."""
+    bundle = FixtureBundle()
+    old_recorder = client.recorder
+    client.recorder = bundle
+    try:
+        # sequential so the playoff schedule is only recorded when the event has one
+        ScriptWriter(event_code, client, init_data=True)
+    finally:
+        client.recorder = old_recorder
+    return bundle
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    parser = argparse.ArgumentParser(description="Record ftc-api responses for events into fixture bundles.")
+    parser.add_argument("events", nargs="+", help="event codes to record")
+    parser.add_argument("--out_dir", default="fixtures", help="directory to write <event code>.json.gz bundles into")
+    args = parser.parse_args()
+
+    with open("token") as f:
+        creds = json.load(f)
+    c = FTCEventsClient(creds['username'], creds['token'])
+    os.makedirs(args.out_dir, exist_ok=True)
+    for code in args.events:
+        fname = os.path.join(args.out_dir, code + ".json.gz")
+        record_event(c, code).save(fname)
+        print(f" > recorded {code} to {fname}")
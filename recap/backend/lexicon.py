@@ -0,0 +1,209 @@
+"""Precomputed spoken forms of every team's number and name for a season.
+
+Without a lexicon EventTeam.mention() rolls dice for how to read a number out every time it's called, and the TTS
+front end then has to expand those digits to words (and phonemize them) all over again for every sentence. A Lexicon
+works each team's spoken form out once, in words the TTS has nothing left to normalize in, picks how its number is
+read deterministically per team (so a team sounds the same in every recap of the season), and saves it all to a
+json file that ScriptWriter(lexicon=...) and the synthesis front end (frontend.pronounce) both read from.
+"""
+import hashlib
+import json
+import random
+import re
+
+from .data_fetch import SEASON
+
+ONES = ("zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten", "eleven", "twelve",
+        "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen")
+TENS = ("", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety")
+
+# symbols that show up in team names, and what to say for them
+SYMBOLS = {"&": " and ", "+": " plus ", "@": " at ", "#": " number ", "%": " percent ", "/": " ", "_": " "}
+NUMBER = re.compile(r"\d+")
+# what's left of a name after symbols and numbers are spelled out, punctuation the TTS would read oddly goes
+UNSPOKEN = re.compile(r"[^\w\s'.,!?-]")
+SPACES = re.compile(r"\s+")
+# words the matcher in frontend.pronounce compares on, trailing punctuation ignored
+WORD = re.compile(r"\S+")
+PUNCTUATION = ",.;:!?\"')("
+
+def number_words(n):
+    """Reads out a whole number below a million, e.g. 4042 -> "four thousand forty-two"."""
+    if n < 20:
+        return ONES[n]
+    if n < 100:
+        return TENS[n // 10] + ("-" + ONES[n % 10] if n % 10 else "")
+    if n < 1000:
+        return ONES[n // 100] + " hundred" + (" " + number_words(n % 100) if n % 100 else "")
+    return number_words(n // 1000) + " thousand" + (" " + number_words(n % 1000) if n % 1000 else "")
+
+def pair_words(pair, zero):
+    """Reads two digits the way numbers get read in pairs, "42" -> "forty-two", "05" -> "oh five", "00" -> "hundred"."""
+    if pair == "00":
+        return "hundred"
+    if pair[0] == "0":
+        return f"{zero} {ONES[int(pair[1])]}"
+    return number_words(int(pair))
+
+def spoken_number(number, rng):
+    """How to read a team number out, picked with rng: digit by digit ("four oh four two") or, for 4 and 5 digit
+    numbers, in pairs ("forty forty-two", "sixteen three two six"), with zeros read as "zero" or "oh"."""
+    digits = str(number)
+    zero = rng.choice(("zero", "oh"))
+    if rng.random() < 0.5 or len(digits) not in (4, 5):
+        return " ".join(zero if d == "0" else ONES[int(d)] for d in digits)
+    if len(digits) == 4:
+        return pair_words(digits[:2], zero) + " " + pair_words(digits[2:], zero)
+    return pair_words(digits[:2], zero) + " " + " ".join(zero if d == "0" else ONES[int(d)] for d in digits[2:])
+
+def spoken_name(name):
+    """A team name with its numbers and symbols spelled out."""
+    for symbol, word in SYMBOLS.items():
+        name = name.replace(symbol, word)
+    name = NUMBER.sub(lambda m: _number_in_name(m, name), name)
+    name = UNSPOKEN.sub(" ", name)
+    return SPACES.sub(" ", name).strip()
+
+def _number_in_name(match, name):
+    digits = match.group()
+    if len(digits) > 6:
+        return digits
+    # spaced off from letters it was stuck to, "Team11" -> "Team eleven", but "4-H" stays "four-H"
+    before = " " if match.start() > 0 and name[match.start() - 1].isalpha() else ""
+    after = " " if match.end() < len(name) and name[match.end()].isalpha() else ""
+    return before + number_words(int(digits)) + after
+
+def phrase_key(text):
+    """What two phrases have to share to count as the same, ignoring case and punctuation at the ends of words."""
+    return tuple(w.strip(PUNCTUATION).lower() for w in WORD.findall(text) if w.strip(PUNCTUATION))
+
+class TeamEntry:
+    __slots__ = ("number", "name", "spoken_number", "spoken_name")
+
+    def __init__(self, number, name, spoken_number, spoken_name):
+        self.number = number
+        self.name = name
+        self.spoken_number = spoken_number
+        self.spoken_name = spoken_name
+
+    def mention(self, number=True):
+        return f"{self.spoken_number} {self.spoken_name}" if number else self.spoken_name
+
+class Lexicon:
+    """Team number -> TeamEntry for a season, plus whatever the synthesis front end has precomputed for them.
+
+    Each team's reading is seeded by the season and its number, so rebuilding the lexicon (or adding a team to it
+    later) never changes how teams already in it are read. pronunciations maps a front end key (which model's text
+    processing) to {spoken phrase: processed text}, filled in by frontend.pronounce.
+    """
+    def __init__(self, season=SEASON):
+        self.season = season
+        self.teams = {}
+        self.pronunciations = {}
+        self._phrases = None
+        self._version = None
+
+    def add(self, number, name):
+        rng = random.Random(f"{self.season}:{number}")
+        self.teams[number] = entry = TeamEntry(number, name, spoken_number(number, rng), spoken_name(name))
+        self._phrases = None
+        return entry
+
+    def entry(self, number, name):
+        """The team's entry, worked out on the spot if the lexicon was built before the team showed up."""
+        entry = self.teams.get(number)
+        if entry is None or entry.name != name:
+            entry = self.add(number, name)
+        return entry
+
+    def __len__(self):
+        return len(self.teams)
+
+    def __contains__(self, number):
+        return number in self.teams
+
+    def phrases(self):
+        """{phrase_key: spoken phrase} for every way a team can get mentioned, for matching mentions in a script."""
+        if self._phrases is None:
+            phrases = {}
+            for entry in self.teams.values():
+                for phrase in (entry.mention(), entry.spoken_name, entry.spoken_number):
+                    phrases.setdefault(phrase_key(phrase), phrase)
+            self._phrases = phrases
+        return self._phrases
+
+    def version(self):
+        """A hash of every team's spoken forms and the saved pronunciations, for telling apart audio synthesized with
+        different lexicons. Taken the first time it's asked for, so what the front end fills in while synthesizing
+        doesn't move it."""
+        if self._version is None:
+            teams = sorted((e.number, e.name, e.spoken_number, e.spoken_name) for e in self.teams.values())
+            blob = json.dumps([self.season, teams, self.pronunciations], sort_keys=True)
+            self._version = hashlib.sha1(blob.encode()).hexdigest()[:16]
+        return self._version
+
+    @classmethod
+    def build(cls, teams, season=SEASON):
+        """Builds a lexicon from api team json (anything with teamNumber and nameShort)."""
+        lexicon = cls(season)
+        for team in teams:
+            lexicon.add(team['teamNumber'], team['nameShort'])
+        return lexicon
+
+    @classmethod
+    def from_index(cls, index):
+        """Every team in a SeasonIndex."""
+        return cls.build(index.season_teams())
+
+    @classmethod
+    def from_api(cls, client):
+        """Every team registered for the season, straight from the api's paged team list."""
+        teams = []
+        page = 1
+        while True:
+            data = client.fetch("teams", page=page)
+            teams += data['teams']
+            if page >= data['pageTotal']:
+                break
+            page += 1
+        return cls.build(teams, SEASON)
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({
+                "season": self.season,
+                "teams": {
+                    str(e.number): [e.name, e.spoken_number, e.spoken_name] for e in self.teams.values()
+                },
+                "pronunciations": self.pronunciations,
+            }, f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            data = json.load(f)
+        lexicon = cls(data['season'])
+        for number, (name, number_text, name_text) in data['teams'].items():
+            lexicon.teams[int(number)] = TeamEntry(int(number), name, number_text, name_text)
+        lexicon.pronunciations = data.get('pronunciations', {})
+        return lexicon
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the season's team lexicon.")
+    parser.add_argument("out_path", help="json file to write the lexicon to")
+    parser.add_argument("--index", default=None, help="build from the teams in this season index instead of the api")
+    args = parser.parse_args()
+
+    if args.index:
+        from .season_index import SeasonIndex
+        with SeasonIndex(args.index) as index:
+            lexicon = Lexicon.from_index(index)
+    else:
+        from .data_fetch import FTCEventsClient, RateLimiter, ResponseCache
+        with open("token") as f:
+            creds = json.load(f)
+        client = FTCEventsClient(creds['username'], creds['token'], cache=ResponseCache(), rate_limiter=RateLimiter(5, 5))
+        lexicon = Lexicon.from_api(client)
+    lexicon.save(args.out_path)
+    print(f" > {len(lexicon)} teams written to {args.out_path}")
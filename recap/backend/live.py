@@ -0,0 +1,172 @@
+import time
+
+import numpy as np
+
+from .. import trace
+from .script_writer import ScriptWriter
+from .templates import join
+
+def _result(match):
+    """The parts of a match that change once it's played or rescored."""
+    return (match['scoreRedFinal'], match['scoreBlueFinal'],
+            tuple((t['teamNumber'], t['station'], t['surrogate'], t['noShow']) for t in match['teams']))
+
+class LiveScriptWriter(ScriptWriter):
+    """A ScriptWriter for an event that's still running.
+
+    poll() only asks for quals from the first match without a score onward, plus the whole quals schedule every
+    full_every polls to catch matches rescored before that point, and folds new and rescored matches into the score
+    store as deltas. It refetches the (small) alliance, playoff and award data every time. full_script() then re-renders
+    only the sections whose data changed since the last render, plus the sections after them, since how a team gets
+    mentioned depends on how many times earlier sections already mentioned it.
+    """
+    SECTIONS = ("event_intro", "quals_matches", "elims_matches", "awards_conclusion")
+    # which datasets each section reads
+    SECTION_DATA = {
+        "event_intro": {"event"},
+        "quals_matches": {"quals"},
+        "elims_matches": {"rankings", "alliances", "playoffs"},
+        "awards_conclusion": {"awards"},
+    }
+
+    def __init__(self, event_code, client, init_data=True, concurrent=False, max_workers=8, seed=None, lexicon=None,
+                 full_every=10):
+        super().__init__(event_code, client, init_data=init_data, concurrent=concurrent, max_workers=max_workers, seed=seed,
+                         lexicon=lexicon)
+        self.full_every = full_every
+        self._polls = 0
+        # section -> rendered text
+        self._rendered = {}
+        # section -> every team's mention count right before the section was rendered
+        self._mentions_before = {}
+        # section -> the rng's state right before the section was rendered
+        self._rng_before = {}
+        self._changed = {"event", "quals", "rankings", "alliances", "playoffs", "awards"}
+
+    def _next_qual(self):
+        """The first quals match number we don't have a final result for yet."""
+        unplayed = [m['matchNumber'] for m in self.quals if m['scoreRedFinal'] is None or m['scoreBlueFinal'] is None]
+        if unplayed:
+            return min(unplayed)
+        return max((m['matchNumber'] for m in self.quals), default=0) + 1
+
+    def _invalidate(self, *names):
+        for name in names:
+            self.__dict__.pop(name, None)
+
+    @trace.traced()
+    def poll(self):
+        """Fetches whatever changed since the last poll and applies it. Returns the names of the datasets that changed."""
+        changed = set()
+
+        # quals from the first unplayed match on, and now and then all of them in case earlier ones got rescored
+        self._polls += 1
+        params = {} if self._polls % self.full_every == 0 else {"start": self._next_qual()}
+        by_number = {m['matchNumber']: i for i, m in enumerate(self.quals)}
+        new = self.client.fetch(f"schedule/{self.event_code}/qual/hybrid", **params)['schedule']
+        delta = []
+        for match in new:
+            i = by_number.get(match['matchNumber'])
+            if i is None:
+                self.quals.append(match)
+            elif _result(self.quals[i]) != _result(match):
+                self.quals[i] = match
+            else:
+                continue
+            delta.append(match)
+        if delta:
+            changed.add("quals")
+            if 'score_store' in self.__dict__:
+                dirty = self.score_store.apply(delta)
+                self._bind_scores(self.score_store, dirty)
+            self._invalidate("top_score", "team_rankings")
+            # the official rankings only move when matches get played
+            self._payloads['rankings'] = self._fetch_rankings()
+            self._invalidate("rankings")
+            changed.add("rankings")
+
+        # alliances don't change once they're picked
+        if not self._payload('alliances')['alliances']:
+            alliances = self._fetch_alliances()
+            if alliances['alliances']:
+                self._payloads['alliances'] = alliances
+                self._payloads.pop('playoffs', None)
+                self._invalidate("alliances", "playoffs", "bracket", "elims")
+                changed.add("alliances")
+
+        # the playoff bracket is a handful of matches, so just refetch it and rebuild the series if anything moved
+        if self._payload('alliances')['alliances']:
+            playoffs = self._fetch_playoffs()
+            old = self._payloads.get('playoffs')
+            if old is None or [_result(m) for m in old['schedule']] != [_result(m) for m in playoffs['schedule']]:
+                self._payloads['playoffs'] = playoffs
+                if 'alliances' in self.__dict__:
+                    for alliance in self.alliances:
+                        alliance.scores = []
+                self._invalidate("playoffs", "bracket", "elims")
+                changed.add("playoffs")
+
+        awards = self._fetch_awards()
+        if self._payloads.get('awards') != awards:
+            self._payloads['awards'] = awards
+            self._invalidate("awards")
+            changed.add("awards")
+
+        self._changed |= changed
+        return changed
+
+    def _quals_ready(self):
+        """Whether quals are far enough along for every team the quals section talks about to have scores for it."""
+        store = self.score_store
+        if not store.num_rows or self.top_score[0] <= 0:
+            return False
+        _, first_team, second_team = self._quals_teams()
+        # two scores each besides the top score, and another team with two to be the most consistent
+        for team in (first_team, second_team):
+            if np.count_nonzero(team.sorted_scores != self.top_score[0]) < 2:
+                return False
+        enough = store.counts >= 2
+        enough[[store.index[first_team.number], store.index[second_team.number]]] = False
+        return bool(enough.any())
+
+    def quals_matches(self):
+        # too early in quals for teams to have enough scores to talk about
+        if not self._quals_ready():
+            return ""
+        return super().quals_matches()
+
+    def elims_matches(self):
+        # nothing to say about elims until there's a finals result
+        if self.alliances and (self.bracket.final is None or not self.bracket.final.red_scores):
+            return ""
+        return super().elims_matches()
+
+    def full_script(self):
+        """Returns the full script, re-rendering only what changed since the last call."""
+        first_dirty = len(self.SECTIONS)
+        for i, section in enumerate(self.SECTIONS):
+            if section not in self._rendered or self.SECTION_DATA[section] & self._changed:
+                first_dirty = i
+                break
+
+        if first_dirty < len(self.SECTIONS) and self.SECTIONS[first_dirty] in self._mentions_before:
+            # rewind the mention counts and the rng to where they were when this section was first rendered, so the
+            # script comes out the same as a fresh writer's over the same data
+            for number, mentioned in self._mentions_before[self.SECTIONS[first_dirty]].items():
+                self.teams[number].mentioned = mentioned
+            self.rng.setstate(self._rng_before[self.SECTIONS[first_dirty]])
+        for section in self.SECTIONS[first_dirty:]:
+            self._mentions_before[section] = {number: team.mentioned for number, team in self.teams.items()}
+            self._rng_before[section] = self.rng.getstate()
+            self._rendered[section] = getattr(self, section)()
+        self._changed = set()
+
+        return join(self._rendered[section] for section in self.SECTIONS)
+
+    def watch(self, interval=30, callback=print):
+        """Polls every `interval` seconds and hands the refreshed script to callback whenever something changed."""
+        callback(self.full_script())
+        while True:
+            time.sleep(interval)
+            if self.poll():
+                callback(self.full_script())
@@ -0,0 +1,221 @@
+import numpy as np
+
+class QualsScores:
+    """Quals results held as match x station arrays, with per-team statistics kept as running totals.
+
+    Matches can be fed in incrementally with apply() (new matches get appended, rescored matches replace their old
+    contribution), so keeping the aggregates current costs in proportion to the matches that changed.
+    Rows are in the order matches were first seen, which is match order for a schedule fetched in one go.
+    """
+    def __init__(self, schedule, teams):
+        # team index -> team number, in the same order as the teams dict
+        self.numbers = np.array(list(teams), dtype=np.int64)
+        self.index = {number: i for i, number in enumerate(teams)}
+        num_teams = len(self.numbers)
+
+        # match number -> row
+        self.rows = {}
+        self.num_rows = 0
+        capacity = max(len(schedule), 1)
+        num_stations = max((len(match['teams']) for match in schedule), default=1)
+        self.team_idx = np.full((capacity, num_stations), -1, dtype=np.int32)
+        self.red = np.zeros((capacity, num_stations), dtype=bool)
+        self.counted = np.zeros((capacity, num_stations), dtype=bool)
+        self.red_scores = np.zeros(capacity, dtype=np.int64)
+        self.blue_scores = np.zeros(capacity, dtype=np.int64)
+        # matches without posted scores yet haven't been played
+        self.played = np.zeros(capacity, dtype=bool)
+
+        self.counts = np.zeros(num_teams, dtype=np.int64)
+        self.sums = np.zeros(num_teams, dtype=np.int64)
+        self.sq_sums = np.zeros(num_teams, dtype=np.int64)
+        self.maxes = np.full(num_teams, np.iinfo(np.int64).min)
+        # team index -> (scores in match order, scores highest first), dropped whenever a team's scores change
+        self._team_scores = {}
+        # (score, row, red) of the best alliance score so far
+        self._top = None
+
+        self.apply(schedule)
+        self._fill_team_scores()
+
+    @property
+    def scores(self):
+        """Each station's alliance score."""
+        n = self.num_rows
+        return np.where(self.red[:n], self.red_scores[:n, None], self.blue_scores[:n, None])
+
+    def apply(self, matches):
+        """Adds new matches and replaces the results of ones seen before. Returns the numbers of teams whose scores changed."""
+        if not matches:
+            return set()
+        # only the latest copy of a match counts
+        matches = list({match['matchNumber']: match for match in matches}.values())
+        rescored = []
+        rows = []
+        for match in matches:
+            row = self.rows.get(match['matchNumber'])
+            if row is None:
+                row = self._append_row(len(match['teams']))
+                self.rows[match['matchNumber']] = row
+            elif self.played[row]:
+                rescored.append(row)
+            rows.append(row)
+        rescored = np.array(rescored, dtype=np.int64)
+        rows = np.array(rows, dtype=np.int64)
+
+        # take out what rescored matches contributed before
+        dirty = set(self.team_idx[rescored][self.team_idx[rescored] >= 0].tolist())
+        self._accumulate(rescored, -1)
+
+        for row, match in zip(rows, matches):
+            self.team_idx[row] = -1
+            self.red[row] = False
+            self.counted[row] = False
+            self.played[row] = match['scoreRedFinal'] is not None and match['scoreBlueFinal'] is not None
+            if not self.played[row]:
+                continue
+            self.red_scores[row] = match['scoreRedFinal']
+            self.blue_scores[row] = match['scoreBlueFinal']
+            for s, team in enumerate(match['teams']):
+                self.team_idx[row, s] = self.index[team['teamNumber']]
+                self.red[row, s] = team['station'].startswith("Red")
+                # we ignore surrogate positions for the team scores list
+                self.counted[row, s] = not (team['surrogate'] or team['noShow'])
+
+        team_of, scores = self._accumulate(rows, 1)
+        dirty.update(team_of.tolist())
+        for i in dirty:
+            self._team_scores.pop(i, None)
+        if len(rescored):
+            # maxes can go down, so recount them for the affected teams
+            for i in dirty:
+                team_scores = self._scores_of(i)
+                self.maxes[i] = team_scores.max() if len(team_scores) else np.iinfo(np.int64).min
+        else:
+            np.maximum.at(self.maxes, team_of, scores)
+
+        self._update_top(rows, rescored)
+        return {int(self.numbers[i]) for i in dirty}
+
+    def _append_row(self, num_stations):
+        if self.num_rows == len(self.played) or num_stations > self.team_idx.shape[1]:
+            self._grow(max(len(self.played), self.num_rows + 1) * 2, max(num_stations, self.team_idx.shape[1]))
+        self.num_rows += 1
+        return self.num_rows - 1
+
+    def _grow(self, capacity, num_stations):
+        def grown(arr, fill):
+            shape = (capacity,) + ((num_stations,) if arr.ndim == 2 else ())
+            new = np.full(shape, fill, dtype=arr.dtype)
+            new[(slice(0, arr.shape[0]),) + ((slice(0, arr.shape[1]),) if arr.ndim == 2 else ())] = arr
+            return new
+        self.team_idx = grown(self.team_idx, -1)
+        self.red = grown(self.red, False)
+        self.counted = grown(self.counted, False)
+        self.red_scores = grown(self.red_scores, 0)
+        self.blue_scores = grown(self.blue_scores, 0)
+        self.played = grown(self.played, False)
+
+    def _accumulate(self, rows, sign):
+        """Adds (or with sign=-1, removes) the counted scores in rows to the running totals."""
+        team_idx = self.team_idx[rows]
+        mask = self.counted[rows] & self.played[rows][:, None] & (team_idx >= 0)
+        scores = np.where(self.red[rows], self.red_scores[rows][:, None], self.blue_scores[rows][:, None])
+        team_of = team_idx[mask]
+        scores = scores[mask]
+        np.add.at(self.counts, team_of, sign)
+        np.add.at(self.sums, team_of, sign * scores)
+        np.add.at(self.sq_sums, team_of, sign * scores * scores)
+        return team_of, scores
+
+    def _update_top(self, rows, rescored):
+        # red then blue for each match, so argmax lands on the same alliance a first-to-beat scan would
+        if self._top is not None and self._top[1] in rescored:
+            # the top score might have gone down, so look over everything again
+            self._top = None
+            rows = np.arange(self.num_rows)
+        rows = np.sort(rows)
+        both = np.stack((self.red_scores[rows], self.blue_scores[rows]), axis=1)
+        both[~self.played[rows]] = 0
+        both = both.ravel()
+        if not len(both):
+            return
+        k = int(np.argmax(both))
+        score, row, red = int(both[k]), int(rows[k // 2]), k % 2 == 0
+        if score <= 0:
+            return
+        if self._top is None or score > self._top[0] or (score == self._top[0] and row < self._top[1]):
+            self._top = (score, row, red)
+
+    def _fill_team_scores(self):
+        """Computes every team's score lists in one go, grouping the flattened scores by team."""
+        n = self.num_rows
+        mask = self.counted[:n] & self.played[:n, None] & (self.team_idx[:n] >= 0)
+        # row major, so still in match order
+        team_of = self.team_idx[:n][mask]
+        scores = self.scores[mask]
+        by_team = np.argsort(team_of, kind="stable")
+        team_scores = scores[by_team]
+        sorted_scores = team_scores[np.lexsort((-team_scores, team_of[by_team]))]
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(team_of, minlength=len(self.numbers)))))
+        for i in range(len(self.numbers)):
+            self._team_scores[i] = (team_scores[offsets[i]:offsets[i + 1]], sorted_scores[offsets[i]:offsets[i + 1]])
+
+    def _scores_of(self, i):
+        if i not in self._team_scores:
+            n = self.num_rows
+            mask = (self.team_idx[:n] == i) & self.counted[:n] & self.played[:n, None]
+            scores = self.scores[mask]
+            self._team_scores[i] = (scores, np.sort(scores)[::-1])
+        return self._team_scores[i][0]
+
+    def scores_of(self, number):
+        """A team's scores in match order."""
+        return self._scores_of(self.index[number])
+
+    def sorted_scores_of(self, number):
+        """A team's scores, highest first."""
+        i = self.index[number]
+        self._scores_of(i)
+        return self._team_scores[i][1]
+
+    @property
+    def means(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.sums / self.counts
+
+    @property
+    def stdevs(self):
+        """Sample stdev like statistics.stdev, nan with fewer than 2 scores."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # integer numerator, so no cancellation from the running sums
+            var = (self.counts * self.sq_sums - self.sums * self.sums) / (self.counts * (self.counts - 1))
+            stdevs = np.sqrt(var)
+        stdevs[self.counts < 2] = np.nan
+        return stdevs
+
+    def mean(self, number):
+        i = self.index[number]
+        return float(self.sums[i] / self.counts[i])
+
+    def max(self, number):
+        return int(self.maxes[self.index[number]])
+
+    def top_score(self):
+        """The highest alliance score as (score, team numbers on that alliance)."""
+        if self._top is None:
+            return (0, (99999, 99999))
+        score, row, red = self._top
+        side = (self.red[row] == red) & (self.team_idx[row] >= 0)
+        return (score, tuple(int(n) for n in self.numbers[self.team_idx[row][side]]))
+
+    def rankings(self):
+        """Team numbers ordered by total quals score, ties kept in team order."""
+        return [int(n) for n in self.numbers[np.argsort(-self.sums, kind="stable")]]
+
+    def most_consistent(self, exclude=()):
+        """The team number with the lowest score standard deviation, skipping teams in exclude."""
+        stdevs = self.stdevs
+        for number in exclude:
+            stdevs[self.index[number]] = np.nan
+        return int(self.numbers[np.nanargmin(stdevs)])
@@ -1,14 +1,29 @@
 import datetime
 import random
-import statistics
-import re
-from .data_fetch import FTCEventsClient
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+
+import numpy as np
+
+from .. import trace
+from .bracket import Bracket, EventElimsSeries
+from .data_fetch import FTCEventsClient, ResponseCache
+from .score_store import QualsScores
+from .templates import Template, join
 
 INF_RANK = 999
 class EventTeam:
-    def __init__(self, data):
-        self.data = data
-        self.scores = []
+    # slotted and without the raw team json, since a season's worth of these can be in memory at once
+    __slots__ = ("rng", "spoken", "scores", "sorted_scores", "mentioned", "number", "nick", "rookie", "rank")
+
+    def __init__(self, data, rng=random, spoken=None):
+        # where mention() rolls its dice, the ScriptWriter's seeded Random
+        self.rng = rng
+        # the team's lexicon.TeamEntry if there's a lexicon, which mention() reads from instead of rolling dice
+        self.spoken = spoken
+        # filled in from the QualsScores store: quals scores in match order, and the same scores highest first
+        self.scores = np.zeros(0, dtype=np.int64)
+        self.sorted_scores = self.scores
         self.mentioned = 0
         self.number = data['teamNumber']
         self.nick = data['nameShort']
@@ -19,14 +34,16 @@ class EventTeam:
         self.mentioned += 1
         # the second time a team is mentioned use only their full name
         if self.mentioned == 2 and not full: 
-            return self.nick
+            return self.nick if self.spoken is None else self.spoken.spoken_name
+        elif self.spoken is not None:
+            return self.spoken.mention()
         else:
             # we want to space out the numbers for the benefit of the TTS
             # this randomly changes out zero for the letter "o" for extra inconsistency
             numbers = list(str(self.number))
-            if random.random() < 0.5 or len(numbers) not in (4, 5):
+            if self.rng.random() < 0.5 or len(numbers) not in (4, 5):
                 # spell out all numbers
-                numbers = [c if c != '0' else random.choice(("0", "o")) for c in str(self.number) ]
+                numbers = [c if c != '0' else self.rng.choice(("0", "o")) for c in str(self.number) ]
                 return " ".join(numbers) + " " + self.nick
             else:
                 if len(numbers) == 4:
@@ -38,8 +55,8 @@ class EventTeam:
     
     def relevant_scores(self, exclude=(0,)):
         """Returns the 2 highest scoring matches and the lowest match excluding matches in exclude= """
-        s = [x for x in sorted(self.scores, reverse=True) if x not in exclude]
-        return (s[0], s[1], s[-1])
+        s = self.sorted_scores[~np.isin(self.sorted_scores, exclude)]
+        return (int(s[0]), int(s[1]), int(s[-1]))
     
     def __eq__(self, other):
         return isinstance(other, EventTeam) and self.number == other.number
@@ -48,9 +65,10 @@ class EventTeam:
         return self.mention()
 
 class EventAlliance:
+    __slots__ = ("teams", "seed", "scores")
+
     def __init__(self, data, teams):
-        self.data = data
-        self.teams = [teams[self.data[z]] for z in ("captain", "round1", "round2", "round3") if self.data[z]]
+        self.teams = [teams[data[z]] for z in ("captain", "round1", "round2", "round3") if data[z]]
         self.seed = data['number']
         self.scores = []
     def name(self):
@@ -58,121 +76,301 @@ class EventAlliance:
     def __str__(self):
         return self.name()
 
-class EventElimsSeries:
-    def __init__(self, data, series, red_alliance, blue_alliance):
-        self.data = data
-        self.series = series
-        self.winner = "red"
-        self.num_rounds = 0 
-        self.red_alliance = red_alliance
-        self.blue_alliance = blue_alliance
-        self.red_scores = []
-        self.blue_scores = []
-
-        for match in data:
-            if match['series'] != self.series:
-                continue
-            red, blue = match['scoreRedFinal'], match['scoreBlueFinal']
-            self.red_alliance.scores.append(red)
-            self.blue_alliance.scores.append(blue)
-            self.red_scores.append(red)
-            self.blue_scores.append(blue)
-            # update the number of rounds
-            if match['matchNumber'] > self.num_rounds:
-                self.num_rounds = match['matchNumber']
-                self.winner = "red" if red > blue else "blue"
-            
-    def winning_alliance(self):
-        return self.red_alliance if self.winner == "red" else self.blue_alliance
+OPENING_QUIPS = (
+    "The competition was strong yet diverse with both veteran teams and new teams.",
+    "This competition was electrifying to watch.",
+    "This competition was critical for top teams on their way to regionals.",
+    "Because of pandemic restrictions, this event was smaller than usual, but was even more intense."
+)
+
+ANALYSIS_QUIPS = (
+    "Their robot's high scores came from their fast rev slides.",
+    "Their robot's fast intake, spending only 2 seconds max on collection each cycle, was critical to their success.",
+    "Their robot's speedy lift arm made those high scores possible.",
+    "Their robot's 20 to 1 drivetrain gave them the edge they needed.",
+    "Their robot's aerodynamic pocketing gave them dominating speed.",
+    "Their robot's mecanum drivetrain gave them the precision needed to score.",
+    "Their robot's six wheel drive gave them the acceleration needed to score.",
+    "Their robot's go build a turret made them unmatched on the shared hub."
+    "Their driveteam's many hours of practice have paid off.",
+)
+
+# section templates, compiled once at import
+INTRO_TEMPLATE = Template("""Hello, this is Outreach Generator version seven point oh one three and today on Automated Eff Tee See Recap
+we will be talking about the {event_name} {event_type} that happened out of {city}, {state_prov} {region_name}, on {date_text}. """)
+
+QUALS_TEMPLATE = Template("""
+{opening_quip}
+The highest score in qualification matches was an impressive {highest_quals_score} points by 
+{top_score_teams}.
+{first_team} was one of the top teams at this event, putting up scores of 
+{first_score0} points, {first_score1} points, and {first_score2} points.
+{analysis}
+Additionally, {second_team} also put up {second_score0} points, {second_score1} points, and an average of {second_mean:.1f}.
+The most consistent team we saw was {consistent_team} with a high score of {consistent_max} and 
+an average of {consistent_mean:.1f}. 
+""")
+
+NO_ELIMS_TEMPLATE = Template("""Due to the state of the pandemic at the time of the event, there were no eliminations matches.
+            Instead of winning and finalist alliances, advancement considers team rank.
+            The first ranked team was {team1} with {points1} ranking points.
+            The second ranked team was {team2} with {points2} ranking points.
+            The third ranked team was {team3} with {points3} ranking points.
+            The fourth ranked team was {team4} with {points4} ranking points. """)
+
+# alliance selection, one line per alliance
+FIRST_PICK_TEMPLATE = Template("""
+During alliance selection, 
+the {nth} alliance captain {captain} selected {picks}.
+""")
+NEXT_PICK_TEMPLATE = Template("""The {nth} captain {captain} selected {picks}.
+""")
+LAST_PICK_TEMPLATE = Template("""Finally, the {nth} captain {captain} selected {picks}.
+""")
+PICKS_OUTRO = """These were strategic picks, combining match scouting, pit scouting, and advancement considerations.
+        """
+
+# one sentence per playoff round before the finals
+ROUND_TEMPLATE = Template("""
+In {round_name}, the {results}. 
+""")
+ROUND_NAMES = {
+    "OCTOFINAL": "octofinals",
+    "QUARTERFINAL": "quarterfinals",
+    "SEMIFINAL": "semifinals",
+}
+
+FINALS_TEMPLATE = Template("""In finals, the {winners} composed of {winning_teams} would prevail in 
+{finals_rounds} matches. 
+The finals rounds would have intense high scores of {finals_red} points from {red_captain}'s {red_alliance} and 
+{finals_blue} points from {blue_captain}'s {blue_alliance}.
+""")
+
+ELIMS_OUTRO_TEMPLATE = Template("""The highest score in eliminations was from {high_alliance} with a score of {high_score}. 
+These were some high level matches at this tournament at this stage of the season, and I'm excited to see how the season progresses. 
+""")
+
+AWARDS_TEMPLATE = Template("""\nAs for awards, the Inspire nominations were {inspire} winning{runners_up}. \n""")
+
+CONCLUSION = "I'm excited to cover how these teams will do at regionals, worlds, or Em Tee Eye in future episodes."
 
 class ScriptWriter:
-    """The video script writer."""
-    def __init__(self, event_code, client, init_data=True):
+    """The video script writer.
+
+    Every dataset (event, teams, quals, rankings, alliances, playoffs, awards) and every aggregate built from them
+    (top_score, team_rankings, elims) is fetched or computed the first time it's used, so a single section only costs
+    the requests it actually needs. init_data=True fetches everything up front instead, concurrently if asked to.
+    Any of them can also be assigned directly to skip the fetch entirely, which is how snapshot.load() brings back a
+    fully built writer.
+
+    All the random picks (quips, how team numbers get read out) come from a Random seeded with the event code, or
+    with seed= if given, so the same data always renders the same script. With a lexicon (see lexicon.Lexicon) team
+    mentions are looked up in it instead, already spelled out for the TTS.
+    """
+    # raw payloads (each fetched by its _fetch_<name> method), in the order a sequential prefetch requests them
+    PAYLOADS = ("events", "teams", "quals", "rankings", "alliances", "playoffs", "awards")
+
+    def __init__(self, event_code, client, init_data=True, concurrent=False, max_workers=8, seed=None, lexicon=None):
         self.event_code: str = event_code
         self.client: FTCEventsClient = client
-        self.event = None
+        self.rng = random.Random(event_code if seed is None else seed)
+        self.lexicon = lexicon
+        # raw api payloads fetched so far
+        self._payloads = {}
+
+        if init_data:
+            self.prefetch(concurrent=concurrent, max_workers=max_workers)
+
+    @trace.traced()
+    def prefetch(self, concurrent=False, max_workers=8):
+        """Fetches every raw payload that hasn't been fetched yet."""
+        if concurrent:
+            for name, payload in self._fetch_concurrent(max_workers).items():
+                self._payloads.setdefault(name, payload)
+        else:
+            for name in self.PAYLOADS:
+                self._payload(name)
+
+    def payloads(self, concurrent=False, max_workers=8):
+        """Every raw api payload for the event by name (see PAYLOADS), fetching whatever hasn't been yet."""
+        self.prefetch(concurrent=concurrent, max_workers=max_workers)
+        return dict(self._payloads)
 
-        if not init_data:
-            return
+    def _payload(self, name):
+        if name not in self._payloads:
+            self._payloads[name] = getattr(self, "_fetch_" + name)()
+        return self._payloads[name]
 
-        # fetch the event info
+    def _fetch_events(self):
         data = self.client.fetch("events", eventCode=self.event_code)
         if not data['events']:
             raise ValueError(f"No events exist with the code {self.event_code}")
-        event = data['events'][0]
-        self.event = event
+        return data
 
-        # fetch all team data
-        self.teams = {}
+    def _fetch_teams(self):
+        pages = []
         page_idx = 1
         while True:
             data = self.client.fetch("teams", eventCode=self.event_code, page=page_idx)
-            for team_data in data['teams']:
-                self.teams[team_data['teamNumber']] = EventTeam(team_data)
-
+            pages.append(data)
             if page_idx == data['pageTotal']:
                 break
             page_idx += 1
-        
+        return pages
 
-        # fetch quals match data
+    def _fetch_quals(self):
         # the hybrid event data is most useful
-        matches = self.client.fetch(f"schedule/{self.event_code}/qual/hybrid")
-        self.quals = matches['schedule']
-
-        rankings = self.client.fetch(f"rankings/{self.event_code}")
-        self.rankings = sorted([(x['rank'], self.teams[x['teamNumber']], x['sortOrder1']) for x in rankings['Rankings']], key=lambda x: int(x[0]))
-
-        # team number -> team scores
-
-        # top alliance score
-        self.top_score = (0, (99999, 99999))
-        for match in self.quals:
-            red_side = []
-            blue_side = []
-
-            # loop through teams to calculate rankings
-            for team in match['teams']:
-                number = team['teamNumber']
-                if team['station'].startswith("Red"):
-                    score = match['scoreRedFinal']
-                    red_side.append(number)
-                else:
-                    score = match['scoreBlueFinal']
-                    blue_side.append(number)
-
-                if team['surrogate'] or team['noShow']:
-                    # we ignore surrogate positions for the team scores list
-                    continue
-                # add the score to the team scores list
-                self.teams[number].scores.append(score)
-
-            # check if we should replace the top score
-            if match['scoreRedFinal'] > self.top_score[0]:
-                self.top_score = (match['scoreRedFinal'], tuple(red_side))
-            if match['scoreBlueFinal'] > self.top_score[0]:
-                self.top_score = (match['scoreBlueFinal'], tuple(blue_side))
-
-        # approximate event-specific rankings
-        self.team_rankings = sorted(self.teams.keys(), key=lambda t: sum(self.teams[t].scores), reverse=True)
-        for rank, number in enumerate(self.team_rankings, 1):
-            self.teams[number].rank = rank
-
-        # fetch alliances and awards
-        self.alliances = [EventAlliance(data, self.teams) for data in self.client.fetch("alliances/" + self.event_code)['alliances']]
-        self.alliances.sort(key=lambda x: x.seed)
-        self.playoffs = []
-        self.elims = []
-        if self.alliances:
-            self.playoffs = self.client.fetch(f"schedule/{self.event_code}/playoff/hybrid")['schedule']
-            self.elims = [
-                EventElimsSeries(self.playoffs, 1, self.alliances[0], self.alliances[3]),
-                EventElimsSeries(self.playoffs, 2, self.alliances[1], self.alliances[2]),
+        return self.client.fetch(f"schedule/{self.event_code}/qual/hybrid")
+
+    def _fetch_rankings(self):
+        return self.client.fetch(f"rankings/{self.event_code}")
+
+    def _fetch_alliances(self):
+        return self.client.fetch("alliances/" + self.event_code)
+
+    def _fetch_playoffs(self):
+        # no alliances means no playoffs to fetch
+        if not self._payload('alliances')['alliances']:
+            return None
+        return self.client.fetch(f"schedule/{self.event_code}/playoff/hybrid")
+
+    def _fetch_awards(self):
+        return self.client.fetch("awards/" + self.event_code)
+
+    def _fetch_concurrent(self, max_workers):
+        """Fetches the raw api payloads for the event with all independent requests in flight at once.
+
+        The playoff schedule is fetched speculatively since we don't know yet whether there are alliances,
+        and the remaining teams pages fan out once the first page tells us pageTotal."""
+        code = self.event_code
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                'events': pool.submit(self.client.fetch, "events", eventCode=code),
+                'teams': pool.submit(self.client.fetch, "teams", eventCode=code, page=1),
+                'quals': pool.submit(self.client.fetch, f"schedule/{code}/qual/hybrid"),
+                'rankings': pool.submit(self.client.fetch, f"rankings/{code}"),
+                'alliances': pool.submit(self.client.fetch, "alliances/" + code),
+                'playoffs': pool.submit(self.client.fetch, f"schedule/{code}/playoff/hybrid"),
+                'awards': pool.submit(self.client.fetch, "awards/" + code),
+            }
+            first_page = futures['teams'].result()
+            team_pages = [first_page] + [
+                pool.submit(self.client.fetch, "teams", eventCode=code, page=page_idx)
+                for page_idx in range(2, first_page['pageTotal'] + 1)
             ]
-            self.elims.insert(0, EventElimsSeries(self.playoffs, 0, self.elims[0].winning_alliance(), self.elims[1].winning_alliance()))
-
-        self.awards = self.client.fetch("awards/" + self.event_code)['awards']
+            payloads = {name: fut.result() for name, fut in futures.items()}
+            payloads['teams'] = [first_page] + [fut.result() for fut in team_pages[1:]]
 
+        if not payloads['events']['events']:
+            raise ValueError(f"No events exist with the code {self.event_code}")
+        if not payloads['alliances']['alliances']:
+            payloads['playoffs'] = None
+        return payloads
+
+    @cached_property
+    @trace.traced()
+    def event(self):
+        return self._payload('events')['events'][0]
+
+    @cached_property
+    @trace.traced()
+    def teams(self):
+        teams = {}
+        for data in self._payload('teams'):
+            for team_data in data['teams']:
+                spoken = None
+                if self.lexicon is not None:
+                    spoken = self.lexicon.entry(team_data['teamNumber'], team_data['nameShort'])
+                teams[team_data['teamNumber']] = EventTeam(team_data, self.rng, spoken)
+        return teams
+
+    @cached_property
+    @trace.traced()
+    def quals(self):
+        return self._payload('quals')['schedule']
+
+    @cached_property
+    @trace.traced()
+    def rankings(self):
+        rankings = self._payload('rankings')
+        return sorted([(x['rank'], self.teams[x['teamNumber']], x['sortOrder1']) for x in rankings['Rankings']], key=lambda x: int(x[0]))
+
+    @cached_property
+    @trace.traced()
+    def score_store(self):
+        """Quals scores in columnar form. Building it also fills in every team's scores."""
+        store = QualsScores(self.quals, self.teams)
+        self._bind_scores(store, self.teams)
+        return store
+
+    def _bind_scores(self, store, numbers):
+        for number in numbers:
+            team = self.teams[number]
+            team.scores = store.scores_of(number)
+            team.sorted_scores = store.sorted_scores_of(number)
+
+    @cached_property
+    @trace.traced()
+    def top_score(self):
+        """The top alliance score in quals as (score, team numbers)."""
+        return self.score_store.top_score()
+
+    @cached_property
+    @trace.traced()
+    def team_rankings(self):
+        """Approximate event-specific rankings. Also sets each team's rank."""
+        team_rankings = self.score_store.rankings()
+        for rank, number in enumerate(team_rankings, 1):
+            self.teams[number].rank = rank
+        return team_rankings
+
+    @cached_property
+    @trace.traced()
+    def alliances(self):
+        alliances = [EventAlliance(data, self.teams) for data in self._payload('alliances')['alliances']]
+        alliances.sort(key=lambda x: x.seed)
+        return alliances
+
+    @cached_property
+    @trace.traced()
+    def playoffs(self):
+        if not self.alliances:
+            return []
+        return self._payload('playoffs')['schedule']
+
+    @cached_property
+    @trace.traced()
+    def bracket(self):
+        """Every playoff series, in one pass over the playoff schedule. Also fills in each alliance's scores."""
+        return Bracket(self.playoffs, self.alliances)
+
+    @cached_property
+    @trace.traced()
+    def elims(self):
+        """The playoff series, finals first and the rest in bracket order."""
+        if not self.alliances:
+            return []
+        bracket = self.bracket
+        return ([bracket.final] if bracket.final is not None else []) + bracket.others
+
+    @cached_property
+    @trace.traced()
+    def awards(self):
+        return self._payload('awards')['awards']
+
+    def compact(self):
+        """Builds everything the sections read, then drops the raw api payloads, which are most of what a writer holds.
+
+        The script still renders afterwards, but anything raw that gets asked for again is refetched, so this isn't
+        for a LiveScriptWriter that's still polling."""
+        for name in ("event", "teams", "rankings", "score_store", "top_score", "team_rankings", "alliances", "bracket", "elims", "awards"):
+            getattr(self, name)
+        self._payloads.clear()
+        # the raw schedules only go into building score_store and elims
+        self.__dict__.pop("quals", None)
+        self.__dict__.pop("playoffs", None)
+
+    @trace.traced()
     def event_intro(self):
         """Generates an intro sentence for the script."""
         event_name = "Insert Event Name Here"
@@ -207,11 +405,10 @@ class ScriptWriter:
         else:
             date_text = f"{date_fend}, {date_start.year}"
 
-        dialog = f"""Hello, this is Outreach Generator version seven point oh one three and today on Automated Eff Tee See Recap
-we will be talking about the {event_name} {event_type} that happened out of {city}, {state_prov} {region_name}, on {date_text}. """
-
-        return dialog
+        return INTRO_TEMPLATE.render(event_name=event_name, event_type=event_type, city=city, state_prov=state_prov,
+                                     region_name=region_name, date_text=date_text)
     
+    @trace.traced()
     def quals_matches(self):
 
         """Generates a quals summary"""
@@ -224,53 +421,50 @@ we will be talking about the {event_name} {event_type} that happened out of {cit
         # then talk about the next highest ranked unmentioned team and their 3 "best" scores
         # 
         # talk about the team with the lowest score standard deviation as the most "consistent" team
-        opening_quip = random.choice([
-            "The competition was strong yet diverse with both veteran teams and new teams.",
-            "This competition was electrifying to watch.",
-            "This competition was critical for top teams on their way to regionals.",
-            "Because of pandemic restrictions, this event was smaller than usual, but was even more intense."
-        ])
+        opening_quip = self.rng.choice(OPENING_QUIPS)
         if len(self.top_score[1]) == 1:
             opening_quip = "Due to the pandemic, this event was conducted remotely."
 
-        analysis_choices = [
-            "Their robot's high scores came from their fast rev slides.",
-            "Their robot's fast intake, spending only 2 seconds max on collection each cycle, was critical to their success.",
-            "Their robot's speedy lift arm made those high scores possible.",
-            "Their robot's 20 to 1 drivetrain gave them the edge they needed.",
-            "Their robot's aerodynamic pocketing gave them dominating speed.",
-            "Their robot's mecanum drivetrain gave them the precision needed to score.",
-            "Their robot's six wheel drive gave them the acceleration needed to score.",
-            "Their robot's go build a turret made them unmatched on the shared hub."
-            "Their driveteam's many hours of practice have paid off.",
-        ]
-        top_score_teams = [self.teams[x] for x in self.top_score[1]]
+        top_score_teams, first_team, second_team = self._quals_teams()
         highest_quals_score: EventTeam = self.top_score[0]
 
-        first_team = min(top_score_teams, key=lambda t: t.rank)
         first_scores = first_team.relevant_scores(exclude=(highest_quals_score,))
-        second_team = min(self.teams.values(), key=lambda t: t.rank if t != first_team else INF_RANK)
         second_scores = second_team.relevant_scores(exclude=(highest_quals_score,))
-        consistent_team = min(self.teams.values(), key=lambda t: statistics.stdev(t.scores) if t != first_team and t != second_team else INF_RANK)
+        store = self.score_store
+        consistent_team = self.teams[store.most_consistent(exclude=(first_team.number, second_team.number))]
         #consistent_scores = first_team.relevant_scores(exclude=(highest_quals_score,))
 
-        quals_script = f"""
-{opening_quip}
-The highest score in qualification matches was an impressive {highest_quals_score} points by 
-{word_join(top_score_teams, key=str)}.
-{first_team} was one of the top teams at this event, putting up scores of 
-{first_scores[0]} points, {first_scores[1]} points, and {first_scores[2]} points.
-{random.choice(analysis_choices)}
-Additionally, {second_team} also put up {second_scores[0]} points, {second_scores[1]} points, and an average of {statistics.mean(second_team.scores):.1f}.
-The most consistent team we saw was {consistent_team} with a high score of {max(consistent_team.scores)} and 
-an average of {statistics.mean(consistent_team.scores):.1f}. 
-"""
-        return quals_script
-
+        return QUALS_TEMPLATE.render(
+            opening_quip=opening_quip,
+            highest_quals_score=highest_quals_score,
+            top_score_teams=lambda: word_join(top_score_teams, key=str),
+            first_team=first_team,
+            first_score0=first_scores[0],
+            first_score1=first_scores[1],
+            first_score2=first_scores[2],
+            analysis=lambda: self.rng.choice(ANALYSIS_QUIPS),
+            second_team=second_team,
+            second_score0=second_scores[0],
+            second_score1=second_scores[1],
+            second_mean=store.mean(second_team.number),
+            consistent_team=consistent_team,
+            consistent_max=store.max(consistent_team.number),
+            consistent_mean=store.mean(consistent_team.number),
+        )
+
+
+    def _quals_teams(self):
+        """The teams on the top scoring alliance, the best ranked of them, and the best ranked team after that."""
+        self.team_rankings # makes sure every team has a rank
+        top_score_teams = [self.teams[x] for x in self.top_score[1]]
+        first_team = min(top_score_teams, key=lambda t: t.rank)
+        second_team = min(self.teams.values(), key=lambda t: t.rank if t != first_team else INF_RANK)
+        return top_score_teams, first_team, second_team
 
+    @trace.traced()
     def elims_matches(self):
         """generates an elims script"""
-        # read off all four captains
+        # read off every captain
         # mention who the semifinals winners pick
         # read off how both semifinal sets go (whether there is a tiebreaker, the final winning scores)
         # if tiebreaker:
@@ -280,60 +474,78 @@ an average of {statistics.mean(consistent_team.scores):.1f}.
         # with "the winning alliance scores something something something"
 
         if self.event['regionCode'] == "USCHS" and not self.alliances:
-            script = f"""Due to the state of the pandemic at the time of the event, there were no eliminations matches.
-            Instead of winning and finalist alliances, advancement considers team rank.
-            The first ranked team was {self.rankings[0][1]} with {self.rankings[0][2]} ranking points.
-            The second ranked team was {self.rankings[1][1]} with {self.rankings[1][2]} ranking points.
-            The third ranked team was {self.rankings[2][1]} with {self.rankings[2][2]} ranking points.
-            The fourth ranked team was {self.rankings[3][1]} with {self.rankings[3][2]} ranking points. """
-
-            return script
+            top = self.rankings[:4]
+            return NO_ELIMS_TEMPLATE.render(
+                team1=top[0][1], points1=top[0][2],
+                team2=top[1][1], points2=top[1][2],
+                team3=top[2][1], points3=top[2][2],
+                team4=top[3][1], points4=top[3][2],
+            )
 
         if not self.alliances:
             return ""
 
-        alliances_script = f"""
-During alliance selection, 
-the first alliance captain {self.alliances[0].teams[0].mention()} selected {word_join(self.alliances[0].teams[1:], key=lambda x: x.mention())}.
-The second captain {self.alliances[1].teams[0].mention()} selected {word_join(self.alliances[1].teams[1:], key=lambda x: x.mention())}.
-The third captain {self.alliances[2].teams[0].mention()} selected {word_join(self.alliances[2].teams[1:], key=lambda x: x.mention())}.
-Finally, the fourth captain {self.alliances[3].teams[0].mention()} selected {word_join(self.alliances[3].teams[1:], key=lambda x: x.mention())}.
-These were strategic picks, combining match scouting, pit scouting, and advancement considerations.
-        """
-        finals, semis1, semis2 = self.elims
-
-        undefeated = 'undefeated' if self.elims[1].num_rounds == 2  else "in a tiebreaker"
-        if semis1.winner == "red":
-            semis1_msg = f"first alliance beat fourth alliance {undefeated}"
-        else:
-            semis1_msg = f"fourth alliance beat first alliance in an {undefeated} upset"
-        
-        
-        if semis2.winner == "red":
-            semis2_msg = "second alliance beat third alliance"
+        parts = [self._alliance_selection()]
+        for level, series in self.bracket.rounds().items():
+            parts.append(ROUND_TEMPLATE.render(
+                round_name=ROUND_NAMES.get(level, "the playoffs"),
+                results=word_join([self._series_result(s) for s in series]),
+            ))
+
+        finals = self.bracket.final
+        if finals is not None and finals.red_scores:
+            winners = finals.winning_alliance()
+            parts.append(FINALS_TEMPLATE.render(
+                winners=winners.name(),
+                winning_teams=lambda: word_join(winners.teams, key=lambda x: x.mention(full=True)),
+                finals_rounds=finals.num_rounds,
+                finals_red=max(finals.red_scores),
+                red_captain=finals.red_alliance.teams[0],
+                red_alliance=finals.red_alliance,
+                finals_blue=max(finals.blue_scores),
+                blue_captain=finals.blue_alliance.teams[0],
+                blue_alliance=finals.blue_alliance,
+            ))
+
+        played = [alliance for alliance in self.alliances if alliance.scores]
+        if played:
+            high_alliance = max(played, key=lambda z: max(z.scores))
+            parts.append(ELIMS_OUTRO_TEMPLATE.render(high_alliance=high_alliance.name(), high_score=max(high_alliance.scores)))
+        return join(parts)
+
+    def _alliance_selection(self):
+        """Reads off every captain and who they picked."""
+        alliances = [alliance for alliance in self.alliances if len(alliance.teams) > 1]
+        lines = []
+        for i, alliance in enumerate(alliances):
+            if i == 0:
+                template = FIRST_PICK_TEMPLATE
+            elif i == len(alliances) - 1:
+                template = LAST_PICK_TEMPLATE
+            else:
+                template = NEXT_PICK_TEMPLATE
+            lines.append(template.render(
+                nth=get_nth(alliance.seed),
+                captain=alliance.teams[0].mention,
+                picks=lambda alliance=alliance: word_join(alliance.teams[1:], key=lambda x: x.mention()),
+            ))
+        lines.append(PICKS_OUTRO)
+        return join(lines)
+
+    def _series_result(self, series):
+        """How a series went, e.g. "first alliance beat fourth alliance undefeated", in one of two phrasings."""
+        winner, loser = series.winning_alliance(), series.losing_alliance()
+        undefeated = "undefeated" if series.undefeated else "in a tiebreaker"
+        if winner.seed < loser.seed:
+            plain = f"{winner} beat {loser} {undefeated}"
         else:
-            semis2_msg = "third alliance beat second alliance"
-        if semis2.num_rounds == 2:
-            semis2_msg += " undefeated"
-        else :
-            semis2_msg += " clutched through a tiebreaker"
-        high_alliance = max(self.alliances, key=lambda z: max(z.scores))
-
-        winners = self.elims[0].winning_alliance()
-        finals_red = max(self.elims[0].red_scores) 
-        finals_blue = max(self.elims[0].blue_scores)
-
-        elims_script = f"""
-In semifinals, the {semis1_msg} and {semis2_msg}. 
-In finals, the {winners.name()} composed of {word_join(winners.teams, key=lambda x: x.mention(full=True))} would prevail in 
-{self.elims[0].num_rounds} matches. 
-The finals rounds would have intense high scores of {finals_red} points from {finals.red_alliance.teams[0]}'s {finals.red_alliance} and 
-{finals_blue} points from {finals.blue_alliance.teams[0]}'s {finals.blue_alliance}.
-The highest score in eliminations was from {high_alliance.name()} with a score of {max(high_alliance.scores)}. 
-These were some high level matches at this tournament at this stage of the season, and I'm excited to see how the season progresses. 
-"""
-        return alliances_script + elims_script
+            plain = f"{winner} beat {loser} in an {undefeated} upset"
+        return self.rng.choice((
+            plain,
+            f"{winner} beat {loser}" + (" undefeated" if series.undefeated else " clutched through a tiebreaker"),
+        ))
     
+    @trace.traced()
     def awards_conclusion(self):
         """awards/conclusion"""
 
@@ -341,24 +553,23 @@ These were some high level matches at this tournament at this stage of the seaso
             self.teams[a['teamNumber']] for a in sorted(filter(lambda x: x['awardId'] == 11, self.awards), key=lambda a: a['series'])
         ]
 
+        runners_up = ""
         if len(inspire_teams) > 1:
-            runners_up = f", followed by {word_join(inspire_teams[1:], lambda x: x.mention(full=True))}"
+            runners_up = ", followed by " + word_join(inspire_teams[1:], lambda x: x.mention(full=True))
 
         if len(inspire_teams):
-            awards_script = f"""\nAs for awards, the Inspire nominations were {inspire_teams[0].mention(full=True)} winning{runners_up}. \n"""
+            awards_script = AWARDS_TEMPLATE.render(inspire=lambda: inspire_teams[0].mention(full=True), runners_up=runners_up)
         else:
             awards_script = ""
-        end_script = "I'm excited to cover how these teams will do at regionals, worlds, or Em Tee Eye in future episodes."
 
-        return awards_script + end_script
+        return join((awards_script, CONCLUSION))
         # read off the inspire nominees
         # say some quip about being excited to see how teams will do later in the season
     
+    @trace.traced()
     def full_script(self):
         """Returns the full script with some basic preprocessing done."""
-        return re.sub(' +', ' ',
-            (self.event_intro() + self.quals_matches() + 
-            self.elims_matches() + self.awards_conclusion()).replace("\n", " "))
+        return join((self.event_intro(), self.quals_matches(), self.elims_matches(), self.awards_conclusion()))
 
 us_state_to_abbrev = {
     "Alabama": "AL",
@@ -453,6 +664,6 @@ if __name__ == "__main__":
     import sys
     with open("token") as f:
         creds = json.load(f)
-    c = FTCEventsClient(creds['username'], creds['token'])
-    script = ScriptWriter(sys.argv[1], c)
+    c = FTCEventsClient(creds['username'], creds['token'], cache=ResponseCache())
+    script = ScriptWriter(sys.argv[1], c, concurrent=True)
     print(script.full_script())
\ No newline at end of file
@@ -0,0 +1,324 @@
+import datetime
+import json
+import sqlite3
+import threading
+
+from .data_fetch import FTCEventsClient
+from .script_writer import ScriptWriter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    code TEXT PRIMARY KEY,
+    date_start TEXT,
+    date_end TEXT,
+    data TEXT NOT NULL,
+    -- when the event's teams/matches/awards were last pulled into the index, NULL if never
+    indexed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS teams (
+    number INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS event_teams (
+    event_code TEXT NOT NULL,
+    team_number INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    PRIMARY KEY (event_code, team_number)
+);
+CREATE INDEX IF NOT EXISTS event_teams_by_team ON event_teams (team_number);
+CREATE TABLE IF NOT EXISTS matches (
+    event_code TEXT NOT NULL,
+    level TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    series INTEGER NOT NULL,
+    match_number INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (event_code, level, seq)
+);
+CREATE TABLE IF NOT EXISTS match_teams (
+    event_code TEXT NOT NULL,
+    level TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    team_number INTEGER NOT NULL,
+    station TEXT
+);
+CREATE INDEX IF NOT EXISTS match_teams_by_event ON match_teams (event_code, level);
+CREATE INDEX IF NOT EXISTS match_teams_by_team ON match_teams (team_number);
+CREATE TABLE IF NOT EXISTS rankings (
+    event_code TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    team_number INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (event_code, seq)
+);
+CREATE TABLE IF NOT EXISTS alliances (
+    event_code TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (event_code, seq)
+);
+CREATE TABLE IF NOT EXISTS awards (
+    event_code TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    award_id INTEGER,
+    team_number INTEGER,
+    data TEXT NOT NULL,
+    PRIMARY KEY (event_code, seq)
+);
+CREATE INDEX IF NOT EXISTS awards_by_team ON awards (team_number);
+"""
+
+# tables holding per-event detail, cleared and refilled whenever an event gets reindexed
+EVENT_TABLES = ("event_teams", "matches", "match_teams", "rankings", "alliances", "awards")
+
+class SeasonIndex:
+    """A local SQLite index of the season's events, teams, matches, rankings, alliances and awards.
+
+    Each team's data is stored once no matter how many events it went to, and everything is keyed so a
+    ScriptWriter can be served out of it with indexed queries (see script_writer()) and cross-event questions
+    like "which events has this team been to" are one query.
+    update() fills it from the api in bulk, and on later runs only refetches events that are new or were
+    still running the last time they were indexed.
+    """
+    # how long after an event ends its data can still change (late rescoring, awards getting posted)
+    FINISHED_GRACE = datetime.timedelta(days=2)
+
+    def __init__(self, path="season.db"):
+        self.path = path
+        # one connection shared by every thread, ScriptWriter's concurrent prefetch reads from a thread pool
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self.db:
+            self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _query(self, sql, args=()):
+        with self._lock:
+            return self.db.execute(sql, args).fetchall()
+
+    # writing
+
+    def put_events(self, events):
+        """Adds or updates events from the season events listing, keeping whatever detail was already indexed."""
+        with self._lock, self.db:
+            self._upsert_events(events)
+
+    def _upsert_events(self, events):
+        # caller holds the lock
+        self.db.executemany(
+            "INSERT INTO events (code, date_start, date_end, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (code) DO UPDATE SET date_start = excluded.date_start, date_end = excluded.date_end, data = excluded.data",
+            [(e['code'], e['dateStart'], e['dateEnd'], json.dumps(e)) for e in events],
+        )
+
+    def put_event_data(self, event_code, payloads):
+        """Replaces everything indexed for an event with a ScriptWriter's raw payloads, in one transaction."""
+        team_rows = []
+        for page in payloads['teams']:
+            team_rows.extend(page['teams'])
+        quals = payloads['quals']['schedule']
+        playoffs = payloads['playoffs']['schedule'] if payloads.get('playoffs') else []
+
+        match_rows = []
+        match_team_rows = []
+        for level, schedule in (("qual", quals), ("playoff", playoffs)):
+            for seq, match in enumerate(schedule):
+                match_rows.append((event_code, level, seq, match['series'], match['matchNumber'], json.dumps(match)))
+                match_team_rows.extend(
+                    (event_code, level, seq, team['teamNumber'], team['station']) for team in match['teams'] if team['teamNumber']
+                )
+
+        with self._lock, self.db:
+            for table in EVENT_TABLES:
+                self.db.execute(f"DELETE FROM {table} WHERE event_code = ?", (event_code,))
+            self._upsert_events(payloads['events']['events'])
+            self.db.executemany(
+                "INSERT OR REPLACE INTO teams (number, data) VALUES (?, ?)",
+                [(t['teamNumber'], json.dumps(t)) for t in team_rows],
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO event_teams (event_code, team_number, seq) VALUES (?, ?, ?)",
+                [(event_code, t['teamNumber'], seq) for seq, t in enumerate(team_rows)],
+            )
+            self.db.executemany("INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?)", match_rows)
+            self.db.executemany("INSERT INTO match_teams VALUES (?, ?, ?, ?, ?)", match_team_rows)
+            self.db.executemany(
+                "INSERT INTO rankings VALUES (?, ?, ?, ?)",
+                [(event_code, seq, r['teamNumber'], json.dumps(r)) for seq, r in enumerate(payloads['rankings']['Rankings'])],
+            )
+            self.db.executemany(
+                "INSERT INTO alliances VALUES (?, ?, ?)",
+                [(event_code, seq, json.dumps(a)) for seq, a in enumerate(payloads['alliances']['alliances'])],
+            )
+            self.db.executemany(
+                "INSERT INTO awards VALUES (?, ?, ?, ?, ?)",
+                [(event_code, seq, a['awardId'], a['teamNumber'], json.dumps(a)) for seq, a in enumerate(payloads['awards']['awards'])],
+            )
+            self.db.execute("UPDATE events SET indexed_at = ? WHERE code = ?", (datetime.datetime.now().isoformat(), event_code))
+
+    def settled(self, event_code):
+        """Whether the event's indexed data was fetched late enough that it won't change anymore."""
+        rows = self._query("SELECT date_end, indexed_at FROM events WHERE code = ?", (event_code,))
+        if not rows or rows[0][1] is None:
+            return False
+        date_end, indexed_at = rows[0]
+        return datetime.datetime.fromisoformat(indexed_at) > FTCEventsClient.date_parse(date_end) + self.FINISHED_GRACE
+
+    def update(self, client, event_codes=None, refresh=False, concurrent=True):
+        """Pulls the season's event listing, then the full data for every event (or just event_codes).
+
+        Events that haven't started yet are skipped, and ones already indexed after they finished are kept as is
+        unless refresh=True. Returns the codes of the events that got (re)indexed."""
+        events = client.fetch("events")['events']
+        self.put_events(events)
+        starts = {e['code']: client.date_parse(e['dateStart']) for e in events}
+        if event_codes is None:
+            event_codes = [e['code'] for e in events]
+
+        now = datetime.datetime.now()
+        updated = []
+        for code in event_codes:
+            if code in starts and starts[code] > now:
+                continue
+            if not refresh and self.settled(code):
+                continue
+            writer = ScriptWriter(code, client, init_data=False)
+            self.put_event_data(code, writer.payloads(concurrent=concurrent))
+            updated.append(code)
+        return updated
+
+    # reading, in the shape the api returns so a ScriptWriter can't tell the difference
+
+    def _indexed(self, event_code):
+        rows = self._query("SELECT indexed_at FROM events WHERE code = ?", (event_code,))
+        if not rows or rows[0][0] is None:
+            raise KeyError(f"{event_code} isn't in the season index, run update() for it first")
+
+    def events(self, event_code=None):
+        if event_code is None:
+            rows = self._query("SELECT data FROM events ORDER BY date_start, code")
+        else:
+            rows = self._query("SELECT data FROM events WHERE code = ?", (event_code,))
+        events = [json.loads(data) for data, in rows]
+        return {"events": events, "eventCount": len(events)}
+
+    def teams(self, event_code):
+        self._indexed(event_code)
+        rows = self._query(
+            "SELECT teams.data FROM event_teams JOIN teams ON teams.number = event_teams.team_number "
+            "WHERE event_teams.event_code = ? ORDER BY event_teams.seq",
+            (event_code,),
+        )
+        teams = [json.loads(data) for data, in rows]
+        return {"teams": teams, "teamCountTotal": len(teams), "teamCountPage": len(teams), "pageCurrent": 1, "pageTotal": 1}
+
+    def season_teams(self):
+        """Every team that's been to an indexed event, in number order."""
+        return [json.loads(data) for data, in self._query("SELECT data FROM teams ORDER BY number")]
+
+    def schedule(self, event_code, level, start=None):
+        self._indexed(event_code)
+        sql = "SELECT data FROM matches WHERE event_code = ? AND level = ?"
+        args = [event_code, level]
+        if start is not None:
+            sql += " AND match_number >= ?"
+            args.append(int(start))
+        rows = self._query(sql + " ORDER BY seq", args)
+        return {"schedule": [json.loads(data) for data, in rows]}
+
+    def rankings(self, event_code):
+        self._indexed(event_code)
+        rows = self._query("SELECT data FROM rankings WHERE event_code = ? ORDER BY seq", (event_code,))
+        return {"Rankings": [json.loads(data) for data, in rows]}
+
+    def alliances(self, event_code):
+        self._indexed(event_code)
+        rows = self._query("SELECT data FROM alliances WHERE event_code = ? ORDER BY seq", (event_code,))
+        alliances = [json.loads(data) for data, in rows]
+        return {"alliances": alliances, "count": len(alliances)}
+
+    def awards(self, event_code):
+        self._indexed(event_code)
+        rows = self._query("SELECT data FROM awards WHERE event_code = ? ORDER BY seq", (event_code,))
+        return {"awards": [json.loads(data) for data, in rows]}
+
+    # cross-event
+
+    def team_events(self, team_number):
+        """Codes of the indexed events a team went to, in date order."""
+        rows = self._query(
+            "SELECT events.code FROM event_teams JOIN events ON events.code = event_teams.event_code "
+            "WHERE event_teams.team_number = ? ORDER BY events.date_start, events.code",
+            (team_number,),
+        )
+        return [code for code, in rows]
+
+    def nth_event(self, team_number, event_code):
+        """1 if event_code was the team's first event of the season, 2 for their second and so on."""
+        return self.team_events(team_number).index(event_code) + 1
+
+    def team_matches(self, team_number, level="qual"):
+        """Every indexed match the team played in across the season as (event code, match), in date order."""
+        rows = self._query(
+            "SELECT matches.event_code, matches.data FROM match_teams "
+            "JOIN matches USING (event_code, level, seq) JOIN events ON events.code = matches.event_code "
+            "WHERE match_teams.team_number = ? AND match_teams.level = ? ORDER BY events.date_start, matches.event_code, matches.seq",
+            (team_number, level),
+        )
+        return [(code, json.loads(data)) for code, data in rows]
+
+    def script_writer(self, event_code, **kwargs):
+        """A ScriptWriter for the event that reads out of the index instead of the api."""
+        kwargs.setdefault("init_data", False)
+        return ScriptWriter(event_code, IndexClient(self), **kwargs)
+
+class IndexClient:
+    """Stands in for FTCEventsClient, answering the requests ScriptWriter makes out of a SeasonIndex."""
+    def __init__(self, index):
+        self.index: SeasonIndex = index
+
+    def fetch(self, path, **params):
+        parts = path.split("/")
+        endpoint = parts[0]
+        if endpoint == "events":
+            return self.index.events(params.get("eventCode"))
+        if endpoint == "teams":
+            return self.index.teams(params["eventCode"])
+        if endpoint == "schedule":
+            # schedule/<code>/<qual or playoff>/hybrid
+            return self.index.schedule(parts[1], parts[2], params.get("start"))
+        if endpoint == "rankings":
+            return self.index.rankings(parts[1])
+        if endpoint == "alliances":
+            return self.index.alliances(parts[1])
+        if endpoint == "awards":
+            return self.index.awards(parts[1])
+        raise KeyError(f"the season index can't answer {path} {params}")
+
+    @classmethod
+    def date_parse(cls, date_str):
+        return FTCEventsClient.date_parse(date_str)
+
+if __name__ == "__main__":
+    import argparse
+    from .data_fetch import ResponseCache
+    parser = argparse.ArgumentParser(description="Build or update the local season index.")
+    parser.add_argument("db", nargs="?", default="season.db", help="sqlite file to write the index to")
+    parser.add_argument("--events", nargs="+", default=None, help="only index these event codes")
+    parser.add_argument("--refresh", action="store_true", help="refetch events even if they were indexed after they finished")
+    args = parser.parse_args()
+
+    with open("token") as f:
+        creds = json.load(f)
+    c = FTCEventsClient(creds['username'], creds['token'], cache=ResponseCache())
+    with SeasonIndex(args.db) as index:
+        updated = index.update(c, event_codes=args.events, refresh=args.refresh)
+    print(f" > indexed {len(updated)} events into {args.db}")
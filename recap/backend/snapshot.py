@@ -0,0 +1,226 @@
+"""Fully built events saved to disk, so a ScriptWriter comes back without fetching or aggregating anything.
+
+A snapshot holds an event's raw api payloads along with everything ScriptWriter builds out of them (teams with their
+scores, the score store, rankings, alliances, the bracket...) as one compressed pickle. Loading one fills in a
+ScriptWriter(init_data=False) directly, so the script renders exactly as it would from a fresh ScriptWriter with the
+same seed. A SeasonArchive keeps a snapshot per event in one zip file and only reads the events asked for.
+
+Snapshots are pickles, so only load ones you made yourself. They're tied to the code that wrote them: a snapshot from
+a different SNAPSHOT_VERSION won't load, rebuild it instead.
+"""
+import gzip
+import io
+import pickle
+import random
+import threading
+import zipfile
+
+import numpy as np
+
+from .data_fetch import FTCEventsClient
+from .fixtures import FixtureBundle
+from .lexicon import TeamEntry
+from .script_writer import ScriptWriter
+
+# bump whenever what ScriptWriter builds changes shape
+SNAPSHOT_VERSION = 1
+# everything ScriptWriter builds that the sections read, in dependency order. The raw schedules (quals, playoffs)
+# only go into building score_store and the bracket, so like compact() they're left to the payloads
+AGGREGATES = ("event", "teams", "rankings", "score_store", "top_score", "team_rankings", "alliances", "bracket", "elims",
+              "awards")
+
+class SnapshotClient:
+    """Stands in for FTCEventsClient in a writer loaded from a snapshot, answering the requests ScriptWriter makes out
+    of the snapshot's raw payloads. Rendering never needs them, so they're only unpickled on the first request.
+
+    Each request is answered from the snapshot once. Asking again (a LiveScriptWriter polling) or asking for
+    anything the snapshot doesn't have goes to client, if there is one.
+    """
+    # request path -> payload name
+    ENDPOINTS = {"events": "events", "teams": "teams", "rankings": "rankings", "alliances": "alliances", "awards": "awards"}
+
+    def __init__(self, payloads, client=None):
+        self._blob = payloads
+        self._payloads = None
+        self._answered = set()
+        self.client = client
+
+    def payloads(self):
+        if self._payloads is None:
+            self._payloads = pickle.loads(self._blob)
+        return self._payloads
+
+    def fetch(self, path, **params):
+        parts = path.split("/")
+        if parts[0] == "schedule":
+            # schedule/<code>/<qual or playoff>/hybrid, paged requests are after matches newer than the snapshot
+            name = None if "start" in params else {"qual": "quals", "playoff": "playoffs"}.get(parts[2])
+        else:
+            name = self.ENDPOINTS.get(parts[0])
+        payload = self.payloads().get(name)
+        if name == "teams" and payload is not None:
+            payload = payload[params["page"] - 1]
+        request = FixtureBundle.key(path, params)
+        if payload is None or request in self._answered:
+            if self.client is None:
+                raise KeyError(f"the snapshot can't answer {path} {params}, pass a client to load() to fetch it")
+            return self.client.fetch(path, **params)
+        self._answered.add(request)
+        return payload
+
+    @classmethod
+    def date_parse(cls, date_str):
+        return FTCEventsClient.date_parse(date_str)
+
+class _Pickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        # the writer's Random and lexicon entries belong to whoever loads the snapshot, not to the snapshot
+        if isinstance(obj, (random.Random, TeamEntry)):
+            return ("detached",)
+        # every team's scores are slices of a couple of arrays in the score store, saved as where they are in
+        # those arrays instead of thousands of little arrays of their own
+        if isinstance(obj, np.ndarray) and obj.ndim == 1 and isinstance(obj.base, np.ndarray):
+            base = obj.base
+            if (base.base is None and base.ndim == 1 and base.dtype == obj.dtype and base.flags.c_contiguous
+                    and obj.strides == base.strides):
+                start = (obj.__array_interface__["data"][0] - base.__array_interface__["data"][0]) // base.itemsize
+                return ("view", base, start, len(obj))
+        return None
+
+class _Unpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        if pid[0] == "view":
+            _, base, start, length = pid
+            return base[start:start + length]
+        return None
+
+def dumps(writer):
+    """Builds everything the writer hasn't built yet and returns its snapshot, uncompressed."""
+    payloads = writer.payloads()
+    for name in AGGREGATES:
+        getattr(writer, name)
+    state = {
+        "version": SNAPSHOT_VERSION,
+        "event_code": writer.event_code,
+        # pickled on their own so loading only has to copy them
+        "payloads": pickle.dumps(payloads, protocol=pickle.HIGHEST_PROTOCOL),
+        "aggregates": {name: writer.__dict__[name] for name in AGGREGATES},
+    }
+    f = io.BytesIO()
+    _Pickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(state)
+    return f.getvalue()
+
+def loads(data, client=None, seed=None, lexicon=None, cls=ScriptWriter):
+    """A writer of type cls back from a snapshot, rendering like a fresh writer with the same seed would. Nothing is
+    fetched or rebuilt, client only gets asked for anything the snapshot doesn't have."""
+    state = _Unpickler(io.BytesIO(data)).load()
+    if state.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"snapshot is version {state.get('version')}, this code reads version {SNAPSHOT_VERSION}")
+    writer = cls(state["event_code"], SnapshotClient(state["payloads"], client), init_data=False, seed=seed, lexicon=lexicon)
+    writer.__dict__.update(state["aggregates"])
+    for team in writer.teams.values():
+        team.rng = writer.rng
+        team.spoken = lexicon.entry(team.number, team.nick) if lexicon is not None else None
+        team.mentioned = 0
+    return writer
+
+def save(writer, path):
+    # level 6 is most of the size win of 9 at a fraction of the time
+    with gzip.open(path, "wb", compresslevel=6) as f:
+        f.write(dumps(writer))
+
+def load(path, **kwargs):
+    """Loads a snapshot written by save(). Takes the same arguments as loads()."""
+    with gzip.open(path, "rb") as f:
+        return loads(f.read(), **kwargs)
+
+class SeasonArchive:
+    """A snapshot per event in one zip file. Opening it only reads the zip's directory, and each event is read and
+    unpickled when it's asked for.
+
+    Open with mode "w" (or "a" to add to an existing archive) to add() writers, and "r" to read.
+    """
+    def __init__(self, path="season.zip", mode="r"):
+        self.path = path
+        self.zip = zipfile.ZipFile(path, mode, compression=zipfile.ZIP_DEFLATED, compresslevel=6)
+        # reads out of one ZipFile from several threads need to take turns
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _member(event_code):
+        return event_code + ".snapshot"
+
+    def events(self):
+        """Codes of every event in the archive."""
+        return sorted(name[:-len(".snapshot")] for name in self.zip.namelist() if name.endswith(".snapshot"))
+
+    def __contains__(self, event_code):
+        try:
+            self.zip.getinfo(self._member(event_code))
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.events())
+
+    def add(self, writer):
+        """Builds everything the writer hasn't and stores its snapshot."""
+        if writer.event_code in self:
+            raise ValueError(f"{writer.event_code} is already in {self.path}")
+        data = dumps(writer)
+        with self._lock:
+            self.zip.writestr(self._member(writer.event_code), data)
+
+    def script_writer(self, event_code, **kwargs):
+        """The event's writer, loaded from its snapshot. Takes the same arguments as loads()."""
+        try:
+            with self._lock:
+                data = self.zip.read(self._member(event_code))
+        except KeyError:
+            raise KeyError(f"{event_code} isn't in {self.path}") from None
+        return loads(data, **kwargs)
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import os
+    import traceback
+    from .batch import season_event_codes
+    parser = argparse.ArgumentParser(description="Snapshot every event in the season into one archive.")
+    parser.add_argument("out_path", help="zip file to write the archive to")
+    parser.add_argument("--events", nargs="+", default=None, help="only these event codes instead of the whole season")
+    parser.add_argument("--index", default=None, help="read events out of this season index instead of the api")
+    args = parser.parse_args()
+
+    if args.index:
+        from .season_index import IndexClient, SeasonIndex
+        client = IndexClient(SeasonIndex(args.index))
+    else:
+        from .data_fetch import RateLimiter, ResponseCache
+        with open("token") as f:
+            creds = json.load(f)
+        client = FTCEventsClient(creds['username'], creds['token'], cache=ResponseCache(), rate_limiter=RateLimiter(5, 5))
+    event_codes = args.events or season_event_codes(client)
+
+    # written next to the old archive and swapped in once it's complete
+    tmp_path = args.out_path + ".tmp"
+    failed = 0
+    with SeasonArchive(tmp_path, "w") as archive:
+        for code in event_codes:
+            try:
+                archive.add(ScriptWriter(code, client))
+            except Exception:
+                failed += 1
+                print(f" [!] skipped {code}:\n{traceback.format_exc()}")
+    os.replace(tmp_path, args.out_path)
+    print(f" > {len(event_codes) - failed} events written to {args.out_path}")
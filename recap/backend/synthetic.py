@@ -0,0 +1,254 @@
+"""Made up events of any size, for benchmarking without recorded fixtures.
+
+generate_event() plays out a whole event (quals schedule and results, rankings, alliance selection, a single
+elimination bracket of best of 3 series, awards) from a seeded Random and returns the ftc-api responses a
+ScriptWriter would fetch for it as a FixtureBundle, so ReplayClient serves it like a recorded event. Team counts,
+matches per team and alliance counts go well past what real events have, to see how things scale.
+"""
+import math
+import random
+
+from .data_fetch import SEASON
+from .fixtures import FixtureBundle
+
+# teams per page of the api's teams list
+PAGE_SIZE = 50
+# the api's tournamentLevel for a playoff round by how many alliance slots are left in the bracket
+LEVELS = {2: "FINAL", 4: "SEMIFINAL", 8: "QUARTERFINAL", 16: "OCTOFINAL"}
+
+NAME_WORDS = ("Robo", "Gear", "Iron", "Circuit", "Byte", "Quantum", "Titan", "Cyber", "Bolt", "Nova", "Phoenix",
+              "Falcon", "Sprocket", "Vortex", "Knights", "Wolves", "Lab", "Squad", "Crew", "Dynamics", "Bots", "Force")
+
+class SyntheticEvent:
+    """The state of one made up event as it's played out. Use generate_event() rather than this directly."""
+    def __init__(self, code, num_teams, matches_per_team, num_alliances, remote, seed):
+        if num_teams < 4:
+            raise ValueError("an event needs at least 4 teams")
+        if matches_per_team < 3:
+            raise ValueError("teams need at least 3 quals matches each for the quals section")
+        if not remote and not 2 <= num_alliances <= num_teams // 2:
+            raise ValueError(f"can't make {num_alliances} alliances out of {num_teams} teams")
+        self.code = code
+        self.remote = remote
+        self.rng = random.Random(f"{code}:{seed}")
+        self.numbers = self.rng.sample(range(1, 25000), num_teams)
+        # how many points a team is good for in a match, before luck
+        self.skill = {n: max(5.0, self.rng.gauss(80, 35)) for n in self.numbers}
+        # team number -> [ranking points, tiebreaker points, wins, losses, ties, matches played]
+        self.records = {n: [0, 0, 0, 0, 0, 0] for n in self.numbers}
+        self.matches_per_team = matches_per_team
+        self.num_alliances = 0 if remote else num_alliances
+
+    def team(self, number):
+        rng = self.rng
+        name = " ".join(rng.sample(NAME_WORDS, rng.randint(1, 3)))
+        if rng.random() < 0.15:
+            name += f" {rng.randint(2, 99)}"
+        elif rng.random() < 0.05:
+            name = name.replace(" ", " & ", 1)
+        return {"teamNumber": number, "nameShort": name, "nameFull": f"{name} Robotics Club",
+                "rookieYear": rng.randint(2005, SEASON)}
+
+    def score(self, numbers):
+        """Points for an alliance of these teams in one match."""
+        return max(0, int(sum(self.skill[n] * self.rng.uniform(0.6, 1.3) for n in numbers)))
+
+    def station(self, number, station, surrogate=False):
+        return {"teamNumber": number, "station": station, "surrogate": surrogate, "noShow": False, "dq": False}
+
+    def quals(self):
+        """Every team plays matches_per_team matches, with surrogate appearances filling the last match up."""
+        per_match = 1 if self.remote else 4
+        num_matches = math.ceil(len(self.numbers) * self.matches_per_team / per_match)
+        # whole shuffled rounds of every team, so no team plays twice before everyone's played once
+        pool = []
+        while len(pool) < num_matches * per_match:
+            pool += self.rng.sample(self.numbers, len(self.numbers))
+        surrogates = len(self.numbers) * self.matches_per_team
+
+        schedule = []
+        for m in range(num_matches):
+            picks = pool[m * per_match:(m + 1) * per_match]
+            if len(set(picks)) < len(picks):
+                # a round boundary drew a team twice, swap in teams not already playing
+                picks = list(dict.fromkeys(picks))
+                picks += self.rng.sample([n for n in self.numbers if n not in picks], per_match - len(picks))
+            if self.remote:
+                teams = [self.station(picks[0], "Red1")]
+                red, blue = self.score(picks), 0
+                self.record(picks, teams, red, None)
+            else:
+                teams = [self.station(n, s, surrogate=m * per_match + i >= surrogates)
+                         for i, (n, s) in enumerate(zip(picks, ("Red1", "Red2", "Blue1", "Blue2")))]
+                red, blue = self.score(picks[:2]), self.score(picks[2:])
+                self.record(picks[:2], teams[:2], red, blue)
+                self.record(picks[2:], teams[2:], blue, red)
+            schedule.append({
+                "description": f"Qualification {m + 1}", "tournamentLevel": "QUALIFICATION", "series": 0,
+                "matchNumber": m + 1, "scoreRedFinal": red, "scoreBlueFinal": blue, "teams": teams,
+                "actualStartTime": self.start_time(m),
+            })
+        return {"schedule": schedule}
+
+    def record(self, numbers, stations, ours, theirs):
+        for number, station in zip(numbers, stations):
+            if station["surrogate"]:
+                continue
+            record = self.records[number]
+            if theirs is None:
+                # remote events rank on points alone
+                record[0] += ours
+                record[5] += 1
+                continue
+            if ours > theirs:
+                record[0] += 2
+                record[2] += 1
+            elif ours < theirs:
+                record[3] += 1
+            else:
+                record[0] += 1
+                record[4] += 1
+            # tiebreaker points are the losing alliance's score
+            record[1] += min(ours, theirs)
+            record[5] += 1
+
+    def start_time(self, m):
+        minutes = 9 * 60 + m * 7
+        return f"2022-01-15T{minutes // 60 % 24:02d}:{minutes % 60:02d}:00"
+
+    def rankings(self):
+        ranked = sorted(self.numbers, key=lambda n: (-self.records[n][0], -self.records[n][1], n))
+        rankings = []
+        for rank, number in enumerate(ranked, 1):
+            rp, tbp, wins, losses, ties, played = self.records[number]
+            rankings.append({"rank": rank, "teamNumber": number, "sortOrder1": rp, "sortOrder2": tbp,
+                             "wins": wins, "losses": losses, "ties": ties, "matchesPlayed": played})
+        return ranked, {"Rankings": rankings}
+
+    def alliances(self, ranked):
+        """Captains are the top ranked teams and pick the best (by skill) teams left, snaking back for second picks."""
+        if not self.num_alliances:
+            return []
+        n = self.num_alliances
+        captains = ranked[:n]
+        left = sorted(ranked[n:], key=lambda x: -self.skill[x])
+        rounds = 2 if len(left) >= 2 * n else 1
+        picks = [[] for _ in range(n)]
+        best = iter(left)
+        for r in range(rounds):
+            for a in (range(n) if r == 0 else reversed(range(n))):
+                picks[a].append(next(best))
+        return [{"number": a + 1, "captain": captains[a], "round1": picks[a][0],
+                 "round2": picks[a][1] if rounds == 2 else None, "round3": None} for a in range(n)]
+
+    def playoffs(self, alliances):
+        """A single elimination bracket seeded 1 v N, top seeds getting byes if the alliances don't fill it."""
+        if not alliances:
+            return []
+        teams = {a["number"]: [a["captain"], a["round1"]] for a in alliances}
+        size = 2
+        while size < len(alliances):
+            size *= 2
+        # seeds in bracket order, e.g. 1 8 4 5 2 7 3 6
+        order = [1]
+        while len(order) < size:
+            order = [x for seed in order for x in (seed, 2 * len(order) + 1 - seed)]
+        slots = [seed if seed <= len(alliances) else None for seed in order]
+
+        schedule = []
+        while len(slots) > 1:
+            level = LEVELS.get(len(slots), "PLAYOFF")
+            # the api numbers the finals series 0 and the series in every other round from 1
+            series = -1 if level == "FINAL" else 0
+            winners = []
+            for red, blue in zip(slots[::2], slots[1::2]):
+                if red is None or blue is None:
+                    winners.append(red or blue)
+                    continue
+                series += 1
+                winners.append(self.series(schedule, level, series, (red, teams[red]), (blue, teams[blue])))
+            slots = winners
+        return schedule
+
+    def series(self, schedule, level, series, red, blue):
+        """Plays a best of 3 into schedule and returns the winning seed."""
+        wins = {red[0]: 0, blue[0]: 0}
+        match = 0
+        while max(wins.values()) < 2:
+            match += 1
+            red_score, blue_score = self.score(red[1]), self.score(blue[1])
+            if red_score == blue_score:
+                red_score += 1
+            wins[red[0] if red_score > blue_score else blue[0]] += 1
+            schedule.append({
+                "description": f"Final {match}" if level == "FINAL" else f"{level.title()} {series}-{match}", "tournamentLevel": level, "series": series,
+                "matchNumber": match, "scoreRedFinal": red_score, "scoreBlueFinal": blue_score,
+                "teams": [self.station(n, f"Red{i + 1}") for i, n in enumerate(red[1])]
+                         + [self.station(n, f"Blue{i + 1}") for i, n in enumerate(blue[1])],
+            })
+        return max(wins, key=wins.get)
+
+    def awards(self, ranked):
+        # inspire is awardId 11, nominees numbered by series
+        inspire = sorted(self.rng.sample(ranked[:max(6, len(ranked) // 4)], 3), key=lambda n: ranked.index(n))
+        awards = [{"awardId": 11, "name": "Inspire Award", "series": i + 1, "teamNumber": n} for i, n in enumerate(inspire)]
+        for award_id, name in ((12, "Think Award"), (13, "Connect Award"), (15, "Motivate Award")):
+            awards.append({"awardId": award_id, "name": name, "series": 1, "teamNumber": self.rng.choice(ranked)})
+        return {"awards": awards}
+
+    def event(self):
+        return {"code": self.code, "name": f"CA-Northern {self.code.title()} {'Remote ' if self.remote else ''}Qualifier",
+                "typeName": "Qualifier", "regionCode": "USCANO", "stateprov": "CA", "city": "San Jose",
+                "dateStart": "2022-01-15T00:00:00", "dateEnd": "2022-01-15T00:00:00", "remote": self.remote,
+                "published": True}
+
+def synthetic_code(teams, remote=False):
+    return f"SYN{teams}{'R' if remote else ''}"
+
+def generate_event(code=None, teams=24, matches_per_team=5, alliances=4, remote=False, seed=0):
+    """Generates a whole event's ftc-api responses as a FixtureBundle, to serve with fixtures.ReplayClient.
+
+    Remote events have one team per quals match and no alliances or playoffs. The same arguments always give the same
+    event. code defaults to one made from the size, e.g. SYN24 or SYN24R for remote.
+    """
+    code = code or synthetic_code(teams, remote)
+    event = SyntheticEvent(code, teams, matches_per_team, alliances, remote, seed)
+    bundle = FixtureBundle()
+    bundle.add("events", {"eventCode": code}, {"events": [event.event()], "eventCount": 1})
+    team_list = [event.team(n) for n in sorted(event.numbers)]
+    pages = max(1, math.ceil(len(team_list) / PAGE_SIZE))
+    for page in range(pages):
+        bundle.add("teams", {"eventCode": code, "page": page + 1}, {
+            "teams": team_list[page * PAGE_SIZE:(page + 1) * PAGE_SIZE], "teamCountTotal": len(team_list),
+            "teamCountPage": len(team_list[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]), "pageCurrent": page + 1,
+            "pageTotal": pages,
+        })
+    bundle.add(f"schedule/{code}/qual/hybrid", {}, event.quals())
+    ranked, rankings = event.rankings()
+    bundle.add(f"rankings/{code}", {}, rankings)
+    alliance_list = event.alliances(ranked)
+    bundle.add(f"alliances/{code}", {}, {"alliances": alliance_list, "count": len(alliance_list)})
+    bundle.add(f"schedule/{code}/playoff/hybrid", {}, {"schedule": event.playoffs(alliance_list)})
+    bundle.add(f"awards/{code}", {}, event.awards(ranked))
+    return bundle
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    parser = argparse.ArgumentParser(description="Write synthetic events as fixture bundles.")
+    parser.add_argument("out_dir", help="directory to write <event code>.json.gz bundles into")
+    parser.add_argument("--teams", type=int, nargs="+", default=[24], help="team counts, one event each")
+    parser.add_argument("--matches_per_team", type=int, default=5, help="quals matches each team plays")
+    parser.add_argument("--alliances", type=int, default=None, help="playoff alliances (default: scales with the team count)")
+    parser.add_argument("--remote", action="store_true", help="remote events, one team per match and no playoffs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for num_teams in args.teams:
+        num_alliances = args.alliances or max(2, min(num_teams // 6, 32))
+        code = synthetic_code(num_teams, args.remote)
+        bundle = generate_event(code, num_teams, args.matches_per_team, num_alliances, args.remote, args.seed)
+        fname = os.path.join(args.out_dir, code + ".json.gz")
+        bundle.save(fname)
+        print(f" > wrote {code} ({num_teams} teams) to {fname}")
@@ -0,0 +1,70 @@
+import re
+from string import Formatter
+
+_SPACES = re.compile(" +")
+
+def normalize(text):
+    """Newlines become spaces and runs of spaces become one, the cleanup the TTS wants on the whole script."""
+    if "\n" in text or "  " in text:
+        return _SPACES.sub(" ", text.replace("\n", " "))
+    return text
+
+def _append(out, text, space):
+    """Appends normalized text to out without doubling up the space where two pieces meet.
+    space is whether out currently ends in a space; returns the same for after the append."""
+    if space and text.startswith(" "):
+        text = text[1:]
+    if not text:
+        return space
+    out.append(text)
+    return text.endswith(" ")
+
+def join(parts):
+    """Concatenates rendered sections the way normalize() would treat them if they were one string."""
+    out = []
+    space = False
+    for part in parts:
+        space = _append(out, normalize(part), space)
+    return "".join(out)
+
+class Template:
+    """A script section compiled once into literal text and slots, with the literal whitespace already normalized.
+
+    Slots use str.format syntax ({name} or {name:.1f}). They get filled in template order, and a callable slot value
+    is only called when its turn comes, so team mentions (which count up and roll dice) happen in the order they're
+    read out, same as they would in an f-string.
+    """
+    def __init__(self, text):
+        # literal strings and (slot name, format spec) tuples
+        self.pieces = []
+        self.slots = set()
+        for literal, name, spec, conversion in Formatter().parse(text):
+            literal = normalize(literal)
+            if literal:
+                if self.pieces and isinstance(self.pieces[-1], str):
+                    self.pieces[-1] = normalize(self.pieces[-1] + literal)
+                else:
+                    self.pieces.append(literal)
+            if name is not None:
+                if conversion is not None or not name.isidentifier():
+                    raise ValueError(f"slots are plain names with an optional format spec, got {{{name}}}")
+                self.pieces.append((name, spec or ""))
+                self.slots.add(name)
+
+    def render(self, **values):
+        missing = self.slots - values.keys()
+        if missing:
+            raise KeyError(f"no value for slots {sorted(missing)}")
+        out = []
+        space = False
+        for piece in self.pieces:
+            if isinstance(piece, str):
+                text = piece
+            else:
+                name, spec = piece
+                value = values[name]
+                if callable(value):
+                    value = value()
+                text = normalize(format(value, spec))
+            space = _append(out, text, space)
+        return "".join(out)
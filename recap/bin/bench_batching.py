@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# compares one-sentence-at-a-time synthesis against batched synthesis (see recap.frontend.batching), in seconds
+# of audio synthesized per wall clock second.
+#
+#   python -m recap.bin.bench_batching --file script.txt --batch_sizes 2 4 8 16
+import argparse
+import time
+
+import numpy as np
+
+from recap.frontend.batching import BatchSynthesizer, batchable
+from recap.frontend.synthesis import load_synthesizer, resolve_models, split_sentences, synthesize_chunk
+
+def run(synthesize, chunks, sample_rate):
+    """Returns (waveforms, seconds of audio per wall second)."""
+    start = time.perf_counter()
+    wavs = synthesize(chunks)
+    elapsed = time.perf_counter() - start
+    return wavs, sum(len(wav) for wav in wavs) / sample_rate / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure synthesis throughput with and without batching.")
+    parser.add_argument("--file", required=True, help="script to synthesize")
+    parser.add_argument("--model_name", default="tts_models/en/ljspeech/tacotron2-DDC", help="released TTS model to use")
+    parser.add_argument("--vocoder_name", default=None, help="released vocoder to use, defaults to the model's")
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[2, 4, 8, 16], help="batch sizes to try")
+    parser.add_argument("--sentences", type=int, default=None, help="only the first this many sentences")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads, defaults to torch's own choice")
+    args = parser.parse_args()
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    model_path, config_path, vocoder_path, vocoder_config_path = resolve_models(args.model_name, args.vocoder_name)
+    synthesizer = load_synthesizer((model_path, config_path, None, None, vocoder_path, vocoder_config_path, None, None, False))
+    if not batchable(synthesizer):
+        parser.error(f"{args.model_name} can't be batched, every batch size would just run one sentence at a time")
+    sample_rate = synthesizer.output_sample_rate
+
+    with open(args.file) as f:
+        chunks = split_sentences(f.read().replace("..", "."))[:args.sentences]
+    print(f" > {len(chunks)} sentences on {torch.get_num_threads()} threads")
+
+    # warm up so lazy initialization doesn't count against the first run
+    synthesize_chunk(synthesizer, chunks[0])
+
+    single, single_rate = run(lambda texts: [synthesize_chunk(synthesizer, text) for text in texts], chunks, sample_rate)
+    print(f" > one at a time: {single_rate:6.2f} s of audio per second")
+    for batch_size in args.batch_sizes:
+        wavs, rate = run(BatchSynthesizer(synthesizer, batch_size=batch_size).synthesize, chunks, sample_rate)
+        # batched and unbatched should come out the same length, give or take the vocoder's padded tail
+        drift = max(abs(len(a) - len(b)) for a, b in zip(single, wavs)) / sample_rate
+        diff = max(float(np.abs(a[:min(len(a), len(b))] - b[:min(len(a), len(b))]).max(initial=0)) for a, b in zip(single, wavs))
+        print(f" > batch size {batch_size:>3}: {rate:6.2f} s of audio per second ({rate / single_rate:.2f}x), "
+              f"max length drift {drift * 1000:.0f} ms, max sample diff {diff:.4f}")
+
+if __name__ == "__main__":
+    main()
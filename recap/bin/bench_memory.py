@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# measures how much memory a ScriptWriter holds on to per event, over recorded fixture bundles (see recap.backend.fixtures).
+#
+#   python -m recap.bin.bench_memory fixtures/
+import argparse
+import gc
+import glob
+import json
+import os
+import tracemalloc
+
+from recap.backend.fixtures import FixtureBundle, ReplayClient
+from recap.backend.script_writer import ScriptWriter
+
+# everything the sections read
+AGGREGATES = ("event", "teams", "quals", "rankings", "score_store", "top_score", "team_rankings", "alliances", "playoffs", "elims", "awards")
+
+class FreshReplayClient(ReplayClient):
+    """Hands out a fresh copy of every response like the real client does, so payloads count against the writer."""
+    def fetch(self, path, **params):
+        return json.loads(json.dumps(super().fetch(path, **params)))
+
+def traced_bytes():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+def measure_event(event_code, bundle):
+    """Returns phase name -> bytes for one event."""
+    results = {}
+    tracemalloc.start()
+    try:
+        start = traced_bytes()
+        writer = ScriptWriter(event_code, FreshReplayClient(bundle), seed=0)
+        results["payloads"] = traced_bytes() - start
+
+        before = traced_bytes()
+        for name in AGGREGATES:
+            getattr(writer, name)
+        results["objects"] = traced_bytes() - before
+
+        writer.full_script()
+        results["retained"] = traced_bytes() - start
+
+        if hasattr(writer, "compact"):
+            writer.compact()
+            results["compacted"] = traced_bytes() - start
+        del writer
+    finally:
+        tracemalloc.stop()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ScriptWriter memory per event over recorded events.")
+    parser.add_argument("fixtures", help="directory of <event code>.json.gz fixture bundles")
+    args = parser.parse_args()
+
+    fnames = sorted(glob.glob(os.path.join(args.fixtures, "*.json.gz")))
+    if not fnames:
+        parser.error(f"no fixture bundles in {args.fixtures}")
+
+    # warm up so one-time costs (imports, caches) don't land on the first event
+    measure_event(os.path.basename(fnames[0])[:-len(".json.gz")], FixtureBundle.load(fnames[0]))
+
+    totals = {}
+    for fname in fnames:
+        event_code = os.path.basename(fname)[:-len(".json.gz")]
+        results = measure_event(event_code, FixtureBundle.load(fname))
+        print(f" > {event_code}: " + ", ".join(f"{name} {size / 1024:.1f} KiB" for name, size in results.items()))
+        for name, size in results.items():
+            totals.setdefault(name, []).append(size)
+
+    print(f" > {len(fnames)} events, average bytes per event")
+    for name, sizes in totals.items():
+        print(f"   {name:<12} {sum(sizes) / len(sizes) / 1024:10.1f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# times ScriptWriter's aggregates and sections and measures its peak memory over synthetic events of growing size
+# (see recap.backend.synthetic), and fits how each one scales with the team count to catch anything super-linear.
+#
+#   python -m recap.bin.bench_scaling --teams 24 48 96 192 384 768 1536
+#   python -m recap.bin.bench_scaling --remote --max_exponent 1.2
+import argparse
+import gc
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+
+from recap.backend.fixtures import ReplayClient
+from recap.backend.script_writer import ScriptWriter
+from recap.backend.synthetic import generate_event, synthetic_code
+
+# in dependency order, so each one's timing doesn't include building the ones before it
+AGGREGATES = ("event", "teams", "quals", "rankings", "score_store", "top_score", "team_rankings", "alliances", "bracket", "elims", "awards")
+SECTIONS = ("event_intro", "quals_matches", "elims_matches", "awards_conclusion")
+
+def time_event(code, bundle, repeat):
+    """Returns phase name -> median seconds for one event."""
+    timings = {}
+    def timed(name, fn):
+        start = time.perf_counter()
+        fn()
+        timings.setdefault(name, []).append(time.perf_counter() - start)
+
+    for i in range(repeat):
+        writer = ScriptWriter(code, ReplayClient(bundle), init_data=False, seed=i)
+        timed("prefetch", writer.prefetch)
+        for name in AGGREGATES:
+            timed(name, lambda: getattr(writer, name))
+        for section in SECTIONS:
+            timed(section, getattr(writer, section))
+        timed("full_script", ScriptWriter(code, ReplayClient(bundle), seed=i).full_script)
+    return {name: statistics.median(times) for name, times in timings.items()}
+
+def peak_memory(code, bundle):
+    """Peak bytes allocated while building and rendering one event, not counting the payloads it's served."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        writer = ScriptWriter(code, ReplayClient(bundle), seed=0)
+        writer.full_script()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def exponent(sizes, values):
+    """The slope of log(value) against log(size), i.e. k in value ~ size^k."""
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(v, 1e-9)) for v in values]
+    mx, my = statistics.mean(xs), statistics.mean(ys)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs)
+
+def main():
+    parser = argparse.ArgumentParser(description="See how ScriptWriter scales with event size over synthetic events.")
+    parser.add_argument("--teams", type=int, nargs="+", default=[24, 48, 96, 192, 384, 768, 1536], help="team counts to try")
+    parser.add_argument("--matches_per_team", type=int, default=5, help="quals matches each team plays")
+    parser.add_argument("--alliances", type=int, default=None, help="playoff alliances (default: one per 6 teams)")
+    parser.add_argument("--remote", action="store_true", help="remote events, one team per match and no playoffs")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per size")
+    parser.add_argument("--max_exponent", type=float, default=1.3, help="flag phases growing faster than teams^this")
+    parser.add_argument("--min_ms", type=float, default=0.5, help="don't flag phases faster than this at the largest size")
+    args = parser.parse_args()
+
+    sizes = sorted(args.teams)
+    if len(sizes) < 2:
+        parser.error("need at least 2 sizes to see how anything scales")
+
+    results = {}
+    memory = {}
+    for num_teams in sizes:
+        code = synthetic_code(num_teams, args.remote)
+        bundle = generate_event(code, num_teams, args.matches_per_team, args.alliances or max(2, num_teams // 6), args.remote)
+        # warm up so one-time costs (imports, template compiles) don't land on the first size
+        ScriptWriter(code, ReplayClient(bundle)).full_script()
+        results[num_teams] = time_event(code, bundle, args.repeat)
+        memory[num_teams] = peak_memory(code, bundle)
+        print(f" > {num_teams} teams: full script {results[num_teams]['full_script'] * 1000:.2f} ms, peak {memory[num_teams] / 1024:.0f} KiB")
+
+    print(f" > median ms per phase, {args.repeat} runs each")
+    print("   {:<18}".format("teams") + "".join(f"{n:>10}" for n in sizes) + "  exponent")
+    flagged = []
+    for name in results[sizes[0]]:
+        times = [results[n][name] for n in sizes]
+        k = exponent(sizes, times)
+        flag = ""
+        if k > args.max_exponent and times[-1] * 1000 >= args.min_ms:
+            flag = "  <-- SUPERLINEAR"
+            flagged.append(name)
+        print(f"   {name:<18}" + "".join(f"{t * 1000:10.3f}" for t in times) + f"  {k:8.2f}{flag}")
+
+    peaks = [memory[n] for n in sizes]
+    k = exponent(sizes, peaks)
+    flag = ""
+    if k > args.max_exponent:
+        flag = "  <-- SUPERLINEAR"
+        flagged.append("peak memory")
+    print(f"   {'peak KiB':<18}" + "".join(f"{m / 1024:10.0f}" for m in peaks) + f"  {k:8.2f}{flag}")
+
+    if flagged:
+        print(f" [!] growing faster than teams^{args.max_exponent}: {', '.join(flagged)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
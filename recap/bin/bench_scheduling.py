@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# sweeps worker count x threads per worker for SynthesisPool on this machine, to find the split that synthesizes the
+# most audio per second (see recap.frontend.scheduling).
+#
+#   python -m recap.bin.bench_scheduling --file script.txt --sentences 40
+import argparse
+import time
+
+from recap.frontend.scheduling import CpuPlan, available_cpus, parse_cpus, physical_cores
+from recap.frontend.synthesis import SynthesisPool, resolve_models, split_sentences
+
+def splits(cores, oversubscribe=False):
+    """Every (jobs, threads) that fills the cores exactly, and with oversubscribe the ones that fill them twice over."""
+    totals = [cores, 2 * cores] if oversubscribe else [cores]
+    return [(jobs, total // jobs) for total in totals for jobs in range(1, total + 1) if total % jobs == 0]
+
+def measure(synth_args, chunks, plan, batch_size):
+    """Seconds of audio per wall second for one plan, not counting model loading."""
+    with SynthesisPool(synth_args, plan=plan, batch_size=batch_size) as pool:
+        # gets every worker started and its models loaded before the clock starts
+        list(pool.map([min(chunks, key=len)] * plan.jobs * 2))
+        sample_rate = pool.sample_rate()
+        start = time.perf_counter()
+        samples = sum(len(wav) for wav in pool.map(chunks))
+        elapsed = time.perf_counter() - start
+    return samples / sample_rate / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the best synthesis jobs x threads split for this machine.")
+    parser.add_argument("--file", required=True, help="script to synthesize")
+    parser.add_argument("--model_name", default="tts_models/en/ljspeech/tacotron2-DDC", help="released TTS model to use")
+    parser.add_argument("--vocoder_name", default=None, help="released vocoder to use, defaults to the model's")
+    parser.add_argument("--sentences", type=int, default=None, help="only the first this many sentences")
+    parser.add_argument("--cpus", default=None, help="only sweep over these cpus, e.g. 0-7")
+    parser.add_argument("--batch_size", type=int, default=1, help="sentences per batch in every worker")
+    parser.add_argument("--oversubscribe", action="store_true", help="also try splits with twice as many threads as cores")
+    args = parser.parse_args()
+
+    cpus = parse_cpus(args.cpus) if args.cpus else available_cpus()
+    cores = len(physical_cores(cpus))
+    model_path, config_path, vocoder_path, vocoder_config_path = resolve_models(args.model_name, args.vocoder_name)
+    synth_args = (model_path, config_path, None, None, vocoder_path, vocoder_config_path, None, None, False)
+    with open(args.file) as f:
+        chunks = split_sentences(f.read().replace("..", "."))[:args.sentences]
+    print(f" > {len(chunks)} sentences on {cores} cores ({len(cpus)} cpus)")
+
+    results = []
+    for jobs, threads in splits(cores, args.oversubscribe):
+        plan = CpuPlan(jobs, threads, cpus)
+        rate = measure(synth_args, chunks, plan, args.batch_size)
+        results.append((rate, jobs, threads))
+        print(f"   {jobs:>3} jobs x {threads:>3} threads: {rate:6.2f} s of audio per second")
+
+    rate, jobs, threads = max(results)
+    print(f" > best: --jobs {jobs} --threads {threads} ({rate:.2f} s of audio per second)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# benchmarks ScriptWriter against recorded fixture bundles (see recap.backend.fixtures), no network needed.
+#
+#   python -m recap.bin.bench_script_writer fixtures/ --save_baseline bench_baseline.json
+#   python -m recap.bin.bench_script_writer fixtures/ --baseline bench_baseline.json
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+from recap.backend.fixtures import FixtureBundle, ReplayClient
+from recap.backend.script_writer import ScriptWriter
+
+SECTIONS = ("event_intro", "quals_matches", "elims_matches", "awards_conclusion")
+# everything the sections read, so the aggregate timing doesn't leak into the section timings
+AGGREGATES = ("event", "teams", "quals", "score_store", "top_score", "team_rankings", "alliances", "playoffs", "elims", "awards")
+
+def bench_event(event_code, bundle, repeat):
+    """Returns phase name -> list of timings in seconds for one event."""
+    timings = {}
+    def timed(name, fn):
+        start = time.perf_counter()
+        result = fn()
+        timings.setdefault(name, []).append(time.perf_counter() - start)
+        return result
+
+    for i in range(repeat):
+        writer = timed("construct", lambda: ScriptWriter(event_code, ReplayClient(bundle), seed=i))
+        timed("aggregate", lambda: [getattr(writer, name) for name in AGGREGATES])
+        for section in SECTIONS:
+            timed(section, getattr(writer, section))
+
+        timed("full_script", lambda: ScriptWriter(event_code, ReplayClient(bundle), seed=i).full_script())
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ScriptWriter over recorded events.")
+    parser.add_argument("fixtures", help="directory of <event code>.json.gz fixture bundles")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per event")
+    parser.add_argument("--baseline", default=None, help="baseline json to compare against")
+    parser.add_argument("--save_baseline", default=None, help="write this run's results as a baseline json")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown over baseline before it counts as a regression")
+    args = parser.parse_args()
+
+    fnames = sorted(glob.glob(os.path.join(args.fixtures, "*.json.gz")))
+    if not fnames:
+        print(f" [!] no fixture bundles in {args.fixtures}")
+        sys.exit(1)
+
+    results = {}
+    for fname in fnames:
+        event_code = os.path.basename(fname)[:-len(".json.gz")]
+        results[event_code] = bench_event(event_code, FixtureBundle.load(fname), args.repeat)
+
+    # median per phase per event, then summed over the corpus
+    phases = {}
+    for timings in results.values():
+        for name, times in timings.items():
+            phases[name] = phases.get(name, 0.0) + statistics.median(times)
+
+    print(f" > {len(results)} events, {args.repeat} runs each")
+    for name, total in phases.items():
+        print(f"   {name:<20} {total * 1000:9.3f} ms")
+    print(f" > throughput: {len(results) / phases['full_script']:.1f} full scripts/s")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(phases, f, indent=2)
+        print(f" > saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = []
+        for name, total in phases.items():
+            if name not in baseline:
+                continue
+            ratio = total / baseline[name]
+            flag = ""
+            if ratio > 1 + args.tolerance:
+                flag = "  <-- REGRESSION"
+                regressions.append(name)
+            print(f"   {name:<20} {ratio:6.2f}x baseline{flag}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# measures how long tts_pipe takes to start up for the commands that shouldn't need TTS or torch at all,
+# and which imports that time goes to.
+#
+#   python -m recap.bin.bench_startup --runs 10
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# commands that should come back without loading any models
+CASES = {
+    "help": ["--help"],
+    "list_models": ["--list_models"],
+    "bad_args": ["--file", "does_not_exist.txt"],
+}
+
+# imports that mean something pulled the synthesis stack in early
+HEAVY = ("torch", "TTS")
+
+def time_run(args, module="recap.bin.tts_pipe"):
+    cmd = [sys.executable, "-m", module, *args] if module else [sys.executable, *args]
+    start = time.perf_counter()
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def _importtime(code):
+    """(module, self microseconds) for everything imported running code, from -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True)
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        yield name.strip(), int(self_us)
+
+def import_times(module):
+    """Returns ({top level package: microseconds}, total microseconds) spent importing module, not counting what the
+    interpreter imports on its own at startup."""
+    startup = {name for name, _ in _importtime("pass")}
+    packages = {}
+    for name, us in _importtime(f"import {module}"):
+        if name in startup:
+            continue
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + us
+    return packages, sum(packages.values())
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure tts_pipe startup time for commands that shouldn't load models.")
+    parser.add_argument("--runs", type=int, default=5, help="runs per command")
+    parser.add_argument("--top", type=int, default=10, help="how many of the slowest imports to show")
+    args = parser.parse_args()
+
+    # interpreter startup on its own, to compare against
+    runs = [time_run(["-c", "pass"], module=None) for _ in range(args.runs)]
+    print(f" > python startup: {statistics.median(runs) * 1000:.0f} ms")
+
+    for name, case in CASES.items():
+        time_run(case)  # warm the filesystem cache
+        runs = [time_run(case) for _ in range(args.runs)]
+        print(f" > {name:<12} median {statistics.median(runs) * 1000:6.0f} ms, min {min(runs) * 1000:6.0f} ms")
+
+    packages, total = import_times("recap.bin.tts_pipe")
+    print(f" > importing recap.bin.tts_pipe: {total / 1000:.0f} ms")
+    for name, us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {name:<24} {us / 1000:8.1f} ms")
+    heavy = [name for name in HEAVY if name in packages]
+    if heavy:
+        print(f" [!] {', '.join(heavy)} imported at startup")
+
+if __name__ == "__main__":
+    main()
@@ -4,15 +4,25 @@
 
 # intended to be used as 
 import argparse
+import importlib.util
+import json
+import os
 import sys
 from argparse import RawTextHelpFormatter
 
 # pylint: disable=redefined-outer-name, unused-argument
 from pathlib import Path
 
-import TTS
-from TTS.utils.manage import ModelManager
-from TTS.utils.synthesizer import Synthesizer
+# TTS (and torch with it) is only imported once we know we're synthesizing, so --help, --list_models and bad
+# arguments come back right away. See recap.bin.bench_startup.
+from recap import trace
+from recap.frontend.audio_cache import AudioCache
+from recap.frontend.scheduling import CpuPlan, claim_cores, configure_worker, parse_cpus
+from recap.frontend.synthesis import (
+    SynthesisPool, load_synthesizer, multi_speaker, output_sample_rate, save_wav, split_sentences, stitch, stitch_stream, synthesize_chunk
+)
+from recap.frontend.wav_stream import OUTPUT_GAIN, WavStreamWriter
+from recap.frontend.tts_daemon import TTSDaemon
 
 
 def str2bool(v):
@@ -25,6 +35,95 @@ def str2bool(v):
     raise argparse.ArgumentTypeError("Boolean value expected.")
 
 
+def read_script(fname):
+    with open(fname) as f:
+        return f.read().replace("..", ".")
+
+
+def models_file():
+    """TTS's .models.json, found without importing TTS."""
+    spec = importlib.util.find_spec("TTS")
+    if spec is None:
+        return None
+    return Path(spec.origin).parent / ".models.json"
+
+
+def list_models(path):
+    """Prints the released models like ModelManager.list_models does, straight from .models.json."""
+    with open(path) as f:
+        models = json.load(f)
+    print(" Name format: type/language/dataset/model")
+    n = 1
+    for model_type, langs in models.items():
+        for lang, datasets in langs.items():
+            for dataset, names in datasets.items():
+                for name in names:
+                    print(f" {n}: {model_type}/{lang}/{dataset}/{name}")
+                    n += 1
+
+
+def model_manager():
+    from TTS.utils.manage import ModelManager
+
+    return ModelManager(models_file())
+
+
+def check_paths(parser, args):
+    """Fails on missing files and half-specified custom models before anything heavy gets loaded."""
+    pairs = (
+        ("--model_path", "--config_path"),
+        ("--vocoder_path", "--vocoder_config_path"),
+        ("--encoder_path", "--encoder_config_path"),
+    )
+    for path_arg, config_arg in pairs:
+        path, config = getattr(args, path_arg[2:]), getattr(args, config_arg[2:])
+        if path is not None and config is None:
+            parser.error(f"{path_arg} needs {config_arg}")
+    for name in ("file", "lexicon", "model_path", "config_path", "vocoder_path", "vocoder_config_path", "encoder_path",
+                 "encoder_config_path", "speakers_file_path", "language_ids_file_path"):
+        path = getattr(args, name)
+        if path is not None and not os.path.exists(path):
+            parser.error(f"--{name} {path} doesn't exist")
+    for path in args.speaker_wav or ():
+        if not os.path.exists(path):
+            parser.error(f"--speaker_wav {path} doesn't exist")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.threads is not None and args.threads < 1:
+        parser.error("--threads must be at least 1")
+    if args.batch_size < 1:
+        parser.error("--batch_size must be at least 1")
+
+
+def missing_speaker(args, multi):
+    """Checks the arguments against a multi-speaker model, True (after saying so) if there's no speaker to use."""
+    if multi and not args.speaker_idx and not args.speaker_wav:
+        print(
+            " [!] Looks like you use a multi-speaker model. Define `--speaker_idx` to "
+            "select the target speaker. You can list the available speakers for this model by `--list_speaker_idxs`."
+        )
+        return True
+    return False
+
+
+def sentence_wavs(chunks, synthesize_many, audio_cache=None, voice_key=()):
+    """Waveforms for each chunk in order, going through the audio cache if there is one."""
+    if audio_cache is not None:
+        return audio_cache.imap(voice_key, chunks, synthesize_many)
+    return synthesize_many(chunks)
+
+
+@trace.traced(cat="tts")
+def write_sentences(wavs, out_path, sample_rate, silence, stream=False, gain=None):
+    print(" > Saving output to {}".format(out_path))
+    if stream:
+        with WavStreamWriter(out_path, sample_rate, OUTPUT_GAIN if gain is None else gain) as writer:
+            for part in stitch_stream(wavs, sample_rate, silence):
+                writer.write(part)
+    else:
+        save_wav(stitch(wavs, sample_rate, silence), out_path, sample_rate, gain)
+
+
 def main():
     description = """Synthesize speech on command line.
 
@@ -191,6 +290,89 @@ If you don't specify any models, then it uses LJSpeech based English model.
         const=True,
         default=False,
     )
+    # args for splitting the script up
+    parser.add_argument(
+        "--split_sentences",
+        type=str2bool,
+        nargs="?",
+        const=True,
+        default=False,
+        help="Synthesize the script one sentence at a time and stitch the results together.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes to synthesize sentences on with --split_sentences. Every worker loads its own copy of the models (around 1 GB each), so this defaults to at most 4, fewer if there isn't memory for them, with the cores split between them.",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="Torch threads per worker. Defaults to splitting the cores evenly between --jobs workers. Each worker is pinned to its own cores.",
+    )
+    parser.add_argument(
+        "--cpus",
+        type=str,
+        default=None,
+        help="Only synthesize on these cpus, e.g. 0-7,16-23. Defaults to every cpu this process may run on.",
+    )
+    parser.add_argument(
+        "--share_cores",
+        type=int,
+        default=None,
+        help="Claim this many physical cores that no other --share_cores run is using and only synthesize on those, for running several instances on one machine.",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=1,
+        help="Run up to this many similar length sentences through the model at once with --split_sentences. Only Tacotron2 with a GAN vocoder batches, other models go one sentence at a time.",
+    )
+    parser.add_argument(
+        "--sentence_silence",
+        type=float,
+        default=0.45,
+        help="Seconds of silence between sentences with --split_sentences.",
+    )
+    parser.add_argument(
+        "--gain",
+        type=float,
+        default=None,
+        help=f"Scale the output audio by this and clip it. By default whole files are peak normalized and --stream output gets {OUTPUT_GAIN}.",
+    )
+    parser.add_argument(
+        "--stream",
+        type=str2bool,
+        nargs="?",
+        const=True,
+        default=False,
+        help="Append each sentence to the output wav as soon as it's synthesized. Use --out_path - to stream to stdout. Implies --split_sentences.",
+    )
+    parser.add_argument(
+        "--audio_cache",
+        type=str,
+        default=None,
+        help="Directory to cache synthesized sentences in, so repeated sentences skip the model. Implies --split_sentences.",
+    )
+    parser.add_argument(
+        "--lexicon",
+        type=str,
+        default=None,
+        help="Team lexicon json (see recap.backend.lexicon) to look team mentions up in instead of running them through the model's text processing.",
+    )
+    parser.add_argument(
+        "--serve",
+        type=str,
+        default=None,
+        help="Load the models once and serve synthesis jobs on this unix socket path (see recap.frontend.tts_daemon).",
+    )
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Write a Chrome trace of model loading, synthesis and saving to this path (same as RECAP_TRACE=path).",
+    )
     # aux args
     parser.add_argument(
         "--save_spectogram",
@@ -201,14 +383,24 @@ If you don't specify any models, then it uses LJSpeech based English model.
 
     args = parser.parse_args()
 
+    if args.trace is not None:
+        trace.enable(args.trace)
+    if args.stream:
+        args.split_sentences = True
+    if args.out_path == "-":
+        if not args.stream:
+            parser.error("--out_path - needs --stream")
+        # keep everything we (and TTS) print out of the audio
+        sys.stdout = sys.stderr
+
     # print the description if either text or list_models is not set
-    if args.file is None and not args.list_models and not args.list_speaker_idxs and not args.list_language_idxs:
+    if args.file is None and args.serve is None and not args.list_models and not args.list_speaker_idxs and not args.list_language_idxs:
         parser.parse_args(["-h"])
 
-    # load model manager
-    path = Path(TTS.__file__).parent / ".models.json"
-    manager = ModelManager(path)
-
+    if not args.list_models:
+        check_paths(parser, args)
+    if models_file() is None:
+        parser.error("TTS isn't installed")
     model_path = None
     config_path = None
     speakers_file_path = None
@@ -220,16 +412,17 @@ If you don't specify any models, then it uses LJSpeech based English model.
 
     # CASE1: list pre-trained TTS models
     if args.list_models:
-        manager.list_models()
+        list_models(models_file())
         sys.exit()
 
     # CASE2: load pre-trained model paths
-    if args.model_name is not None and not args.model_path:
-        model_path, config_path, model_item = manager.download_model(args.model_name)
-        args.vocoder_name = model_item["default_vocoder"] if args.vocoder_name is None else args.vocoder_name
+    with trace.span("download_models", "tts"):
+        if args.model_name is not None and not args.model_path:
+            model_path, config_path, model_item = model_manager().download_model(args.model_name)
+            args.vocoder_name = model_item["default_vocoder"] if args.vocoder_name is None else args.vocoder_name
 
-    if args.vocoder_name is not None and not args.vocoder_path:
-        vocoder_path, vocoder_config_path, _ = manager.download_model(args.vocoder_name)
+        if args.vocoder_name is not None and not args.vocoder_path:
+            vocoder_path, vocoder_config_path, _ = model_manager().download_model(args.vocoder_name)
 
     # CASE3: set custom model paths
     if args.model_path is not None:
@@ -246,8 +439,7 @@ If you don't specify any models, then it uses LJSpeech based English model.
         encoder_path = args.encoder_path
         encoder_config_path = args.encoder_config_path
 
-    # load models
-    synthesizer = Synthesizer(
+    synth_args = (
         model_path,
         config_path,
         speakers_file_path,
@@ -258,6 +450,56 @@ If you don't specify any models, then it uses LJSpeech based English model.
         encoder_config_path,
         args.use_cuda,
     )
+    voice = (args.speaker_idx, args.language_idx, args.speaker_wav)
+
+    # team mentions get looked up instead of going through the model's text processing
+    lexicon = None
+    if args.lexicon:
+        from recap.backend.lexicon import Lexicon
+        lexicon = Lexicon.load(args.lexicon)
+
+    audio_cache = None
+    # cached sentences are only valid for the exact same models, lexicon and voice
+    model_key = (args.model_path or args.model_name, vocoder_path or args.vocoder_name)
+    if lexicon is not None:
+        model_key += ("lexicon", lexicon.version())
+    if args.audio_cache is not None:
+        audio_cache = AudioCache(args.audio_cache)
+        args.split_sentences = True
+
+    # size and pin synthesis to the cores we're allowed (or have claimed)
+    cpus = parse_cpus(args.cpus) if args.cpus else None
+    if args.share_cores:
+        cpus, core_claims = claim_cores(args.share_cores)
+        if not cpus:
+            print(" [!] Every core is claimed by another run")
+            sys.exit(1)
+        print(f" > Claimed cpus {','.join(map(str, cpus))}")
+    plan = CpuPlan(args.jobs, args.threads, cpus)
+
+    # CASE4: synthesize sentences in parallel, each worker loads its own models
+    if args.split_sentences and plan.jobs != 1 and args.serve is None and not args.list_speaker_idxs and not args.list_language_idxs:
+        # once up front, rather than in every worker
+        if missing_speaker(args, multi_speaker(config_path, speakers_file_path)):
+            return
+        text = read_script(args.file)
+        chunks = split_sentences(text)
+        sample_rate = output_sample_rate(config_path, vocoder_config_path)
+        # workers only get spawned once there's something to synthesize
+        with SynthesisPool(synth_args, voice, batch_size=args.batch_size, plan=plan, lexicon=lexicon) as pool:
+            def synthesize_many(texts):
+                print(" > Synthesizing {} sentences on {}".format(len(texts), plan))
+                return pool.map(texts)
+            wavs = sentence_wavs(chunks, synthesize_many, audio_cache, model_key + voice)
+            write_sentences(wavs, args.out_path, sample_rate, args.sentence_silence, args.stream, args.gain)
+        return
+
+    # everything else runs in this process, on all the planned cores at once
+    configure_worker(sorted({cpu for cpus in plan.cpu_sets for cpu in cpus}), plan.jobs * plan.threads)
+
+    # load models
+    with trace.span("load_models", "tts"):
+        synthesizer = load_synthesizer(synth_args, lexicon=lexicon)
 
     # query speaker ids of a multi-speaker model.
     if args.list_speaker_idxs:
@@ -275,28 +517,39 @@ If you don't specify any models, then it uses LJSpeech based English model.
         print(synthesizer.tts_model.language_manager.language_id_mapping)
         return
 
+    # serve jobs until told to stop, jobs pick their own speaker
+    if args.serve is not None:
+        TTSDaemon(synthesizer, args.serve, voice, audio_cache, model_key, args.gain).serve()
+        return
+
     # check the arguments against a multi-speaker model.
-    if synthesizer.tts_speakers_file and (not args.speaker_idx and not args.speaker_wav):
-        print(
-            " [!] Looks like you use a multi-speaker model. Define `--speaker_idx` to "
-            "select the target speaker. You can list the available speakers for this model by `--list_speaker_idxs`."
-        )
+    if missing_speaker(args, synthesizer.tts_speakers_file or multi_speaker(config_path)):
         return
 
     # RUN THE SYNTHESIS
-    with open(args.file) as f:
-        text = f.read().replace("..", ".")
+    text = read_script(args.file)
     print(" > Text: {}".format(text))
     #print(config_path, encoder_config_path)
-    synthesizer.tts_model.decoder.max_decoder_steps = 3000
 
 
     # kick it
-    wav = synthesizer.tts(text, args.speaker_idx, args.language_idx, args.speaker_wav)
+    if args.split_sentences:
+        def synthesize_many(texts):
+            if args.batch_size > 1:
+                from recap.frontend.batching import BatchSynthesizer
+                return BatchSynthesizer(synthesizer, voice, args.batch_size).imap(texts)
+            return (synthesize_chunk(synthesizer, chunk, *voice) for chunk in texts)
+        wavs = sentence_wavs(split_sentences(text), synthesize_many, audio_cache, model_key + voice)
+        write_sentences(wavs, args.out_path, synthesizer.output_sample_rate, args.sentence_silence, args.stream, args.gain)
+        return
+
+    with trace.span("tts", "tts", chars=len(text)):
+        wav = synthesizer.tts(text, args.speaker_idx, args.language_idx, args.speaker_wav)
 
     # save the results
     print(" > Saving output to {}".format(args.out_path))
-    synthesizer.save_wav(wav, args.out_path)
+    with trace.span("save_wav", "tts"):
+        save_wav(wav, args.out_path, synthesizer.output_sample_rate, args.gain)
 
 
 if __name__ == "__main__":
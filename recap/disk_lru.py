@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+
+class DiskLRU:
+    """A directory of cache entries, one file each, that evicts the least recently used ones once they add up to more
+    than max_bytes. Callers pick the file names (ending in suffix) and what goes in them.
+
+    Writes go to a temp file that's renamed into place, so concurrent readers never see half an entry.
+    """
+    def __init__(self, directory, suffix, max_bytes):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # file name -> (last use, size)
+        self._index = {}
+        self._total = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        for ent in os.scandir(self.directory):
+            if ent.name.endswith(suffix):
+                st = ent.stat()
+                self._index[ent.name] = (st.st_mtime, st.st_size)
+                self._total += st.st_size
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def __contains__(self, name):
+        return os.path.exists(self.path(name))
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    def touch(self, name):
+        """Marks an entry as just used, after reading it."""
+        now = time.time()
+        with self._lock:
+            if name in self._index:
+                self._index[name] = (now, self._index[name][1])
+        try:
+            os.utime(self.path(name), (now, now))
+        except OSError:
+            pass
+
+    def write(self, name, blob):
+        """Stores blob (bytes) as the entry, evicting old entries if that takes the cache over max_bytes."""
+        fname = self.path(name)
+        tmp = f"{fname}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, fname)
+
+        with self._lock:
+            old = self._index.get(name)
+            if old is not None:
+                self._total -= old[1]
+            self._index[name] = (time.time(), len(blob))
+            self._total += len(blob)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def clear(self):
+        with self._lock:
+            for name in self._index:
+                try:
+                    os.remove(self.path(name))
+                except OSError:
+                    pass
+            self._index.clear()
+            self._total = 0
+
+    def _evict(self):
+        # caller holds the lock
+        for name, (_, size) in sorted(self._index.items(), key=lambda x: x[1][0]):
+            if self._total <= self.max_bytes:
+                break
+            try:
+                os.remove(self.path(name))
+            except OSError:
+                pass
+            del self._index[name]
+            self._total -= size
@@ -0,0 +1,75 @@
+import hashlib
+import io
+import json
+
+import numpy as np
+
+from ..disk_lru import DiskLRU
+
+def normalize_sentence(text):
+    return " ".join(text.split())
+
+class AudioCache:
+    """On-disk cache of synthesized sentence audio, keyed by voice (model, vocoder, lexicon version, speaker...) +
+    normalized text.
+
+    Each entry is one .npy file of float32 samples. The least recently used entries get evicted once the cache
+    grows past max_bytes.
+    """
+    def __init__(self, cache_dir=".tts_cache", max_bytes=1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._store = DiskLRU(cache_dir, ".npy", max_bytes)
+
+    @staticmethod
+    def key(voice, text):
+        blob = json.dumps([list(voice), normalize_sentence(text)])
+        return hashlib.sha1(blob.encode()).hexdigest() + ".npy"
+
+    def get(self, voice, text):
+        name = self.key(voice, text)
+        try:
+            wav = np.load(self._store.path(name))
+        except (OSError, ValueError):
+            return None
+        self._store.touch(name)
+        return wav
+
+    def put(self, voice, text, wav):
+        f = io.BytesIO()
+        np.save(f, np.asarray(wav, dtype=np.float32))
+        self._store.write(self.key(voice, text), f.getvalue())
+
+    def contains(self, voice, text):
+        return self.key(voice, text) in self._store
+
+    def imap(self, voice, chunks, synthesize_many):
+        """Yields waveforms for chunks in order, only synthesizing the ones that aren't cached.
+
+        synthesize_many takes a list of sentences and returns an iterable of their waveforms in the same order.
+        Repeated sentences are only synthesized once, and cached audio is only loaded when its turn comes up."""
+        misses = []
+        seen = set()
+        for chunk in chunks:
+            norm = normalize_sentence(chunk)
+            if norm not in seen and not self.contains(voice, chunk):
+                misses.append(chunk)
+            seen.add(norm)
+
+        synthesized = iter(synthesize_many(misses) if misses else ())
+        pending = {normalize_sentence(chunk) for chunk in misses}
+        for chunk in chunks:
+            norm = normalize_sentence(chunk)
+            if norm in pending:
+                wav = next(synthesized)
+                self.put(voice, chunk, wav)
+                pending.discard(norm)
+            else:
+                wav = self.get(voice, chunk)
+                if wav is None:
+                    # got evicted since we checked
+                    wav = next(iter(synthesize_many([chunk])))
+            yield wav
+
+    def map(self, voice, chunks, synthesize_many):
+        return list(self.imap(voice, chunks, synthesize_many))
@@ -0,0 +1,285 @@
+"""Batched Tacotron2 + vocoder inference.
+
+Synthesizer.tts runs one sentence at a time, which leaves most of a cpu's matrix throughput unused on a model as
+small as tacotron2-DDC. BatchSynthesizer groups sentences of similar length, pads them, and runs the encoder, the
+decoder loop and the vocoder over the whole batch at once, then cuts each sentence back out of the padded outputs.
+
+Everything that depends on neighbouring frames is kept from seeing the padding: encoder convolutions are masked
+between layers, the lstm gets packed sequences, attention is masked, each sentence stops decoding on its own stop
+token, and the postnet runs on each sentence's own frames. Only the vocoder sees padding (the sentence's last frame
+repeated), which can nudge the last few milliseconds of a sentence.
+
+Models it can't batch (multi-speaker, GST, windowed attention, Griffin-Lim, autoregressive vocoders) fall back to
+one Synthesizer.tts call per sentence, same as synthesize_chunk.
+
+The decoding loop is Decoder.inference from TTS_VERSION rewritten for batches, so it leans on that release's private
+decoder methods. Any synthesizer missing them falls back too, and the first BatchSynthesizer on each synthesizer
+checks that a probe batch comes out like synthesize_chunk before batching anything, so a TTS release that changed how
+they behave gets one sentence at a time instead of wrong audio.
+"""
+import importlib.metadata
+import weakref
+
+import numpy as np
+
+from .. import trace
+from .synthesis import synthesize_chunk
+
+# vocoders whose inference() is a plain feed forward pass over a (batch, channels, frames) mel
+BATCHABLE_VOCODERS = (
+    "HifiganGenerator", "MelganGenerator", "MultibandMelganGenerator", "FullbandMelganGenerator",
+    "ParallelWaveganGenerator", "UnivnetGenerator",
+)
+
+# Synthesizer.tts puts this many zero samples after every sentence it splits the text into
+SENTENCE_GAP = 10000
+
+# the TTS release _mels() follows the Tacotron2 decoder of, pinned in the README's install line
+TTS_VERSION = "0.8.0"
+# attributes of the Tacotron2 model that batching reaches into, most of them private to TTS
+MODEL_INTERNALS = (
+    "embedding", "encoder.convolutions", "encoder.lstm", "postnet", "decoder.prenet", "decoder.decode",
+    "decoder.get_go_frame", "decoder._init_states", "decoder._update_memory", "decoder.attention.init_states",
+    "decoder.stop_threshold", "decoder.max_decoder_steps", "decoder.frame_channels", "decoder.r",
+)
+
+# sentences the equivalence check synthesizes both ways, close enough in length to land in one batch
+PROBE_TEXTS = ("Welcome to the event recap.", "The finals went to three matches.")
+# batched and unbatched audio can differ this much per sample, apart from the vocoder's padded tail
+EQUIVALENCE_TOLERANCE = 0.02
+TAIL_SAMPLES = 2048
+# synthesizer -> whether its batched output passed the equivalence check
+_checked = weakref.WeakKeyDictionary()
+
+def length_batches(lengths, max_batch=8, max_padding=0.3):
+    """Groups indices into batches of similar length, shortest first.
+
+    A batch holds at most max_batch items, and its shortest item is at most max_padding shorter than its longest,
+    so little of any batch is spent on padding.
+    """
+    batches = []
+    current = []
+    for i in sorted(range(len(lengths)), key=lambda i: lengths[i]):
+        if current and (len(current) == max_batch or lengths[current[0]] < lengths[i] * (1 - max_padding)):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+def installed_tts_version():
+    try:
+        return importlib.metadata.version("TTS")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def missing_internals(synthesizer):
+    """The attributes batching needs that this synthesizer's model (or the synthesizer) doesn't have."""
+    missing = []
+    for path in MODEL_INTERNALS:
+        obj = synthesizer.tts_model
+        for name in path.split("."):
+            obj = getattr(obj, name, None)
+            if obj is None:
+                missing.append(path)
+                break
+    missing += [name for name in ("vocoder_ap", "split_into_sentences") if getattr(synthesizer, name, None) is None]
+    return missing
+
+def equivalent(a, b):
+    """Whether two waveforms of the same sentence match up to EQUIVALENCE_TOLERANCE, ignoring the tail."""
+    if abs(len(a) - len(b)) > TAIL_SAMPLES:
+        return False
+    n = max(0, min(len(a), len(b)) - TAIL_SAMPLES)
+    return n == 0 or float(np.abs(a[:n] - b[:n]).max()) <= EQUIVALENCE_TOLERANCE
+
+def batchable(synthesizer, voice=(None, None, None)):
+    """Whether BatchSynthesizer can run this synthesizer and voice batched."""
+    model = synthesizer.tts_model
+    if any(voice):
+        return False
+    if type(model).__name__ != "Tacotron2" or missing_internals(synthesizer):
+        return False
+    if getattr(model, "num_speakers", 1) > 1 or getattr(model, "use_gst", False):
+        return False
+    if getattr(model, "gst_layer", None) is not None or getattr(model, "capacitron_vae_layer", None) is not None:
+        return False
+    if getattr(model.decoder.attention, "windowing", False):
+        return False
+    vocoder = getattr(synthesizer, "vocoder_model", None)
+    if vocoder is None or type(vocoder).__name__ not in BATCHABLE_VOCODERS:
+        return False
+    # a vocoder trained at another sample rate needs the mels interpolated, which Synthesizer only does one at a time
+    return synthesizer.vocoder_config["audio"]["sample_rate"] == model.ap.sample_rate
+
+class BatchSynthesizer:
+    """Wraps a loaded Synthesizer to synthesize many sentences at once.
+
+    synthesize(texts) returns one float32 waveform per text, the same as calling synthesize_chunk on each.
+    batch_size is the most sentences run together, more helps throughput until the cpu's cores are saturated.
+    check runs the equivalence check (see check()) if it hasn't been run on this synthesizer yet.
+    """
+    def __init__(self, synthesizer, voice=(None, None, None), batch_size=8, max_padding=0.3, check=True):
+        self.synthesizer = synthesizer
+        self.voice = voice
+        self.batch_size = batch_size
+        self.max_padding = max_padding
+        self.enabled = batch_size > 1 and batchable(synthesizer, voice)
+        if self.enabled and check:
+            self.enabled = self.check()
+
+    def check(self):
+        """Synthesizes PROBE_TEXTS batched and one at a time, and whether they came out the same. Only runs once per
+        synthesizer, later calls return the first one's answer."""
+        if self.synthesizer not in _checked:
+            single = [synthesize_chunk(self.synthesizer, text, *self.voice) for text in PROBE_TEXTS]
+            try:
+                batched = self._synthesize_batched(list(PROBE_TEXTS))
+            except Exception:
+                # internals that are there but take different arguments
+                batched = [None] * len(single)
+            _checked[self.synthesizer] = all(b is not None and equivalent(a, b) for a, b in zip(single, batched))
+            if not _checked[self.synthesizer]:
+                print(f" [!] batched synthesis doesn't match one sentence at a time with TTS {installed_tts_version()} "
+                      f"(written against {TTS_VERSION}), synthesizing one sentence at a time")
+        return _checked[self.synthesizer]
+
+    def synthesize(self, texts):
+        texts = list(texts)
+        if not self.enabled:
+            return [synthesize_chunk(self.synthesizer, text, *self.voice) for text in texts]
+        return self._synthesize_batched(texts)
+
+    def _synthesize_batched(self, texts):
+        # Synthesizer.tts splits its input into sentences again, batch those and stitch them back together after
+        parts = []
+        owners = []
+        for i, text in enumerate(texts):
+            for sentence in self.synthesizer.split_into_sentences(text):
+                parts.append(sentence)
+                owners.append(i)
+        ids = [self._text_ids(part) for part in parts]
+
+        part_wavs = [None] * len(parts)
+        for batch in length_batches([len(x) for x in ids], self.batch_size, self.max_padding):
+            for i, wav in zip(batch, self._synthesize_batch([ids[i] for i in batch])):
+                part_wavs[i] = wav
+
+        gap = np.zeros(SENTENCE_GAP, dtype=np.float32)
+        pieces = [[] for _ in texts]
+        for owner, wav in zip(owners, part_wavs):
+            pieces[owner] += [wav, gap]
+        return [np.trim_zeros(np.concatenate(p) if p else np.zeros(0, dtype=np.float32), 'b') for p in pieces]
+
+    def imap(self, texts, window=None):
+        """Like synthesize, but yields waveforms in order as each window of texts finishes, for streaming."""
+        window = window or 4 * self.batch_size
+        texts = list(texts)
+        for start in range(0, len(texts), window):
+            yield from self.synthesize(texts[start:start + window])
+
+    def _text_ids(self, text):
+        model = self.synthesizer.tts_model
+        tokenizer = getattr(model, "tokenizer", None)
+        if tokenizer is not None:
+            return tokenizer.text_to_ids(text)
+        # older TTS releases tokenize with a module function instead
+        from TTS.tts.utils.synthesis import text_to_seq
+
+        config = self.synthesizer.tts_config
+        custom_symbols = model.make_symbols(config) if hasattr(model, "make_symbols") else None
+        return text_to_seq(text, config, custom_symbols=custom_symbols)
+
+    def _synthesize_batch(self, ids):
+        import torch
+
+        with trace.span("synthesize_batch", "tts", size=len(ids), tokens=sum(len(x) for x in ids)) as span:
+            device = "cuda" if getattr(self.synthesizer, "use_cuda", False) else "cpu"
+            with torch.no_grad():
+                mels = self._mels(ids, device)
+                wavs = self._vocode(mels, device)
+            span["samples"] = sum(len(wav) for wav in wavs)
+        return wavs
+
+    def _mels(self, ids, device):
+        """Runs Tacotron2 on a batch, returning each sentence's (frames, channels) mel like Tacotron2.inference."""
+        import torch
+        from torch.nn.utils.rnn import pack_padded_sequence, pad_packed_sequence
+
+        model = self.synthesizer.tts_model
+        decoder = model.decoder
+        lengths = torch.tensor([len(x) for x in ids], dtype=torch.long)
+        tokens = torch.zeros(len(ids), int(lengths.max()), dtype=torch.long)
+        for i, x in enumerate(ids):
+            tokens[i, :len(x)] = torch.as_tensor(np.asarray(x), dtype=torch.long)
+        tokens = tokens.to(device)
+        mask = (torch.arange(tokens.shape[1])[None, :] < lengths[:, None]).to(device)
+
+        # encoder, with padding zeroed between convolutions so it looks the same as the convs' own zero padding
+        frame_mask = mask.unsqueeze(1).float()
+        o = model.embedding(tokens).transpose(1, 2) * frame_mask
+        for layer in model.encoder.convolutions:
+            o = layer(o) * frame_mask
+        o = pack_padded_sequence(o.transpose(1, 2), lengths, batch_first=True, enforce_sorted=False)
+        model.encoder.lstm.flatten_parameters()
+        o, _ = model.encoder.lstm(o)
+        encoder_outputs, _ = pad_packed_sequence(o, batch_first=True, total_length=tokens.shape[1])
+
+        # decoder, Decoder.inference but every sentence stops on its own stop token
+        memory = decoder._update_memory(decoder.get_go_frame(encoder_outputs))
+        decoder._init_states(encoder_outputs, mask=mask)
+        decoder.attention.init_states(encoder_outputs)
+        steps = torch.full((len(ids),), decoder.max_decoder_steps, dtype=torch.long)
+        done = torch.zeros(len(ids), dtype=torch.bool)
+        outputs = []
+        t = 0
+        while True:
+            memory = decoder.prenet(memory)
+            decoder_output, _, stop_token = decoder.decode(memory)
+            outputs.append(decoder_output.squeeze(1))
+            # Decoder.inference won't stop on the first step
+            if t > 0:
+                stopped = (torch.sigmoid(stop_token.data).view(-1).cpu() > decoder.stop_threshold) & ~done
+                steps[stopped] = len(outputs)
+                done |= stopped
+            if bool(done.all()) or len(outputs) == decoder.max_decoder_steps:
+                break
+            memory = decoder._update_memory(decoder_output)
+            t += 1
+
+        frames = torch.stack(outputs, 1).view(len(ids), -1, decoder.frame_channels)
+        mels = []
+        for i in range(len(ids)):
+            mel = frames[i:i + 1, :int(steps[i]) * decoder.r].transpose(1, 2)
+            mel = mel + model.postnet(mel)
+            mels.append(mel[0].transpose(0, 1).cpu().numpy())
+        return mels
+
+    def _vocode(self, mels, device):
+        """Runs the vocoder over a batch of mels, returning each sentence's waveform like Synthesizer.tts."""
+        import torch
+
+        synthesizer = self.synthesizer
+        ap = synthesizer.tts_model.ap
+        # renormalize each mel from the tts model's audio config to the vocoder's
+        inputs = [synthesizer.vocoder_ap.normalize(ap.denormalize(mel.T)) for mel in mels]
+        lengths = [x.shape[1] for x in inputs]
+        longest = max(lengths)
+        # pad with each mel's last frame, the same thing the vocoders' own replicate padding does
+        batch = np.stack([np.pad(x, ((0, 0), (0, longest - x.shape[1])), mode="edge") for x in inputs])
+        out = synthesizer.vocoder_model.inference(torch.as_tensor(batch, dtype=torch.float32).to(device))
+        out = out.cpu().numpy().reshape(len(mels), -1)
+        samples_per_frame = out.shape[1] // longest
+
+        trim = None
+        audio_config = synthesizer.tts_config.audio
+        if "do_trim_silence" in audio_config and audio_config["do_trim_silence"]:
+            from TTS.tts.utils.synthesis import trim_silence as trim
+        wavs = []
+        for i, length in enumerate(lengths):
+            wav = out[i, :length * samples_per_frame]
+            if trim is not None:
+                wav = trim(wav, ap)
+            wavs.append(np.asarray(wav, dtype=np.float32))
+        return wavs
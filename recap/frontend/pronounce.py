@@ -0,0 +1,127 @@
+"""Team mentions as a dictionary lookup in the TTS front end.
+
+A script written with a lexicon (see backend.lexicon) mentions teams in words the lexicon already worked out. The
+model's tokenizer would still run every one of those mentions through its text cleaner and phonemizer again in every
+sentence, so Pronouncer takes over the tokenizer's text_to_ids: it finds the team mentions in a sentence by looking
+words up in the lexicon, uses the cleaned/phonemized text it has for them (worked out once and kept in the lexicon
+file), and only runs the rest of the sentence through the model's own text processing.
+"""
+from ..backend.lexicon import PUNCTUATION, WORD
+
+class Pronouncer:
+    """Lexicon-aware text_to_ids for a TTS tokenizer (TTS.tts.utils.text.tokenizer.TTSTokenizer)."""
+    def __init__(self, lexicon, tokenizer):
+        self.lexicon = lexicon
+        self.tokenizer = tokenizer
+        # processed text is only good for the text processing that produced it
+        self.processed = lexicon.pronunciations.setdefault(self.key(tokenizer), {})
+        # first word -> phrase lengths in words starting with it, longest first
+        self._first_words = {}
+        for words in lexicon.phrases():
+            self._first_words.setdefault(words[0], set()).add(len(words))
+        self._first_words = {word: sorted(lengths, reverse=True) for word, lengths in self._first_words.items()}
+
+    @staticmethod
+    def key(tokenizer):
+        cleaner = getattr(tokenizer.text_cleaner, "__name__", str(tokenizer.text_cleaner))
+        if not tokenizer.use_phonemes:
+            return cleaner
+        phonemizer = tokenizer.phonemizer
+        return f"{cleaner}|{phonemizer.name()}|{phonemizer.language}"
+
+    def split(self, text):
+        """Splits text into (segment, is_mention) pieces in order, with the longest lexicon phrase matched at each word."""
+        phrases = self.lexicon.phrases()
+        words = [(m.start(), m.end(), m.group().strip(PUNCTUATION).lower()) for m in WORD.finditer(text)]
+        pieces = []
+        last = 0
+        i = 0
+        while i < len(words):
+            for length in self._first_words.get(words[i][2], ()):
+                key = tuple(word for _, _, word in words[i:i + length])
+                if len(key) == length and key in phrases:
+                    start = words[i][0]
+                    # trailing punctuation on the last word isn't part of the mention
+                    end = words[i + length - 1][1]
+                    end -= len(text[start:end]) - len(text[start:end].rstrip(PUNCTUATION))
+                    if start > last:
+                        pieces.append((text[last:start], False))
+                    pieces.append((text[start:end], True))
+                    last = end
+                    i += length
+                    break
+            else:
+                i += 1
+        if last < len(text):
+            pieces.append((text[last:], False))
+        return pieces
+
+    def process(self, text, language=None):
+        """Runs text through the tokenizer's cleaner and phonemizer, like the start of TTSTokenizer.text_to_ids."""
+        tokenizer = self.tokenizer
+        if tokenizer.text_cleaner is not None:
+            text = tokenizer.text_cleaner(text)
+        if tokenizer.use_phonemes:
+            text = tokenizer.phonemizer.phonemize(text, separator="", language=language)
+        return text
+
+    def pronounce(self, mention, language=None):
+        """The processed text for a team mention, worked out the first time it's needed."""
+        processed = self.processed.get(mention)
+        if processed is None:
+            processed = self.processed[mention] = self.process(mention, language)
+        return processed
+
+    def precompute(self):
+        """Works out the processed text for every phrase in the lexicon, to save along with it."""
+        for phrase in self.lexicon.phrases().values():
+            self.pronounce(phrase)
+
+    def text_to_ids(self, text, language=None):
+        pieces = []
+        for segment, mention in self.split(text):
+            if mention:
+                pieces.append(self.pronounce(segment, language))
+            elif segment.strip():
+                # keep whether the segment was spaced off from the mentions around it, "Team X." has no space before the "."
+                lead = " " if segment[0].isspace() else ""
+                trail = " " if segment[-1].isspace() else ""
+                pieces.append(lead + self.process(segment.strip(), language) + trail)
+            else:
+                pieces.append(" ")
+        tokenizer = self.tokenizer
+        ids = tokenizer.encode("".join(pieces).strip())
+        if tokenizer.add_blank:
+            ids = tokenizer.intersperse_blank_char(ids, True)
+        if tokenizer.use_eos_bos:
+            ids = tokenizer.pad_with_bos_eos(ids)
+        return ids
+
+def install(synthesizer, lexicon):
+    """Makes the synthesizer's tokenizer look team mentions up in lexicon. Returns the Pronouncer, or None for TTS
+    releases from before models had a tokenizer, which keep processing mentions the slow way."""
+    tokenizer = getattr(synthesizer.tts_model, "tokenizer", None)
+    if tokenizer is None:
+        return None
+    pronouncer = Pronouncer(lexicon, tokenizer)
+    tokenizer.text_to_ids = pronouncer.text_to_ids
+    return pronouncer
+
+if __name__ == "__main__":
+    import argparse
+    from ..backend.lexicon import Lexicon
+    from .synthesis import load_synthesizer, resolve_models
+    parser = argparse.ArgumentParser(description="Precompute a model's processed text for every team in a lexicon.")
+    parser.add_argument("lexicon", help="lexicon json, updated in place")
+    parser.add_argument("--model_name", default="tts_models/en/ljspeech/tacotron2-DDC", help="released TTS model to use")
+    args = parser.parse_args()
+
+    lexicon = Lexicon.load(args.lexicon)
+    model_path, config_path, vocoder_path, vocoder_config_path = resolve_models(args.model_name)
+    synthesizer = load_synthesizer((model_path, config_path, None, None, vocoder_path, vocoder_config_path, None, None, False))
+    pronouncer = install(synthesizer, lexicon)
+    if pronouncer is None:
+        parser.error("this TTS release doesn't have tokenizers to precompute for")
+    pronouncer.precompute()
+    lexicon.save(args.lexicon)
+    print(f" > {len(pronouncer.processed)} phrases precomputed into {args.lexicon}")
@@ -0,0 +1,155 @@
+"""Sizing and pinning synthesis workers to the machine.
+
+torch sizes its thread pools to every core it can see, so a handful of synthesis workers (or a few tts_pipe runs side
+by side) each think they own the whole box, and throughput collapses as they fight over cores. CpuPlan splits the
+cores this process is allowed on into one set per worker, each worker is pinned to its set and runs exactly that
+many torch threads. Hyperthread siblings stay together so two workers never share a physical core.
+
+Separate runs on one machine can split it between them with claim_cores(), which hands out cores no other run
+holds at the moment.
+"""
+import errno
+import os
+import tempfile
+
+# every worker loads its own copy of the tts model and vocoder, so the default job count stays small
+DEFAULT_MAX_JOBS = 4
+# rough resident memory of one worker with Tacotron2 and a GAN vocoder loaded, torch included
+WORKER_MEMORY = 1 << 30
+
+def parse_cpus(spec):
+    """Parses a cpu list like "0-3,8,10-11" (taskset/cpuset style) into a sorted list of cpu numbers."""
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-")
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+def available_cpus():
+    """The cpus this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def physical_cores(cpus):
+    """Groups logical cpus into physical cores (hyperthread siblings together), in cpu order.
+
+    Reads the topology from sysfs where there is one, otherwise every cpu counts as its own core.
+    """
+    cores = {}
+    for cpu in cpus:
+        topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(os.path.join(topology, "physical_package_id")) as f:
+                package = f.read().strip()
+            with open(os.path.join(topology, "core_id")) as f:
+                core = f.read().strip()
+            key = (package, core)
+        except OSError:
+            key = ("cpu", cpu)
+        cores.setdefault(key, []).append(cpu)
+    return sorted(cores.values())
+
+def available_memory():
+    """Bytes of memory available for new processes, or None if there's no telling."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+def default_jobs(cores, threads=None):
+    """How many workers to run when nobody said: enough to fill the cores at threads each, but no more than
+    DEFAULT_MAX_JOBS or than there's memory for models (WORKER_MEMORY each)."""
+    jobs = max(1, len(cores) // (threads or 1))
+    jobs = min(jobs, DEFAULT_MAX_JOBS)
+    memory = available_memory()
+    if memory is not None:
+        jobs = min(jobs, max(1, int(memory // WORKER_MEMORY)))
+    return jobs
+
+class CpuPlan:
+    """How many synthesis workers to run, how many torch threads each gets, and which cpus each is pinned to.
+
+    By default that's up to DEFAULT_MAX_JOBS workers (fewer if memory runs short) splitting the cores evenly. Set jobs
+    or threads and the other fills the remaining cores. More of both than there are cores shares them round robin, with
+    a warning.
+    """
+    def __init__(self, jobs=None, threads=None, cpus=None):
+        cores = physical_cores(cpus if cpus is not None else available_cpus())
+        if jobs is None:
+            jobs = default_jobs(cores, threads)
+        if threads is None:
+            threads = max(1, len(cores) // jobs)
+        self.jobs = jobs
+        self.threads = threads
+        self.oversubscribed = jobs * threads > len(cores)
+        if self.oversubscribed:
+            print(f" [!] {jobs} jobs x {threads} threads is more than the {len(cores)} cores available, "
+                  "workers will share cores")
+        # each worker gets `threads` whole cores, wrapping around when oversubscribed
+        self.cpu_sets = []
+        for worker in range(jobs):
+            picked = [cores[(worker * threads + i) % len(cores)] for i in range(threads)]
+            self.cpu_sets.append(sorted({cpu for core in picked for cpu in core}))
+
+    def __str__(self):
+        return "{} workers x {} threads on cpus {}".format(
+            self.jobs, self.threads, " | ".join(",".join(map(str, cpus)) for cpus in self.cpu_sets)
+        )
+
+def configure_worker(cpus, threads):
+    """Pins the current process to cpus and sizes torch's thread pools to threads. Call before torch does any work."""
+    # the openmp/mkl pools read these when torch first starts them
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        # a single sentence doesn't have independent ops to run side by side, and every inter-op thread is one more
+        # thread competing for the worker's cores
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # already set, or torch already did parallel work in this process
+        pass
+
+def claim_cores(count, lock_dir=None):
+    """Claims up to count physical cores that no other process holding claims is using, for sharing one machine
+    between several runs. Returns (cpus, handles). The claims last as long as the handles stay open, and go away
+    with the process if it dies.
+    """
+    import fcntl
+
+    lock_dir = lock_dir or os.path.join(tempfile.gettempdir(), "recap_cores")
+    os.makedirs(lock_dir, exist_ok=True)
+    cpus = []
+    handles = []
+    for core in physical_cores(available_cpus()):
+        if len(handles) == count:
+            break
+        f = open(os.path.join(lock_dir, f"cpu{core[0]}.lock"), "w")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as e:
+            f.close()
+            if e.errno in (errno.EAGAIN, errno.EACCES):
+                continue
+            raise
+        cpus += core
+        handles.append(f)
+    return cpus, handles
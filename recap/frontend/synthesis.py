@@ -0,0 +1,208 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .. import trace
+from .wav_stream import WavStreamWriter
+
+# sentence ends, and the clause breaks we fall back to for sentences that are still too long
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+CLAUSE_END = re.compile(r'(?<=[,;:])\s+')
+
+def split_sentences(text, max_chars=250):
+    """Splits a script into sentences, breaking overly long sentences up at clause boundaries."""
+    chunks = []
+    for sentence in SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            chunks.append(sentence)
+            continue
+
+        # pack clauses back together up to max_chars
+        current = ""
+        for clause in CLAUSE_END.split(sentence):
+            if current and len(current) + 1 + len(clause) > max_chars:
+                chunks.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}" if current else clause
+        if current:
+            chunks.append(current)
+    return chunks
+
+def stitch_stream(wavs, sample_rate, silence=0.45):
+    """Yields per-sentence waveforms in order with `silence` seconds of silence between them."""
+    gap = np.zeros(int(sample_rate * silence), dtype=np.float32)
+    for i, wav in enumerate(wavs):
+        if i:
+            yield gap
+        yield wav
+
+def stitch(wavs, sample_rate, silence=0.45):
+    """Joins per-sentence waveforms in order with `silence` seconds of silence between them."""
+    parts = list(stitch_stream(wavs, sample_rate, silence))
+    if not parts:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(parts)
+
+@trace.traced(cat="tts")
+def save_wav(wav, path, sample_rate, gain=None):
+    """Saves a float waveform as 16 bit pcm, peak normalized the same way TTS's AudioProcessor.save_wav does unless
+    given a fixed gain."""
+    wav = np.asarray(wav, dtype=np.float32)
+    if gain is None:
+        gain = 1 / max(0.01, float(np.max(np.abs(wav)))) if len(wav) else 1.0
+    with WavStreamWriter(path, sample_rate, gain) as writer:
+        writer.write(wav)
+
+def output_sample_rate(config_path, vocoder_config_path=None):
+    """The sample rate Synthesizer will output at, read from the model configs without loading the models."""
+    from TTS.config import load_config
+
+    return load_config(vocoder_config_path or config_path).audio["sample_rate"]
+
+def multi_speaker(config_path, speakers_file_path=None):
+    """Whether the model needs a speaker picked, read from its config without loading it."""
+    if speakers_file_path:
+        return True
+    if config_path is None:
+        return False
+    from TTS.config import load_config
+
+    config = load_config(config_path)
+    # older models keep these at the top of the config, newer ones under model_args
+    for args in (config, getattr(config, "model_args", None)):
+        if args is None:
+            continue
+        if getattr(args, "use_speaker_embedding", False) or getattr(args, "use_d_vector_file", False):
+            return True
+        if (getattr(args, "num_speakers", None) or 0) > 1:
+            return True
+    return False
+
+def resolve_models(model_name=None, vocoder_name=None):
+    """Downloads released models by name if needed, returning (model_path, config_path, vocoder_path, vocoder_config_path)
+    the same way tts_pipe resolves --model_name and --vocoder_name."""
+    from pathlib import Path
+
+    import TTS
+    from TTS.utils.manage import ModelManager
+
+    manager = ModelManager(Path(TTS.__file__).parent / ".models.json")
+    model_path = config_path = vocoder_path = vocoder_config_path = None
+    if model_name is not None:
+        model_path, config_path, model_item = manager.download_model(model_name)
+        vocoder_name = model_item["default_vocoder"] if vocoder_name is None else vocoder_name
+    if vocoder_name is not None:
+        vocoder_path, vocoder_config_path, _ = manager.download_model(vocoder_name)
+    return model_path, config_path, vocoder_path, vocoder_config_path
+
+@trace.traced(cat="tts")
+def load_synthesizer(synth_args, max_decoder_steps=3000, lexicon=None):
+    """Loads a Synthesizer, with team mentions looked up in lexicon (a backend.lexicon.Lexicon) if there is one."""
+    # TTS pulls in torch, so only import it where we actually synthesize
+    from TTS.utils.synthesizer import Synthesizer
+
+    synthesizer = Synthesizer(*synth_args)
+    synthesizer.tts_model.decoder.max_decoder_steps = max_decoder_steps
+    if lexicon is not None:
+        from .pronounce import install
+        install(synthesizer, lexicon)
+    return synthesizer
+
+def synthesize_chunk(synthesizer, text, speaker_idx=None, language_idx=None, speaker_wav=None):
+    """Synthesizes one sentence into a float32 waveform without the trailing silence Synthesizer.tts pads on."""
+    with trace.span("synthesize_chunk", "tts", chars=len(text)) as span:
+        wav = np.asarray(synthesizer.tts(text, speaker_idx, language_idx, speaker_wav), dtype=np.float32)
+        wav = np.trim_zeros(wav, 'b')
+        span["samples"] = len(wav)
+    return wav
+
+# every worker process loads its own synthesizer once
+_worker_synthesizer = None
+_worker_voice = None
+
+@trace.traced(cat="tts")
+def _init_worker(synth_args, voice, cpu_sets, threads, next_worker, max_decoder_steps, lexicon):
+    global _worker_synthesizer, _worker_voice
+    from .scheduling import configure_worker
+
+    # workers take the cpu sets in turn as they start
+    with next_worker.get_lock():
+        index = next_worker.value
+        next_worker.value += 1
+    configure_worker(cpu_sets[index % len(cpu_sets)], threads)
+    _worker_synthesizer = load_synthesizer(synth_args, max_decoder_steps, lexicon)
+    _worker_voice = voice
+
+def _synthesize(text):
+    return synthesize_chunk(_worker_synthesizer, text, *_worker_voice)
+
+def _synthesize_batch(texts, batch_size):
+    from .batching import BatchSynthesizer
+
+    return BatchSynthesizer(_worker_synthesizer, _worker_voice, batch_size).synthesize(texts)
+
+def _sample_rate():
+    return _worker_synthesizer.output_sample_rate
+
+class SynthesisPool:
+    """A pool of worker processes, each holding its own loaded Synthesizer.
+
+    synth_args are the positional arguments for TTS.utils.synthesizer.Synthesizer and voice is
+    (speaker_idx, language_idx, speaker_wav) as passed to Synthesizer.tts. With batch_size > 1, map() hands workers
+    batches of similar length sentences to run batched (see batching.BatchSynthesizer).
+    jobs, threads and cpus go to scheduling.CpuPlan, which pins each worker to its own cores, or pass a plan instead.
+    lexicon goes to every worker's load_synthesizer."""
+    def __init__(self, synth_args, voice=(None, None, None), jobs=None, max_decoder_steps=3000, batch_size=1,
+                 threads=None, cpus=None, plan=None, lexicon=None):
+        from .scheduling import CpuPlan
+
+        self.plan = plan or CpuPlan(jobs, threads, cpus)
+        self.jobs = self.plan.jobs
+        self.batch_size = batch_size
+        # spawn rather than fork, torch doesn't like having its thread pools forked out from under it
+        context = multiprocessing.get_context("spawn")
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.jobs,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(synth_args, voice, self.plan.cpu_sets, self.plan.threads, context.Value("i", 0), max_decoder_steps,
+                      lexicon),
+        )
+
+    def map(self, chunks):
+        """Synthesizes chunks across the pool, yielding waveforms in the same order as chunks."""
+        if self.batch_size <= 1:
+            return self._pool.map(_synthesize, chunks)
+        from .batching import length_batches
+
+        # everything gets queued now like Executor.map does, results still come back in order
+        chunks = list(chunks)
+        slots = [None] * len(chunks)
+        for batch in length_batches([len(chunk) for chunk in chunks], self.batch_size):
+            fut = self._pool.submit(_synthesize_batch, [chunks[i] for i in batch], self.batch_size)
+            for j, i in enumerate(batch):
+                slots[i] = (fut, j)
+        return (fut.result()[j] for fut, j in slots)
+
+    def submit(self, chunk):
+        """Queues one chunk, returning a future for its waveform."""
+        return self._pool.submit(_synthesize, chunk)
+
+    def sample_rate(self):
+        return self._pool.submit(_sample_rate).result()
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,135 @@
+import json
+import os
+import socket
+import socketserver
+import time
+
+DEFAULT_SOCKET = "/tmp/recap_tts.sock"
+
+# the daemon speaks newline-delimited json: one request line in, one response line out per connection.
+# a null gain peak normalizes the output, same as save_wav.
+#   request:  {"text": ..., "out_path": ..., "speaker_idx": ..., "language_idx": ..., "speaker_wav": ...,
+#              "split_sentences": false, "sentence_silence": 0.45, "gain": null}
+#             or {"command": "shutdown"}
+#   response: {"ok": true, "out_path": ..., "seconds": ...} or {"ok": false, "error": ...}
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            # connected and hung up without a request, e.g. another daemon checking whether this one is alive
+            return
+        try:
+            request = json.loads(line)
+            if request.get("command") == "shutdown":
+                response = {"ok": True}
+                # serve() checks this once the response is out
+                self.server.stop = True
+            else:
+                response = self.server.synthesize(request)
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+class TTSDaemon(socketserver.UnixStreamServer):
+    """Keeps one loaded Synthesizer around and synthesizes jobs sent to it over a unix socket, one at a time."""
+    def __init__(self, synthesizer, socket_path=DEFAULT_SOCKET, voice=(None, None, None), audio_cache=None, model_key=(),
+                 gain=None):
+        self.synthesizer = synthesizer
+        self.voice = voice
+        # jobs that don't pick a gain get this one
+        self.gain = gain
+        # AudioCache for sentences, keyed on model_key + the job's voice
+        self.audio_cache = audio_cache
+        self.model_key = tuple(model_key)
+        self.stop = False
+        if os.path.exists(socket_path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                try:
+                    sock.connect(socket_path)
+                except ConnectionRefusedError:
+                    # nothing listening, left over from a daemon that didn't exit cleanly
+                    os.remove(socket_path)
+                else:
+                    raise RuntimeError(f"a synthesis daemon is already running on {socket_path}")
+        super().__init__(socket_path, _Handler)
+
+    def synthesize(self, request):
+        # the thin client imports this module too, keep numpy out of it
+        from .synthesis import save_wav, split_sentences, stitch, synthesize_chunk
+
+        start = time.perf_counter()
+        text = request["text"].replace("..", ".")
+        voice = (
+            request.get("speaker_idx", self.voice[0]),
+            request.get("language_idx", self.voice[1]),
+            request.get("speaker_wav", self.voice[2]),
+        )
+        sample_rate = self.synthesizer.output_sample_rate
+        if request.get("split_sentences") or self.audio_cache is not None:
+            def synthesize_many(texts):
+                return [synthesize_chunk(self.synthesizer, chunk, *voice) for chunk in texts]
+            chunks = split_sentences(text)
+            if self.audio_cache is not None:
+                wavs = self.audio_cache.map(self.model_key + voice, chunks, synthesize_many)
+            else:
+                wavs = synthesize_many(chunks)
+            wav = stitch(wavs, sample_rate, request.get("sentence_silence", 0.45))
+        else:
+            wav = self.synthesizer.tts(text, *voice)
+        save_wav(wav, request["out_path"], sample_rate, request.get("gain", self.gain))
+        return {"ok": True, "out_path": request["out_path"], "seconds": time.perf_counter() - start}
+
+    def serve(self):
+        print(f" > Serving synthesis jobs on {self.server_address}")
+        try:
+            while not self.stop:
+                self.handle_request()
+        finally:
+            self.server_close()
+            os.remove(self.server_address)
+
+def request(payload, socket_path=DEFAULT_SOCKET):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline())
+    if not response["ok"]:
+        raise RuntimeError(response["error"])
+    return response
+
+def synthesize(text, out_path, socket_path=DEFAULT_SOCKET, **options):
+    """Asks a running daemon to synthesize text into out_path. options are speaker_idx, language_idx, speaker_wav,
+    split_sentences, sentence_silence and gain."""
+    return request({"text": text, "out_path": os.path.abspath(out_path), **options}, socket_path)
+
+def shutdown(socket_path=DEFAULT_SOCKET):
+    return request({"command": "shutdown"}, socket_path)
+
+if __name__ == "__main__":
+    # thin client, doesn't import TTS or torch at all
+    import argparse
+    parser = argparse.ArgumentParser(description="Send a synthesis job to a running `tts_pipe --serve` daemon.")
+    parser.add_argument("--file", help="script file to synthesize")
+    parser.add_argument("--out_path", default="tts_output.wav", help="output wav file path")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="daemon socket path")
+    parser.add_argument("--speaker_idx", default=None)
+    parser.add_argument("--split_sentences", action="store_true")
+    parser.add_argument("--sentence_silence", type=float, default=0.45)
+    parser.add_argument("--gain", type=float, default=None, help="scale the output by this instead of peak normalizing it")
+    parser.add_argument("--shutdown", action="store_true", help="stop the daemon")
+    args = parser.parse_args()
+
+    if args.shutdown:
+        shutdown(args.socket)
+    else:
+        with open(args.file) as f:
+            text = f.read()
+        options = {"split_sentences": args.split_sentences, "sentence_silence": args.sentence_silence}
+        if args.speaker_idx is not None:
+            options["speaker_idx"] = args.speaker_idx
+        if args.gain is not None:
+            options["gain"] = args.gain
+        result = synthesize(text, args.out_path, args.socket, **options)
+        print(f" > Saved {result['out_path']} in {result['seconds']:.1f}s")
@@ -0,0 +1,276 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from .. import trace
+from .wav_stream import OUTPUT_GAIN, to_pcm
+
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+VIDEO_EXTS = (".mp4", ".mkv", ".mov", ".webm", ".avi")
+
+def list_footage(footage_dir, event_code=None):
+    """The stills and clips to put under a recap, in name order. A footage_dir/<event code>/ folder wins if there is one."""
+    if event_code is not None and os.path.isdir(os.path.join(footage_dir, event_code)):
+        footage_dir = os.path.join(footage_dir, event_code)
+    return sorted(
+        os.path.join(footage_dir, name) for name in os.listdir(footage_dir)
+        if name.lower().endswith(IMAGE_EXTS + VIDEO_EXTS)
+    )
+
+def probe_duration(path, ffprobe="ffprobe"):
+    """A media file's length in seconds, as ffprobe reports it."""
+    out = subprocess.run(
+        [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False,
+    )
+    try:
+        return float(out.stdout.decode().strip())
+    except ValueError:
+        raise RuntimeError(f"ffprobe couldn't read the length of {path}:\n{out.stderr.decode(errors='replace').strip()}") from None
+
+class FootageSegments:
+    """Stills and clips re-encoded into segments that all share one codec, size and frame rate, so ffmpeg's concat
+    demuxer can play them back to back (it can't mix pngs, jpgs and h264 clips). Stills become still_seconds long
+    clips. Each source is only converted the first time an encoder asks for it, so share one across a batch.
+    """
+    def __init__(self, still_seconds=5, size=(1920, 1080), fps=30, ffmpeg="ffmpeg", ffprobe="ffprobe"):
+        self.still_seconds = still_seconds
+        self.size = size
+        self.fps = fps
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+        self.dir = tempfile.mkdtemp(prefix="recap_footage.")
+        # source path -> (segment path, seconds)
+        self._segments = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """The (segment path, seconds) for one still or clip, converting it if it hasn't been yet."""
+        with self._lock:
+            if path not in self._segments:
+                self._segments[path] = self._convert(path, os.path.join(self.dir, f"{len(self._segments)}.mp4"))
+            return self._segments[path]
+
+    def _convert(self, path, out_path):
+        width, height = self.size
+        if path.lower().endswith(IMAGE_EXTS):
+            source = ["-loop", "1", "-framerate", str(self.fps), "-t", str(self.still_seconds), "-i", path]
+        else:
+            source = ["-i", path]
+        cmd = [
+            self.ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+            *source,
+            "-vf", f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                   f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={self.fps},format=yuv420p",
+            "-an", "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+            out_path,
+        ]
+        with trace.span("ffmpeg segment", "video", path=path):
+            proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with {proc.returncode} converting {path}:\n"
+                               f"{proc.stderr.decode(errors='replace').strip()}")
+        if path.lower().endswith(IMAGE_EXTS):
+            return out_path, float(self.still_seconds)
+        return out_path, probe_duration(out_path, self.ffprobe)
+
+    def close(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+def write_concat_list(f, segments, max_seconds):
+    """Writes an ffconcat list that cycles through (path, seconds) segments for at least max_seconds, ffmpeg cuts it
+    to the audio."""
+    if not any(seconds > 0 for _, seconds in segments):
+        raise ValueError("all the footage is empty")
+    f.write("ffconcat version 1.0\n")
+    total = 0.0
+    while total < max_seconds:
+        for path, seconds in segments:
+            f.write("file '{}'\n".format(os.path.abspath(path).replace("'", r"'\''")))
+            f.write(f"duration {seconds}\n")
+            total += seconds
+
+class VideoEncoder:
+    """An ffmpeg process that turns a recap's audio into a video over its footage.
+
+    By default audio is written to it a chunk at a time with write(), the same way as WavStreamWriter, and goes to
+    ffmpeg's stdin as raw pcm, so no wav ever hits the disk. Pass audio_path to encode an existing audio file instead.
+    Stills are shown for still_seconds each and clips play through, looping until the audio ends. segments is a
+    FootageSegments to share converted footage with other encoders, by default the encoder converts its own.
+    """
+    def __init__(self, out_path, footage, sample_rate=22050, audio_path=None, still_seconds=5, size=(1920, 1080), fps=30,
+                 gain=OUTPUT_GAIN, ffmpeg="ffmpeg", ffprobe="ffprobe", max_seconds=3600, extra_args=(), segments=None):
+        if not footage:
+            raise ValueError("no footage to put under the audio")
+        self.out_path = out_path
+        self.sample_rate = sample_rate
+        self.gain = gain
+
+        self._own_segments = segments is None
+        if segments is None:
+            segments = FootageSegments(still_seconds, size, fps, ffmpeg, ffprobe)
+        self._segments = segments
+        try:
+            self._concat = tempfile.NamedTemporaryFile("w", suffix=".ffconcat", delete=False)
+            with self._concat:
+                write_concat_list(self._concat, [segments.get(path) for path in footage], max_seconds)
+        except Exception:
+            if self._own_segments:
+                segments.close()
+            raise
+
+        if audio_path is None:
+            audio_in = ["-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0"]
+        else:
+            audio_in = ["-i", audio_path]
+        cmd = [
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "concat", "-safe", "0", "-i", self._concat.name,
+            *audio_in,
+            # the segments are already at the right size, the timestamps just need evening out across the joins
+            "-map", "0:v", "-map", "1:a", "-vf", f"fps={segments.fps},format=yuv420p",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+            "-c:a", "aac", "-b:a", "160k",
+            "-shortest", "-movflags", "+faststart",
+            *extra_args,
+            out_path,
+        ]
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if audio_path is None else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        # drain stderr as we go so a chatty ffmpeg can't block on a full pipe
+        self._stderr = []
+        self._stderr_thread = threading.Thread(target=lambda: self._stderr.append(self.proc.stderr.read()), daemon=True)
+        self._stderr_thread.start()
+
+    def write(self, wav):
+        self.proc.stdin.write(to_pcm(wav, self.gain))
+
+    def finish(self):
+        """Ends the audio. ffmpeg keeps encoding in the background until wait()."""
+        if self.proc.stdin is not None and not self.proc.stdin.closed:
+            self.proc.stdin.close()
+
+    def wait(self):
+        """Waits for ffmpeg to finish, raising RuntimeError with its output if it failed."""
+        self.finish()
+        with trace.span("ffmpeg", "video", out_path=self.out_path):
+            code = self.proc.wait()
+        self._stderr_thread.join()
+        try:
+            os.remove(self._concat.name)
+        except OSError:
+            pass
+        if self._own_segments:
+            self._segments.close()
+        if code != 0:
+            err = b"".join(self._stderr).decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg exited with {code} encoding {self.out_path}:\n{err}")
+
+    def close(self):
+        self.wait()
+
+    def abort(self):
+        """Kills ffmpeg and throws away whatever it wrote."""
+        self.proc.kill()
+        try:
+            self.wait()
+        except RuntimeError:
+            pass
+        try:
+            os.remove(self.out_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class EncoderPool:
+    """Caps how many ffmpeg encodes run at once across a batch.
+
+    open() blocks while max_encodes are running. finish() hands an encoder's tail end to a background thread so the
+    caller can get on with the next recap, discard() kills one that isn't needed anymore, and wait() collects failures
+    as event code -> error. Footage is converted once for the whole batch (see FootageSegments) and cleaned up by wait().
+    """
+    ext = ".mp4"
+    # encoder arguments that decide how footage gets converted
+    SEGMENT_ARGS = ("still_seconds", "size", "fps", "ffmpeg", "ffprobe")
+
+    def __init__(self, footage_dir, max_encodes=2, **encoder_args):
+        self.footage_dir = footage_dir
+        self.encoder_args = encoder_args
+        self._slots = threading.BoundedSemaphore(max_encodes)
+        self._threads = []
+        self._segments = None
+        self.failures = {}
+
+    def open(self, event_code, out_path, sample_rate=22050, audio_path=None, gain=OUTPUT_GAIN):
+        self._slots.acquire()
+        try:
+            if self._segments is None:
+                self._segments = FootageSegments(**{k: v for k, v in self.encoder_args.items() if k in self.SEGMENT_ARGS})
+            return VideoEncoder(out_path, list_footage(self.footage_dir, event_code), sample_rate=sample_rate,
+                                audio_path=audio_path, gain=gain, segments=self._segments, **self.encoder_args)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def finish(self, event_code, encoder):
+        encoder.finish()
+        def reap():
+            try:
+                encoder.wait()
+                print(f" > {event_code}: encoded {encoder.out_path}")
+            except Exception as e:
+                self.failures[event_code] = str(e)
+                print(f" > {event_code}: FAILED\n{e}")
+            finally:
+                self._slots.release()
+        thread = threading.Thread(target=reap)
+        thread.start()
+        self._threads.append(thread)
+
+    def discard(self, encoder):
+        try:
+            encoder.abort()
+        finally:
+            self._slots.release()
+
+    def wait(self):
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._segments is not None:
+            self._segments.close()
+            self._segments = None
+        return self.failures
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+    import json
+    import wave
+    parser = argparse.ArgumentParser(description="Encode recap videos for every <event code>.wav in a directory.")
+    parser.add_argument("recap_dir", help="directory of <event code>.wav recaps, the .mp4s go next to them")
+    parser.add_argument("--footage", required=True, help="directory of stills/clips, with optional <event code>/ subfolders")
+    parser.add_argument("--jobs", type=int, default=2, help="ffmpeg encodes to run at once")
+    parser.add_argument("--still_seconds", type=float, default=5, help="how long each still stays up")
+    args = parser.parse_args()
+
+    pool = EncoderPool(args.footage, max_encodes=args.jobs, still_seconds=args.still_seconds)
+    for wav_path in sorted(glob.glob(os.path.join(args.recap_dir, "*.wav"))):
+        code = os.path.basename(wav_path)[:-len(".wav")]
+        with wave.open(wav_path) as w:
+            sample_rate = w.getframerate()
+        pool.finish(code, pool.open(code, wav_path[:-len(".wav")] + ".mp4", sample_rate, audio_path=wav_path))
+    failures = pool.wait()
+    if failures:
+        with open(os.path.join(args.recap_dir, "video_failures.json"), "w") as f:
+            json.dump(failures, f, indent=2)
@@ -0,0 +1,64 @@
+import struct
+import sys
+
+import numpy as np
+
+# RIFF sizes to use when the output can't be seeked back to fix them up, e.g. a pipe.
+# most players and ffmpeg treat these as "read until eof".
+UNKNOWN_SIZE = 0xFFFFFFFF
+# streamed and video output can't see the whole recap to peak normalize it like whole-file writes do, so samples get a
+# fixed gain instead. 1.0 leaves the vocoder's levels alone, so nothing it outputs in range gets clipped
+OUTPUT_GAIN = 1.0
+
+def to_pcm(wav, gain=OUTPUT_GAIN):
+    """Float waveform -> 16 bit little endian pcm bytes, scaled by gain and clipped."""
+    pcm = np.clip(np.asarray(wav, dtype=np.float32) * gain, -1.0, 1.0)
+    return (pcm * 32767).astype("<i2").tobytes()
+
+class WavStreamWriter:
+    """Writes 16 bit mono pcm to a wav file (or "-" for stdout) chunk by chunk as audio gets synthesized.
+
+    The header goes out first with placeholder sizes that get patched on close if the output is seekable.
+    Unlike save_wav this can't peak normalize over the whole file, so samples are scaled by `gain` and clipped.
+    """
+    def __init__(self, path, sample_rate, gain=OUTPUT_GAIN):
+        self.sample_rate = sample_rate
+        self.gain = gain
+        self.frames = 0
+        if path == "-":
+            # the real stdout, tts_pipe points sys.stdout at stderr so log lines don't end up in the audio
+            self.f = sys.__stdout__.buffer
+            self._owns_file = False
+        else:
+            self.f = open(path, "wb")
+            self._owns_file = True
+        self._seekable = self.f.seekable()
+        self._write_header(UNKNOWN_SIZE)
+
+    def _write_header(self, data_size):
+        riff_size = UNKNOWN_SIZE if data_size == UNKNOWN_SIZE else 36 + data_size
+        self.f.write(struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF", riff_size, b"WAVE",
+            b"fmt ", 16, 1, 1, self.sample_rate, self.sample_rate * 2, 2, 16,
+            b"data", data_size,
+        ))
+
+    def write(self, wav):
+        self.f.write(to_pcm(wav, self.gain))
+        self.f.flush()
+        self.frames += len(wav)
+
+    def close(self):
+        if self._seekable:
+            self.f.seek(0)
+            self._write_header(self.frames * 2)
+        self.f.flush()
+        if self._owns_file:
+            self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,338 @@
+"""Event codes in, finished recap audio out, with every stage running at once.
+
+Scripts get fetched and rendered on a few threads into a small bounded queue. Sentences from every event go through
+one synthesis pool with a bounded number in flight, and each event's audio is streamed to out_dir/<code>.wav as its
+sentences come back in order. So while one event is synthesizing, the next ones are already being fetched and
+rendered, and the synthesis workers don't sit idle waiting on the network or on the tail end of an event.
+
+With video (a frontend.video.EncoderPool) the audio is piped straight into ffmpeg instead, which renders
+out_dir/<code>.mp4 over the event's footage while synthesis moves on to the next event.
+"""
+import collections
+import os
+import queue
+import threading
+import traceback
+from concurrent.futures import Future
+
+import numpy as np
+
+from . import trace
+from .backend.script_writer import ScriptWriter
+from .frontend.audio_cache import normalize_sentence
+from .frontend.synthesis import SynthesisPool, load_synthesizer, output_sample_rate, split_sentences, synthesize_chunk
+from .frontend.scheduling import CpuPlan, configure_worker
+from .frontend.wav_stream import OUTPUT_GAIN, WavStreamWriter
+
+# marks a render worker running out of events
+_DONE = object()
+# seconds to wait on the next script before writing out sentences that came back in the meantime
+_POLL = 0.05
+
+class _InlineSynthesizer:
+    """Synthesizes in this process for jobs=1. submit() does the work right away and hands back a finished future."""
+    def __init__(self, synth_args, voice, threads, lexicon=None, max_decoder_steps=3000):
+        # not pinned, the render threads share this process
+        configure_worker(None, threads)
+        self.synthesizer = load_synthesizer(synth_args, max_decoder_steps, lexicon)
+        self.voice = voice
+
+    def submit(self, chunk):
+        fut = Future()
+        try:
+            fut.set_result(synthesize_chunk(self.synthesizer, chunk, *self.voice))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    def close(self):
+        pass
+
+class _EventAudio:
+    """One event's output, written sentence by sentence as they come back.
+
+    The writer (a WavStreamWriter, or a VideoEncoder for video) is only opened once the first sentence is ready, so an
+    event waiting on synthesis doesn't hold an encode slot.
+    """
+    def __init__(self, code, path, sample_rate, silence, num_chunks, output, gain=OUTPUT_GAIN):
+        self.code = code
+        self.path = path
+        self.remaining = num_chunks
+        self.failed = False
+        self.written = 0
+        self.gap = np.zeros(int(sample_rate * silence), dtype=np.float32)
+        self.sample_rate = sample_rate
+        self.output = output
+        self.gain = gain
+        self.writer = None
+
+    def _open(self):
+        return self.output.open(self.code, self.path, self.sample_rate, gain=self.gain)
+
+    def add(self, wav):
+        if self.writer is None:
+            self.writer = self._open()
+        if self.written:
+            self.writer.write(self.gap)
+        self.writer.write(wav)
+        self.written += 1
+
+    def fail(self):
+        self.failed = True
+        if self.writer is not None:
+            self.output.discard(self.writer)
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def close(self):
+        if self.writer is None:
+            self.writer = self._open()
+        self.output.finish(self.code, self.writer)
+
+class _WavOutput:
+    """Where recaps go without video: a wav per event. Same open/finish/discard as video.EncoderPool."""
+    ext = ".wav"
+
+    def open(self, event_code, path, sample_rate, gain=OUTPUT_GAIN):
+        return WavStreamWriter(path, sample_rate, gain)
+
+    def finish(self, event_code, writer):
+        writer.close()
+        print(f" > {event_code}: wrote {event_code}.wav")
+
+    def discard(self, writer):
+        writer.close()
+
+    def wait(self):
+        return {}
+
+class Pipeline:
+    """Turns a batch of events into out_dir/<code>.txt scripts and out_dir/<code>.wav recaps (or .mp4 with video).
+
+    client is an FTCEventsClient (or anything with the same fetch()), synth_args and voice are what SynthesisPool
+    takes. jobs, threads and cpus size and pin the synthesis workers (see frontend.scheduling.CpuPlan), jobs=1
+    synthesizes in this process instead of a worker pool.
+    max_scripts bounds how far rendering can run ahead of synthesis, and max_inflight how many sentences are queued
+    on the pool at once (by default two per worker, enough to keep every worker busy).
+    video is an EncoderPool to encode videos with instead of writing wavs. Either way the audio is streamed out, so it's
+    scaled by gain (see frontend.wav_stream.OUTPUT_GAIN) rather than peak normalized.
+    lexicon (a backend.lexicon.Lexicon) is used for team mentions both in the scripts and by the synthesizers.
+    """
+    def __init__(self, client, synth_args, voice=(None, None, None), out_dir="recaps", jobs=None, render_workers=2,
+                 max_scripts=2, max_inflight=None, sentence_silence=0.45, audio_cache=None, model_key=(), seed=None,
+                 video=None, threads=None, cpus=None, lexicon=None, gain=OUTPUT_GAIN):
+        self.client = client
+        self.synth_args = synth_args
+        self.voice = voice
+        self.out_dir = out_dir
+        self.plan = CpuPlan(jobs, threads, cpus)
+        self.jobs = self.plan.jobs
+        self.render_workers = render_workers
+        self.max_scripts = max_scripts
+        self.max_inflight = max_inflight or 2 * self.jobs
+        self.sentence_silence = sentence_silence
+        self.audio_cache = audio_cache
+        self.voice_key = tuple(model_key) + tuple(voice)
+        if lexicon is not None:
+            # the lexicon changes how team mentions sound, so audio from a different one can't be reused
+            self.voice_key += ("lexicon", lexicon.version())
+        self.seed = seed
+        self.lexicon = lexicon
+        self.gain = gain
+        self.output = video if video is not None else _WavOutput()
+
+    @trace.traced(cat="pipeline")
+    def render(self, event_code):
+        script = ScriptWriter(event_code, self.client, seed=self.seed, lexicon=self.lexicon).full_script()
+        with open(os.path.join(self.out_dir, event_code + ".txt"), "w") as f:
+            f.write(script)
+        return script
+
+    def _render_worker(self, codes, scripts):
+        while True:
+            try:
+                code = codes.get_nowait()
+            except queue.Empty:
+                scripts.put(_DONE)
+                return
+            try:
+                scripts.put((code, self.render(code), None))
+            except Exception:
+                scripts.put((code, None, traceback.format_exc()))
+
+    def _synthesizer(self):
+        if self.jobs == 1:
+            return _InlineSynthesizer(self.synth_args, self.voice, self.plan.threads, self.lexicon)
+        return SynthesisPool(self.synth_args, self.voice, plan=self.plan, lexicon=self.lexicon)
+
+    def _submit(self, synth, chunk, pending):
+        """Returns (future, whether it's a new synthesis). A sentence already in flight (pending, normalized sentence
+        -> future) shares its future instead of being synthesized again."""
+        key = normalize_sentence(chunk)
+        if key in pending:
+            return pending[key], False
+        if self.audio_cache is not None:
+            wav = self.audio_cache.get(self.voice_key, chunk)
+            if wav is not None:
+                fut = Future()
+                fut.set_result(wav)
+                return fut, False
+        pending[key] = synth.submit(chunk)
+        return pending[key], True
+
+    def _finish(self, item, pending, failures):
+        """Waits on the oldest sentence in flight and writes it out."""
+        event, chunk, fut, new = item
+        event.remaining -= 1
+        if new:
+            pending.pop(normalize_sentence(chunk), None)
+        try:
+            wav = fut.result()
+            # cached by whichever sentence synthesized it, even if its own event already failed
+            if self.audio_cache is not None and new:
+                self.audio_cache.put(self.voice_key, chunk, wav)
+            if event.failed:
+                return
+            event.add(wav)
+            if event.remaining == 0:
+                event.close()
+        except Exception:
+            if event.failed:
+                return
+            failures[event.code] = traceback.format_exc()
+            print(f" > {event.code}: FAILED\n{failures[event.code]}")
+            event.fail()
+
+    def run(self, event_codes):
+        """Runs the batch. Returns a dict of event code -> traceback for every event that failed, like batch.generate_season."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        codes = queue.Queue()
+        for code in event_codes:
+            codes.put(code)
+        scripts = queue.Queue(maxsize=self.max_scripts)
+        workers = [threading.Thread(target=self._render_worker, args=(codes, scripts), daemon=True)
+                   for _ in range(max(1, self.render_workers))]
+        for worker in workers:
+            worker.start()
+
+        failures = {}
+        synth = self._synthesizer()
+        try:
+            if self.jobs == 1:
+                sample_rate = synth.synthesizer.output_sample_rate
+            else:
+                sample_rate = output_sample_rate(self.synth_args[1], self.synth_args[5])
+            # (event, chunk, future, new synthesis) for every sentence queued, oldest first
+            inflight = collections.deque()
+            # normalized sentence -> future, for sentences being synthesized
+            pending = {}
+            finished_workers = 0
+            while finished_workers < len(workers):
+                # write out whatever's already back, and keep doing so while the next script renders
+                while inflight and inflight[0][2].done():
+                    self._finish(inflight.popleft(), pending, failures)
+                try:
+                    item = scripts.get(timeout=_POLL if inflight else None)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    finished_workers += 1
+                    continue
+                code, script, error = item
+                if error is not None:
+                    print(f" > {code}: FAILED\n{error}")
+                    failures[code] = error
+                    continue
+
+                chunks = split_sentences(script)
+                path = os.path.join(self.out_dir, code + self.output.ext)
+                event = _EventAudio(code, path, sample_rate, self.sentence_silence, len(chunks), self.output, self.gain)
+                if not chunks:
+                    try:
+                        event.close()
+                    except Exception:
+                        failures[code] = traceback.format_exc()
+                        print(f" > {code}: FAILED\n{failures[code]}")
+                for chunk in chunks:
+                    while len(inflight) >= self.max_inflight:
+                        self._finish(inflight.popleft(), pending, failures)
+                    inflight.append((event, chunk) + self._submit(synth, chunk, pending))
+            while inflight:
+                self._finish(inflight.popleft(), pending, failures)
+        finally:
+            synth.close()
+            # let the last encodes finish
+            failures.update(self.output.wait())
+
+        print(f" > {len(event_codes) - len(failures)}/{len(event_codes)} recaps written to {self.out_dir}")
+        return failures
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from .backend.batch import season_event_codes
+    from .backend.data_fetch import FTCEventsClient, RateLimiter, ResponseCache
+    from .backend.lexicon import Lexicon
+    from .frontend.audio_cache import AudioCache
+    from .frontend.scheduling import parse_cpus
+    from .frontend.synthesis import resolve_models
+
+    parser = argparse.ArgumentParser(description="Fetch, script and synthesize recaps for a batch of events, all stages at once.")
+    parser.add_argument("out_dir", help="directory to write <event code>.txt and <event code>.wav/.mp4 into")
+    parser.add_argument("--events", nargs="+", default=None, help="only these event codes instead of the whole season")
+    parser.add_argument("--model_name", default="tts_models/en/ljspeech/tacotron2-DDC", help="released TTS model to use")
+    parser.add_argument("--vocoder_name", default=None, help="released vocoder to use, defaults to the model's")
+    parser.add_argument("--model_path", default=None, help="local model checkpoint, instead of --model_name")
+    parser.add_argument("--config_path", default=None, help="config for --model_path")
+    parser.add_argument("--vocoder_path", default=None, help="local vocoder checkpoint")
+    parser.add_argument("--vocoder_config_path", default=None, help="config for --vocoder_path")
+    parser.add_argument("--speaker_idx", default=None, help="speaker for multi-speaker models")
+    parser.add_argument("--jobs", type=int, default=None, help="synthesis worker processes, each with its own ~1 GB copy of the models (default at most 4), 1 to synthesize in this process")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads per synthesis worker")
+    parser.add_argument("--cpus", default=None, help="cpus to run synthesis on, like 0-7,16-23 (default all this process can use)")
+    parser.add_argument("--render_workers", type=int, default=2, help="threads fetching and rendering scripts")
+    parser.add_argument("--max_scripts", type=int, default=2, help="how many rendered scripts can wait on synthesis")
+    parser.add_argument("--sentence_silence", type=float, default=0.45, help="seconds of silence between sentences")
+    parser.add_argument("--lexicon", default=None, help="team lexicon json (see recap.backend.lexicon) for team mentions")
+    parser.add_argument("--audio_cache", default=None, help="directory to cache synthesized sentences in")
+    parser.add_argument("--rate", type=float, default=5.0, help="max api requests per second")
+    parser.add_argument("--footage", default=None, help="directory of stills/clips to render .mp4 recaps over instead of writing .wavs")
+    parser.add_argument("--gain", type=float, default=OUTPUT_GAIN, help="scale the audio by this (and clip it)")
+    parser.add_argument("--encodes", type=int, default=2, help="ffmpeg encodes to run at once with --footage")
+    parser.add_argument("--trace", default=None, help="write a Chrome trace of every stage to this path")
+    args = parser.parse_args()
+
+    if args.trace:
+        trace.enable(args.trace)
+    with open("token") as f:
+        creds = json.load(f)
+    client = FTCEventsClient(creds['username'], creds['token'], cache=ResponseCache(), rate_limiter=RateLimiter(args.rate, 5))
+
+    if args.model_path is not None:
+        model_path, config_path = args.model_path, args.config_path
+        vocoder_path, vocoder_config_path = args.vocoder_path, args.vocoder_config_path
+    else:
+        model_path, config_path, vocoder_path, vocoder_config_path = resolve_models(args.model_name, args.vocoder_name)
+        if args.vocoder_path is not None:
+            vocoder_path, vocoder_config_path = args.vocoder_path, args.vocoder_config_path
+    synth_args = (model_path, config_path, None, None, vocoder_path, vocoder_config_path, None, None, False)
+    model_key = (args.model_path or args.model_name, vocoder_path or args.vocoder_name)
+
+    event_codes = args.events or season_event_codes(client)
+    video = None
+    if args.footage:
+        from .frontend.video import EncoderPool
+        video = EncoderPool(args.footage, max_encodes=args.encodes)
+    pipeline = Pipeline(
+        client, synth_args, voice=(args.speaker_idx, None, None), out_dir=args.out_dir, jobs=args.jobs,
+        render_workers=args.render_workers, max_scripts=args.max_scripts, sentence_silence=args.sentence_silence,
+        audio_cache=AudioCache(args.audio_cache) if args.audio_cache else None, model_key=model_key,
+        video=video, threads=args.threads, cpus=parse_cpus(args.cpus) if args.cpus else None,
+        lexicon=Lexicon.load(args.lexicon) if args.lexicon else None, gain=args.gain,
+    )
+    failures = pipeline.run(event_codes)
+    if failures:
+        with open(os.path.join(args.out_dir, "failures.json"), "w") as f:
+            json.dump(failures, f, indent=2)
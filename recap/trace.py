@@ -0,0 +1,170 @@
+"""Opt-in tracing of the recap pipeline, written out in Chrome trace format (load it in chrome://tracing or Perfetto).
+
+Turn it on with enable(path) or by setting RECAP_TRACE=path in the environment. Worker processes inherit the setting
+and write their spans to <pid>.json in a directory made for the run, which the process that turned tracing on merges
+into path when it exits.
+While tracing is off, span() and @traced cost about one global lookup.
+"""
+import atexit
+import functools
+import json
+import multiprocessing.util
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+ENV_VAR = "RECAP_TRACE"
+
+class _NoSpan:
+    """Stands in for a span while tracing is off."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setitem__(self, key, value):
+        pass
+
+_NO_SPAN = _NoSpan()
+
+class _Span:
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __setitem__(self, key, value):
+        self.args[key] = value
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.add({
+            "name": self.name,
+            "cat": self.cat,
+            "ph": "X",
+            "ts": self.start / 1000,
+            "dur": (end - self.start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": self.args,
+        })
+        return False
+
+class Tracer:
+    def __init__(self, path, owner=True, run_dir=None):
+        self.path = path
+        # where this run's worker processes write their spans
+        self.run_dir = run_dir
+        # the process that turned tracing on merges everyone else's files in
+        self.owner = owner
+        self.pid = os.getpid()
+        self.events = []
+        self._lock = threading.Lock()
+
+    def add(self, event):
+        with self._lock:
+            self.events.append(event)
+
+    def add_all(self, events):
+        with self._lock:
+            self.events.extend(events)
+
+    def save(self):
+        if os.getpid() != self.pid:
+            # a forked copy of some other process's tracer
+            return
+        if self.owner and self.run_dir is not None and os.path.isdir(self.run_dir):
+            for fname in sorted(os.listdir(self.run_dir)):
+                try:
+                    with open(os.path.join(self.run_dir, fname)) as f:
+                        self.add_all(json.load(f)["traceEvents"])
+                except (OSError, ValueError, KeyError) as e:
+                    print(f" [!] couldn't merge worker trace {fname}: {e}")
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+        with self._lock:
+            events = list(self.events)
+        with open(self.path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+_tracer = None
+
+def enable(path):
+    """Starts recording spans, to be written to path at exit (or on save())."""
+    # workers of this run (and only this run) write into here, next to path so the merge doesn't cross filesystems
+    run_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(path)}.", dir=os.path.dirname(os.path.abspath(path)))
+    os.environ[ENV_VAR] = path
+    os.environ[ENV_VAR + "_PID"] = str(os.getpid())
+    os.environ[ENV_VAR + "_DIR"] = run_dir
+    _start(path, owner=True, run_dir=run_dir)
+
+def _start(path, owner, run_dir=None):
+    global _tracer
+    _tracer = Tracer(path, owner, run_dir)
+    atexit.register(_tracer.save)
+    # pool workers leave through os._exit, which skips atexit but not multiprocessing's finalizers
+    multiprocessing.util.Finalize(None, _tracer.save, exitpriority=10)
+
+def disable():
+    global _tracer
+    _tracer = None
+    for var in (ENV_VAR, ENV_VAR + "_PID", ENV_VAR + "_DIR"):
+        os.environ.pop(var, None)
+
+def enabled():
+    return _tracer is not None
+
+def save():
+    if _tracer is not None:
+        _tracer.save()
+
+def span(name, cat="recap", **args):
+    """Times a block: `with span("fetch", path=path) as sp: ...`. Extra args can be attached with sp[key] = value."""
+    if _tracer is None:
+        return _NO_SPAN
+    return _Span(_tracer, name, cat, args)
+
+def traced(name=None, cat="recap"):
+    """Decorator version of span(), named after the function by default."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return fn(*args, **kwargs)
+            with _Span(_tracer, span_name, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _worker_path():
+    return os.path.join(os.environ[ENV_VAR + "_DIR"], f"{os.getpid()}.json")
+
+def _child_after_fork():
+    # a forked worker starts with a copy of the parent's spans, which the parent will save itself
+    if _tracer is not None:
+        _start(_worker_path(), owner=False)
+
+def _finalize_in_worker(_):
+    # multiprocessing clears out the finalizers a worker process starts with, so put ours back
+    if _tracer is not None:
+        multiprocessing.util.Finalize(None, _tracer.save, exitpriority=10)
+
+os.register_at_fork(after_in_child=_child_after_fork)
+multiprocessing.util.register_after_fork(Tracer, _finalize_in_worker)
+
+if os.environ.get(ENV_VAR):
+    if os.environ.get(ENV_VAR + "_PID") in (None, str(os.getpid())) or not os.environ.get(ENV_VAR + "_DIR"):
+        enable(os.environ[ENV_VAR])
+    else:
+        # a spawned worker of a traced process
+        _start(_worker_path(), owner=False)
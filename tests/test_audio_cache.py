@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from recap.backend.lexicon import Lexicon
+from recap.disk_lru import DiskLRU
+from recap.frontend.audio_cache import AudioCache
+
+VOICE = ("tts_models/en/ljspeech/tacotron2-DDC", None, None, None, None)
+
+def wav(n, value=0.5):
+    return np.full(n, value, dtype=np.float32)
+
+def test_round_trip(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    assert cache.get(VOICE, "Hello there.") is None
+    cache.put(VOICE, "Hello there.", wav(100))
+    np.testing.assert_array_equal(cache.get(VOICE, "  Hello   there. "), wav(100))
+    assert cache.get(VOICE[:-1] + ("speaker",), "Hello there.") is None
+    # a new cache over the same directory picks up what's there
+    assert AudioCache(str(tmp_path)).contains(VOICE, "Hello there.")
+
+def test_evicts_least_recently_used(tmp_path):
+    # room for about two entries
+    cache = AudioCache(str(tmp_path), max_bytes=2 * (4000 + 128) + 64)
+    cache.put(VOICE, "one", wav(1000))
+    cache.put(VOICE, "two", wav(1000))
+    cache.get(VOICE, "one")
+    cache.put(VOICE, "three", wav(1000))
+    assert cache.contains(VOICE, "one") and cache.contains(VOICE, "three")
+    assert not cache.contains(VOICE, "two")
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".npy")]) == 2
+
+def test_imap_only_synthesizes_misses(tmp_path):
+    cache = AudioCache(str(tmp_path))
+    cache.put(VOICE, "cached.", wav(10, 0.1))
+    asked = []
+    def synthesize_many(texts):
+        asked.extend(texts)
+        return [wav(10, 0.9) for _ in texts]
+    out = cache.map(VOICE, ["new.", "cached.", "new.", "other."], synthesize_many)
+    assert asked == ["new.", "other."]
+    np.testing.assert_array_equal([w[0] for w in out], np.array([0.9, 0.1, 0.9, 0.9], dtype=np.float32))
+
+def test_lexicon_changes_key(tmp_path):
+    lexicon = Lexicon.build([{"teamNumber": 4042, "nameShort": "Nonstandard Deviation"}])
+    edited = Lexicon.build([{"teamNumber": 4042, "nameShort": "Nonstandard Deviation"}])
+    edited.pronunciations["english_cleaners"] = {"nonstandard deviation": "non standard deviation"}
+    assert lexicon.version() == Lexicon.build([{"teamNumber": 4042, "nameShort": "Nonstandard Deviation"}]).version()
+    assert lexicon.version() != edited.version()
+
+    cache = AudioCache(str(tmp_path))
+    cache.put(VOICE + ("lexicon", lexicon.version()), "Go team.", wav(10))
+    assert cache.get(VOICE + ("lexicon", edited.version()), "Go team.") is None
+
+def test_lexicon_version_fixed_once_taken():
+    lexicon = Lexicon.build([{"teamNumber": 4042, "nameShort": "Nonstandard Deviation"}])
+    version = lexicon.version()
+    # what the front end works out while synthesizing
+    lexicon.pronunciations.setdefault("english_cleaners", {})["four zero four two"] = "four zero four two"
+    assert lexicon.version() == version
+
+def test_disk_lru_write_is_atomic(tmp_path):
+    store = DiskLRU(str(tmp_path), ".bin", 1 << 20)
+    store.write("a.bin", b"x" * 10)
+    store.write("a.bin", b"y" * 20)
+    assert store.total_bytes == 20 and len(store) == 1
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+    store.clear()
+    assert "a.bin" not in store and store.total_bytes == 0
@@ -0,0 +1,105 @@
+import types
+
+import numpy as np
+import pytest
+
+from recap.frontend import batching
+from recap.frontend.batching import BatchSynthesizer, batchable, length_batches
+
+class Tacotron2:
+    """Has every attribute batching reaches into, none of them do anything."""
+    def __init__(self):
+        stub = lambda *args, **kwargs: None
+        self.ap = types.SimpleNamespace(sample_rate=22050)
+        self.tokenizer = types.SimpleNamespace(text_to_ids=lambda text: [ord(c) for c in text])
+        self.embedding = self.postnet = stub
+        self.encoder = types.SimpleNamespace(convolutions=[], lstm=stub)
+        self.decoder = types.SimpleNamespace(
+            prenet=stub, decode=stub, get_go_frame=stub, _init_states=stub, _update_memory=stub,
+            attention=types.SimpleNamespace(init_states=stub, windowing=False), stop_threshold=0.5,
+            max_decoder_steps=3000, frame_channels=80, r=2)
+
+class HifiganGenerator:
+    pass
+
+def sentence_wav(sentence):
+    # nonzero and different for every sentence
+    return np.linspace(0.1, 0.5, 500 * len(sentence), dtype=np.float32) * (1 + len(sentence) % 7)
+
+class Synthesizer:
+    """Synthesizer.tts's shape: split into sentences, one waveform each with a gap of silence after."""
+    def __init__(self):
+        self.tts_model = Tacotron2()
+        self.vocoder_model = HifiganGenerator()
+        self.vocoder_config = {"audio": {"sample_rate": 22050}}
+        self.vocoder_ap = object()
+        self.calls = []
+
+    def split_into_sentences(self, text):
+        return [s for s in text.replace(". ", ".|").split("|") if s]
+
+    def tts(self, text, *voice):
+        self.calls.append(text)
+        return np.concatenate([np.concatenate([sentence_wav(s), np.zeros(batching.SENTENCE_GAP, dtype=np.float32)])
+                               for s in self.split_into_sentences(text)])
+
+def batched_like_tts(self, ids):
+    return [sentence_wav("".join(map(chr, x))) for x in ids]
+
+def batched_wrong(self, ids):
+    return [sentence_wav("".join(map(chr, x))) * 2 for x in ids]
+
+def batched_broken(self, ids):
+    raise TypeError("_init_states() got an unexpected keyword argument 'mask'")
+
+TEXTS = ["First. Second sentence.", "Third one.", "Fourth sentence here."]
+
+def test_length_batches():
+    lengths = [10, 100, 12, 95, 11, 50]
+    batches = length_batches(lengths, max_batch=2)
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    assert all(len(b) <= 2 for b in batches)
+    assert batches[0] == [0, 4]
+
+@pytest.mark.parametrize("internal", ["decoder._init_states", "decoder._update_memory", "decoder.attention.init_states"])
+def test_missing_internals(internal):
+    synthesizer = Synthesizer()
+    assert batchable(synthesizer)
+    *parents, name = internal.split(".")
+    obj = synthesizer.tts_model
+    for parent in parents:
+        obj = getattr(obj, parent)
+    delattr(obj, name)
+    assert batching.missing_internals(synthesizer) == [internal]
+    assert not batchable(synthesizer)
+    # falls back to one sentence at a time
+    batch = BatchSynthesizer(synthesizer)
+    assert not batch.enabled
+    wavs = batch.synthesize(TEXTS)
+    assert synthesizer.calls == TEXTS
+    for text, wav in zip(TEXTS, wavs):
+        np.testing.assert_array_equal(wav, np.trim_zeros(synthesizer.tts(text), 'b'))
+
+def test_equivalent_batches(monkeypatch):
+    monkeypatch.setattr(BatchSynthesizer, "_synthesize_batch", batched_like_tts)
+    synthesizer = Synthesizer()
+    batch = BatchSynthesizer(synthesizer)
+    assert batch.enabled
+    assert synthesizer.calls == list(batching.PROBE_TEXTS)
+    wavs = batch.synthesize(TEXTS)
+    # nothing more went through tts, and it came out the same anyway
+    assert synthesizer.calls == list(batching.PROBE_TEXTS)
+    for text, wav in zip(TEXTS, wavs):
+        np.testing.assert_array_equal(wav, np.trim_zeros(synthesizer.tts(text), 'b'))
+    # the check only runs once per synthesizer
+    BatchSynthesizer(synthesizer)
+    assert len(synthesizer.calls) == len(batching.PROBE_TEXTS) + len(TEXTS)
+
+@pytest.mark.parametrize("batched", [batched_wrong, batched_broken])
+def test_mismatched_batches(monkeypatch, batched):
+    monkeypatch.setattr(BatchSynthesizer, "_synthesize_batch", batched)
+    synthesizer = Synthesizer()
+    batch = BatchSynthesizer(synthesizer)
+    assert not batch.enabled
+    for text, wav in zip(TEXTS, batch.synthesize(TEXTS)):
+        np.testing.assert_array_equal(wav, np.trim_zeros(synthesizer.tts(text), 'b'))
@@ -0,0 +1,42 @@
+import pytest
+
+from recap.backend.fixtures import ReplayClient
+from recap.backend.script_writer import ScriptWriter
+from recap.backend.synthetic import generate_event
+
+# alliances -> the non-final rounds, with how many series each
+ROUNDS = {
+    2: {},
+    4: {"SEMIFINAL": 2},
+    8: {"QUARTERFINAL": 4, "SEMIFINAL": 2},
+}
+
+def writer(alliances, seed=0):
+    code = f"SYNBRACKET{alliances}"
+    return ScriptWriter(code, ReplayClient(generate_event(code, 48, alliances=alliances, seed=seed)))
+
+@pytest.mark.parametrize("alliances", sorted(ROUNDS))
+def test_rounds(alliances):
+    bracket = writer(alliances).bracket
+    assert {level: len(series) for level, series in bracket.rounds().items()} == ROUNDS[alliances]
+    assert bracket.final is not None and bracket.final.level == "FINAL"
+    # every alliance plays, and only the final has series 0
+    assert {a.seed for s in bracket.series.values() for a in (s.red_alliance, s.blue_alliance)} == set(range(1, alliances + 1))
+    assert [key for key in bracket.series if key[1] == 0] == [("FINAL", 0)]
+
+@pytest.mark.parametrize("alliances", sorted(ROUNDS))
+def test_elims_matches(alliances):
+    w = writer(alliances)
+    script = w.elims_matches()
+    finals = w.bracket.final.winning_alliance()
+    assert f"the {finals.name()} composed of" in script
+    for level in ROUNDS[alliances]:
+        assert f"In {level.lower()}s," in script
+    for series in w.bracket.others:
+        assert f"{series.winning_alliance()} beat {series.losing_alliance()}" in script
+    if not ROUNDS[alliances]:
+        assert " beat " not in script
+
+@pytest.mark.parametrize("alliances", sorted(ROUNDS))
+def test_same_seed_same_script(alliances):
+    assert writer(alliances).elims_matches() == writer(alliances).elims_matches()
@@ -0,0 +1,95 @@
+import random
+
+from recap.backend.fixtures import ReplayClient
+from recap.backend.lexicon import Lexicon, number_words, spoken_name, spoken_number
+from recap.backend.script_writer import ScriptWriter
+from recap.backend.synthetic import generate_event
+from recap.frontend.pronounce import Pronouncer
+
+TEAMS = [
+    {"teamNumber": 4042, "nameShort": "Nonstandard Deviation"},
+    {"teamNumber": 16326, "nameShort": "Team11 & Co"},
+    {"teamNumber": 7, "nameShort": "4-H Robotics"},
+]
+
+def test_number_words():
+    assert number_words(0) == "zero"
+    assert number_words(42) == "forty-two"
+    assert number_words(4042) == "four thousand forty-two"
+    assert number_words(16326) == "sixteen thousand three hundred twenty-six"
+
+def test_spoken_forms():
+    assert spoken_name("Team11 & Co") == "Team eleven and Co"
+    assert spoken_name("4-H Robotics") == "four-H Robotics"
+    readings = {spoken_number(4042, random.Random(seed)) for seed in range(50)}
+    assert readings <= {"four zero four two", "four oh four two", "forty forty-two", "forty oh four two"}
+    assert all(" " in r and not any(c.isdigit() for c in r) for r in readings)
+
+def test_readings_stay_put():
+    lexicon = Lexicon.build(TEAMS)
+    # a team added later, or a lexicon built in another order, reads every team the same way
+    other = Lexicon.build(TEAMS[::-1] + [{"teamNumber": 99, "nameShort": "Late"}])
+    for team in TEAMS:
+        assert lexicon.teams[team['teamNumber']].mention() == other.teams[team['teamNumber']].mention()
+
+def test_save_load(tmp_path):
+    lexicon = Lexicon.build(TEAMS)
+    lexicon.pronunciations["lower"] = {"x": "y"}
+    lexicon.save(str(tmp_path / "lexicon.json"))
+    loaded = Lexicon.load(str(tmp_path / "lexicon.json"))
+    assert {n: e.mention() for n, e in loaded.teams.items()} == {n: e.mention() for n, e in lexicon.teams.items()}
+    assert loaded.pronunciations == lexicon.pronunciations
+    assert loaded.version() == lexicon.version()
+
+def test_script_uses_lexicon():
+    code = "SYNLEX24"
+    bundle = generate_event(code, 24)
+    teams = ScriptWriter(code, ReplayClient(bundle)).teams
+    lexicon = Lexicon.build({"teamNumber": n, "nameShort": t.nick} for n, t in teams.items())
+    script = ScriptWriter(code, ReplayClient(bundle), lexicon=lexicon).full_script()
+    assert script == ScriptWriter(code, ReplayClient(bundle), lexicon=lexicon).full_script()
+    # every team number is read out in words
+    assert not any(str(n) in script for n in teams)
+    assert any(entry.mention() in script for entry in lexicon.teams.values())
+
+class Tokenizer:
+    """Just enough of TTS's TTSTokenizer: a cleaner that counts its calls, and characters for ids."""
+    use_phonemes = False
+    add_blank = False
+    use_eos_bos = False
+
+    def __init__(self):
+        self.cleaned = []
+        self.text_cleaner = self.clean
+
+    def clean(self, text):
+        self.cleaned.append(text)
+        return text.lower()
+
+    def encode(self, text):
+        return list(text)
+
+def test_pronouncer_splits_mentions():
+    lexicon = Lexicon.build(TEAMS)
+    pronouncer = Pronouncer(lexicon, Tokenizer())
+    mention = lexicon.teams[4042].mention()
+    pieces = pronouncer.split(f"Then {mention}, and {lexicon.teams[7].spoken_name} won.")
+    assert pieces == [("Then ", False), (mention, True), (", and ", False), (lexicon.teams[7].spoken_name, True),
+                      (" won.", False)]
+
+def test_pronouncer_text_to_ids():
+    lexicon = Lexicon.build(TEAMS)
+    tokenizer = Tokenizer()
+    pronouncer = Pronouncer(lexicon, tokenizer)
+    mention = lexicon.teams[4042].mention()
+    text = f"Then {mention} won."
+    # the same text the tokenizer would have come up with on its own
+    assert "".join(pronouncer.text_to_ids(text)) == text.lower()
+    # a hand edited pronunciation is what gets spoken
+    lexicon.pronunciations[Pronouncer.key(tokenizer)][mention] = "forty forty two nonstandard deviation"
+    assert "".join(pronouncer.text_to_ids(text)) == "then forty forty two nonstandard deviation won."
+    # and mentions are only run through the cleaner once
+    tokenizer.cleaned.clear()
+    pronouncer.text_to_ids(text)
+    pronouncer.text_to_ids(text)
+    assert mention not in tokenizer.cleaned
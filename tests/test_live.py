@@ -0,0 +1,87 @@
+import copy
+
+import pytest
+
+from recap.backend.fixtures import ReplayClient
+from recap.backend.live import LiveScriptWriter
+from recap.backend.script_writer import ScriptWriter
+from recap.backend.synthetic import generate_event
+
+CODE = "SYNLIVE40"
+
+class LiveClient:
+    """Serves a generated event as if quals were only played up to match `played`, with any rescores applied."""
+    date_parse = ReplayClient.date_parse
+
+    def __init__(self, bundle, played):
+        self.bundle = bundle
+        self.played = played
+        # match number -> (red, blue)
+        self.rescores = {}
+        self.full_fetches = 0
+
+    def fetch(self, path, **params):
+        start = params.pop("start", None)
+        body = copy.deepcopy(self.bundle.get(path, params))
+        if path.endswith("qual/hybrid"):
+            for match in body['schedule']:
+                if match['matchNumber'] > self.played:
+                    match['scoreRedFinal'] = match['scoreBlueFinal'] = None
+                elif match['matchNumber'] in self.rescores:
+                    match['scoreRedFinal'], match['scoreBlueFinal'] = self.rescores[match['matchNumber']]
+            if start is None:
+                self.full_fetches += 1
+            else:
+                body['schedule'] = [m for m in body['schedule'] if m['matchNumber'] >= start]
+        return body
+
+@pytest.fixture(scope="module")
+def bundle():
+    return generate_event(CODE, 40, 5, 4)
+
+def fresh_script(client):
+    return ScriptWriter(CODE, client, seed=5).full_script()
+
+def test_poll_matches_fresh(bundle):
+    client = LiveClient(bundle, 20)
+    live = LiveScriptWriter(CODE, client, seed=5)
+    live.full_script()
+    for played in (30, 40, 60):
+        client.played = played
+        assert "quals" in live.poll()
+        assert live.full_script() == fresh_script(client)
+
+def test_nothing_changed(bundle):
+    client = LiveClient(bundle, 60)
+    live = LiveScriptWriter(CODE, client, seed=5)
+    script = live.full_script()
+    assert live.poll() == set()
+    assert live.full_script() == script
+
+def test_rescore_before_first_unplayed(bundle):
+    client = LiveClient(bundle, 30)
+    live = LiveScriptWriter(CODE, client, seed=5, full_every=3)
+    live.full_script()
+    client.rescores[5] = (400, 0)
+    # the next two polls only ask from match 31 on, the third refetches everything
+    assert live.poll() == set()
+    assert live.poll() == set()
+    assert "quals" in live.poll()
+    assert client.full_fetches == 2
+    script = live.full_script()
+    assert "400" in script
+    assert script == fresh_script(client)
+
+def test_rescore_after_quals(bundle):
+    client = LiveClient(bundle, 10 ** 6)
+    live = LiveScriptWriter(CODE, client, seed=5, full_every=1)
+    live.full_script()
+    client.rescores[1] = (0, 0)
+    assert "quals" in live.poll()
+    assert live.full_script() == fresh_script(client)
+
+@pytest.mark.parametrize("played", [0, 1, 4])
+def test_too_early_for_quals(bundle, played):
+    live = LiveScriptWriter(CODE, LiveClient(bundle, played), seed=5)
+    assert live.quals_matches() == ""
+    live.full_script()
@@ -0,0 +1,79 @@
+import threading
+import time
+import types
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from recap.frontend.audio_cache import AudioCache
+from recap.frontend.synthesis import split_sentences
+from recap.pipeline import Pipeline
+
+SCRIPT = "The first sentence. A sentence both events have. The last sentence."
+
+class Synthesizer:
+    """Stands in for the synthesis pool: a sentence's audio is its length in samples, after a short wait."""
+    def __init__(self):
+        self.synthesizer = types.SimpleNamespace(output_sample_rate=100)
+        self.submitted = []
+        self.pool = ThreadPoolExecutor(2)
+
+    def submit(self, chunk):
+        self.submitted.append(chunk)
+        return self.pool.submit(lambda: time.sleep(0.02) or np.full(len(chunk), 0.5, dtype=np.float32))
+
+    def close(self):
+        self.pool.shutdown()
+
+def frames(script):
+    return sum(len(chunk) for chunk in split_sentences(script))
+
+class FakePipeline(Pipeline):
+    def __init__(self, out_dir, scripts, **kwargs):
+        super().__init__(None, None, out_dir=out_dir, jobs=1, sentence_silence=0, **kwargs)
+        self.scripts = scripts
+        self.synth = Synthesizer()
+        self.rendering = {}
+
+    def render(self, event_code):
+        # held up until the test lets it through
+        self.rendering.setdefault(event_code, threading.Event()).wait(30)
+        return self.scripts[event_code]
+
+    def _synthesizer(self):
+        return self.synth
+
+def test_shared_sentences_synthesized_once(tmp_path):
+    scripts = {"EVA": SCRIPT, "EVB": SCRIPT.replace("first", "second")}
+    # enough in flight that both events' copies of the shared sentence are queued together
+    pipeline = FakePipeline(str(tmp_path), scripts, max_inflight=8, audio_cache=AudioCache(str(tmp_path / "cache")))
+    for code in scripts:
+        pipeline.rendering[code] = threading.Event()
+        pipeline.rendering[code].set()
+    assert pipeline.run(list(scripts)) == {}
+    assert sorted(pipeline.synth.submitted) == sorted(set(pipeline.synth.submitted))
+    assert len(pipeline.synth.submitted) == 4
+    for code, script in scripts.items():
+        with wave.open(str(tmp_path / f"{code}.wav")) as f:
+            assert f.getframerate() == 100 and f.getnframes() == frames(script)
+    assert len(pipeline.audio_cache._store) == 4
+
+def test_writes_while_rendering(tmp_path):
+    scripts = {"EVA": SCRIPT, "EVB": SCRIPT}
+    pipeline = FakePipeline(str(tmp_path), scripts, render_workers=1)
+    pipeline.rendering["EVA"] = threading.Event()
+    pipeline.rendering["EVA"].set()
+    pipeline.rendering["EVB"] = threading.Event()
+    run = threading.Thread(target=pipeline.run, args=(list(scripts),))
+    run.start()
+    try:
+        # EVA gets written out while EVB is still rendering
+        deadline = time.time() + 2
+        while not (tmp_path / "EVA.wav").exists() or (tmp_path / "EVA.wav").stat().st_size < 44 + 2 * frames(SCRIPT):
+            assert time.time() < deadline
+            time.sleep(0.01)
+    finally:
+        pipeline.rendering["EVB"].set()
+    run.join(5)
+    assert not run.is_alive()
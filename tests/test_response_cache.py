@@ -0,0 +1,100 @@
+import datetime
+import os
+
+from recap.backend.data_fetch import FTCEventsClient, ResponseCache, Transport
+
+EVENTS = {"events": [{"code": "USCANOSCQ", "dateStart": "2022-01-15T00:00:00", "dateEnd": "2022-01-15T00:00:00"}]}
+
+class Response:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.content = b"{}"
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+class Session:
+    """Answers requests with canned responses in order, keeping what it was asked."""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.requests.append((url, dict(headers), dict(params)))
+        return self.responses.pop(0)
+
+def client(cache, *responses):
+    transport = Transport()
+    transport.session = Session(*responses)
+    return FTCEventsClient("user", "token", cache=cache, transport=transport)
+
+def test_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttls={"rankings": 60})
+    entry = cache.put("rankings/USCANOSCQ", {}, {"Rankings": []})
+    assert cache.ttl("rankings/USCANOSCQ", {}) == 60
+    assert cache.is_fresh("rankings/USCANOSCQ", {}, entry)
+    entry["fetched"] -= 61
+    assert not cache.is_fresh("rankings/USCANOSCQ", {}, entry)
+    # once the event is known to be over its responses never go stale
+    cache.put("events", {"eventCode": "USCANOSCQ"}, EVENTS)
+    assert cache.ttl("rankings/USCANOSCQ", {}) is None
+    assert cache.is_fresh("rankings/USCANOSCQ", {}, entry)
+
+def test_running_event_keeps_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    tomorrow = (datetime.datetime.now() + datetime.timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%S")
+    cache.put("events", {"eventCode": "LIVE"}, {"events": [{"code": "LIVE", "dateEnd": tomorrow}]})
+    assert cache.ttl("schedule/LIVE/qual/hybrid", {}) == cache.ttls["schedule"]
+
+def test_fresh_hit_skips_network(tmp_path):
+    c = client(ResponseCache(str(tmp_path)), Response(200, {"Rankings": [1]}))
+    assert c.fetch("rankings/LIVE") == {"Rankings": [1]}
+    assert c.fetch("rankings/LIVE") == {"Rankings": [1]}
+    assert len(c.transport.session.requests) == 1
+
+def test_revalidation(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    c = client(cache,
+               Response(200, {"Rankings": [1]}, {"ETag": '"v1"', "Last-Modified": "Sat, 15 Jan 2022 00:00:00 GMT"}),
+               Response(304),
+               Response(200, {"Rankings": [2]}, {"ETag": '"v2"'}))
+    c.fetch("rankings/LIVE")
+
+    def go_stale():
+        entry = cache.get("rankings/LIVE", {})
+        entry["fetched"] -= 3600
+        cache._write(cache.key("rankings/LIVE", {}), entry)
+
+    go_stale()
+    # 304 Not Modified: the cached body comes back and is fresh again
+    assert c.fetch("rankings/LIVE") == {"Rankings": [1]}
+    _, headers, _ = c.transport.session.requests[1]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == "Sat, 15 Jan 2022 00:00:00 GMT"
+    assert cache.is_fresh("rankings/LIVE", {}, cache.get("rankings/LIVE", {}))
+
+    go_stale()
+    assert c.fetch("rankings/LIVE") == {"Rankings": [2]}
+    assert cache.get("rankings/LIVE", {})["etag"] == '"v2"'
+
+def test_lru_eviction(tmp_path):
+    body = {"Rankings": ["x" * 1000]}
+    cache = ResponseCache(str(tmp_path), max_bytes=2500)
+    cache.put("rankings/A", {}, body)
+    cache.put("rankings/B", {}, body)
+    cache.get("rankings/A", {})
+    cache.put("rankings/C", {}, body)
+    assert cache.get("rankings/A", {}) is not None
+    assert cache.get("rankings/B", {}) is None
+    assert cache.get("rankings/C", {}) is not None
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".json")]) == 2
+    # a new cache over the same directory picks up the same entries
+    assert ResponseCache(str(tmp_path)).get("rankings/C", {})["body"] == body
+    cache.clear()
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,78 @@
+import copy
+
+import numpy as np
+import pytest
+
+from recap.backend.fixtures import ReplayClient
+from recap.backend.score_store import QualsScores
+from recap.backend.script_writer import ScriptWriter
+from recap.backend.synthetic import generate_event
+
+def event(teams=24, seed=0):
+    """A generated event's quals schedule and the teams dict ScriptWriter builds for it."""
+    code = f"SYNTEST{teams}"
+    writer = ScriptWriter(code, ReplayClient(generate_event(code, teams, seed=seed)), init_data=False)
+    return writer.quals, writer.teams
+
+def unplayed(match):
+    match = copy.deepcopy(match)
+    match['scoreRedFinal'] = match['scoreBlueFinal'] = None
+    return match
+
+def rescored(match, red, blue):
+    match = copy.deepcopy(match)
+    match['scoreRedFinal'], match['scoreBlueFinal'] = red, blue
+    return match
+
+def assert_same(store, fresh):
+    """Everything the sections read out of a store matches between the two."""
+    assert store.num_rows == fresh.num_rows
+    np.testing.assert_array_equal(store.counts, fresh.counts)
+    np.testing.assert_array_equal(store.sums, fresh.sums)
+    np.testing.assert_array_equal(store.sq_sums, fresh.sq_sums)
+    np.testing.assert_array_equal(store.maxes, fresh.maxes)
+    np.testing.assert_array_equal(store.stdevs, fresh.stdevs)
+    assert store.top_score() == fresh.top_score()
+    assert store.rankings() == fresh.rankings()
+    for number in fresh.numbers.tolist():
+        np.testing.assert_array_equal(store.scores_of(number), fresh.scores_of(number))
+        np.testing.assert_array_equal(store.sorted_scores_of(number), fresh.sorted_scores_of(number))
+
+@pytest.mark.parametrize("teams", [8, 24, 96])
+def test_new_matches(teams):
+    quals, teams = event(teams)
+    half = len(quals) // 2
+    # the second half scheduled but not played yet, like a live event's schedule mid-quals
+    store = QualsScores(quals[:half] + [unplayed(m) for m in quals[half:]], teams)
+    changed = set()
+    for i in range(half, len(quals), 5):
+        changed |= store.apply(quals[i:i + 5])
+    assert changed == {t['teamNumber'] for m in quals[half:] for t in m['teams']}
+    assert_same(store, QualsScores(quals, teams))
+
+@pytest.mark.parametrize("seed", range(3))
+def test_rescored_matches(seed):
+    quals, teams = event(24, seed)
+    store = QualsScores(quals, teams)
+    top = max(quals, key=lambda m: max(m['scoreRedFinal'], m['scoreBlueFinal']))
+    # take the top score down, push another match's score past it, and zero one out
+    fixes = [rescored(top, 1, 2), rescored(quals[3], 999, 0), rescored(quals[-1], 0, 0)]
+    store.apply(fixes)
+    final = {m['matchNumber']: m for m in quals + fixes}
+    assert_same(store, QualsScores(list(final.values()), teams))
+
+def test_rescored_and_new_together():
+    quals, teams = event(24)
+    half = len(quals) // 2
+    store = QualsScores(quals[:half], teams)
+    fixes = [rescored(quals[0], 5, 500), rescored(quals[half - 1], 0, 0)]
+    store.apply(quals[half:] + fixes)
+    final = {m['matchNumber']: m for m in quals + fixes}
+    assert_same(store, QualsScores(list(final.values()), teams))
+
+def test_nothing_changed():
+    quals, teams = event(24)
+    store = QualsScores(quals, teams)
+    assert store.apply([]) == set()
+    store.apply(copy.deepcopy(quals[:4]))
+    assert_same(store, QualsScores(quals, teams))
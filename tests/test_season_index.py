@@ -0,0 +1,74 @@
+import pytest
+
+from recap.backend.fixtures import FixtureBundle, ReplayClient
+from recap.backend.lexicon import Lexicon
+from recap.backend.script_writer import ScriptWriter
+from recap.backend.season_index import SeasonIndex
+from recap.backend.synthetic import generate_event
+
+CODES = ("SYNIDXA", "SYNIDXB")
+
+class SeasonClient(ReplayClient):
+    """A season of generated events, with the season events listing the index starts from."""
+    def __init__(self, codes):
+        bundle = FixtureBundle()
+        self.events = []
+        for i, code in enumerate(codes):
+            event = generate_event(code, 24 + 12 * i, alliances=4, seed=i)
+            bundle.responses.update(event.responses)
+            self.events += event.get("events", {"eventCode": code})['events']
+        super().__init__(bundle)
+        self.fetches = 0
+
+    def fetch(self, path, **params):
+        self.fetches += 1
+        if path == "events" and not params:
+            return {"events": self.events, "eventCount": len(self.events)}
+        return super().fetch(path, **params)
+
+@pytest.fixture
+def season(tmp_path):
+    client = SeasonClient(CODES)
+    with SeasonIndex(str(tmp_path / "season.db")) as index:
+        assert sorted(index.update(client, concurrent=False)) == sorted(CODES)
+        yield client, index
+
+def test_same_script(season):
+    client, index = season
+    for code in CODES:
+        assert index.script_writer(code).full_script() == ScriptWriter(code, client).full_script()
+
+def test_settled_events_not_refetched(season):
+    client, index = season
+    # the generated events ended long ago
+    assert all(index.settled(code) for code in CODES)
+    fetches = client.fetches
+    assert index.update(client) == []
+    assert client.fetches == fetches + 1
+    assert sorted(index.update(client, refresh=True, concurrent=False)) == sorted(CODES)
+
+def test_cross_event(season):
+    client, index = season
+    writer = ScriptWriter(CODES[1], client)
+    number = next(iter(writer.teams))
+    assert index.team_events(number) == [CODES[1]]
+    assert index.nth_event(number, CODES[1]) == 1
+    played = [m for m in writer.quals if any(t['teamNumber'] == number for t in m['teams'])]
+    assert [m for _, m in index.team_matches(number)] == played
+    assert len(index.season_teams()) == len({n for code in CODES for n in ScriptWriter(code, client).teams})
+    assert len(Lexicon.from_index(index)) == len(index.season_teams())
+
+def test_not_indexed(season):
+    _, index = season
+    with pytest.raises(KeyError):
+        index.teams("NOTINDEXED")
+    assert index.events("NOTINDEXED")["events"] == []
+
+def test_payloads(season):
+    client, _ = season
+    writer = ScriptWriter(CODES[0], client, init_data=False)
+    payloads = writer.payloads()
+    assert set(payloads) == set(ScriptWriter.PAYLOADS)
+    # a copy, so callers can't change what the writer renders from
+    payloads.clear()
+    assert writer.payloads()
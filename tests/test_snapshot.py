@@ -0,0 +1,72 @@
+import pytest
+
+from recap.backend import snapshot
+from recap.backend.fixtures import ReplayClient
+from recap.backend.live import LiveScriptWriter
+from recap.backend.script_writer import ScriptWriter
+from recap.backend.synthetic import generate_event
+
+def bundle(code, alliances=4, seed=0):
+    return generate_event(code, 24, alliances=alliances, seed=seed)
+
+def fresh_script(code, bundle, seed=0):
+    return ScriptWriter(code, ReplayClient(bundle), seed=seed).full_script()
+
+@pytest.mark.parametrize("alliances", [2, 4, 8])
+def test_round_trip(alliances):
+    code = f"SYNSNAP{alliances}"
+    b = bundle(code, alliances)
+    data = snapshot.dumps(ScriptWriter(code, ReplayClient(b)))
+    # the loaded writer never goes to a client
+    writer = snapshot.loads(data, seed=0)
+    assert writer.full_script() == fresh_script(code, b)
+    # and renders like a fresh writer with whatever seed it's given
+    assert snapshot.loads(data, seed=3).full_script() == fresh_script(code, b, seed=3)
+
+def test_save_load(tmp_path):
+    code = "SYNSNAPFILE"
+    b = bundle(code)
+    snapshot.save(ScriptWriter(code, ReplayClient(b)), str(tmp_path / "event.snapshot"))
+    assert snapshot.load(str(tmp_path / "event.snapshot"), seed=0).full_script() == fresh_script(code, b)
+
+def test_payloads_answer_once():
+    code = "SYNSNAPLIVE"
+    b = bundle(code)
+    client = ReplayClient(b)
+    path = f"schedule/{code}/qual/hybrid"
+    writer = snapshot.loads(snapshot.dumps(ScriptWriter(code, client)))
+    assert writer.client.fetch(path) == b.get(path, {})
+    # asking again is a poll for newer results, which only a client can answer
+    with pytest.raises(KeyError):
+        writer.client.fetch(path)
+    writer = snapshot.loads(snapshot.dumps(ScriptWriter(code, client)), client=client, cls=LiveScriptWriter)
+    assert isinstance(writer, LiveScriptWriter)
+    writer.client.fetch(path)
+    assert writer.client.fetch(path) == b.get(path, {})
+
+def test_version_mismatch(monkeypatch):
+    code = "SYNSNAPOLD"
+    data = snapshot.dumps(ScriptWriter(code, ReplayClient(bundle(code))))
+    monkeypatch.setattr(snapshot, "SNAPSHOT_VERSION", snapshot.SNAPSHOT_VERSION + 1)
+    with pytest.raises(ValueError):
+        snapshot.loads(data)
+
+def test_archive(tmp_path):
+    codes = ["SYNSNAPA", "SYNSNAPB", "SYNSNAPC"]
+    bundles = {code: bundle(code, seed=i) for i, code in enumerate(codes)}
+    path = str(tmp_path / "season.zip")
+    with snapshot.SeasonArchive(path, "w") as archive:
+        for code in codes[:2]:
+            archive.add(ScriptWriter(code, ReplayClient(bundles[code])))
+        with pytest.raises(ValueError):
+            archive.add(ScriptWriter(codes[0], ReplayClient(bundles[codes[0]])))
+    with snapshot.SeasonArchive(path, "a") as archive:
+        archive.add(ScriptWriter(codes[2], ReplayClient(bundles[codes[2]])))
+
+    with snapshot.SeasonArchive(path) as archive:
+        assert archive.events() == codes and len(archive) == 3
+        assert "SYNSNAPA" in archive and "NOTHERE" not in archive
+        for code in codes:
+            assert archive.script_writer(code, seed=0).full_script() == fresh_script(code, bundles[code])
+        with pytest.raises(KeyError):
+            archive.script_writer("NOTHERE")
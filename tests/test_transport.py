@@ -0,0 +1,88 @@
+import email.utils
+import time
+
+import pytest
+import requests
+
+from recap.backend import data_fetch
+from recap.backend.data_fetch import RateLimiter, Transport
+
+class Response:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class Session:
+    """Plays back responses (or raises exceptions) in order."""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        r = self.responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(data_fetch.time, "sleep", slept.append)
+    return slept
+
+def transport(*responses, **kwargs):
+    t = Transport(**kwargs)
+    t.session = Session(*responses)
+    return t
+
+def get(t):
+    return t.get("https://example/x", "rankings", {}, {})
+
+def test_retries_then_succeeds(sleeps):
+    t = transport(Response(503), Response(502), Response(200), backoff=1, max_backoff=60)
+    assert get(t).status_code == 200
+    stats = t.stats["rankings"]
+    assert (stats["requests"], stats["retries"], stats["failures"]) == (3, 2, 0)
+    # exponential backoff with jitter between half and all of it
+    assert 0.5 <= sleeps[0] <= 1 and 1 <= sleeps[1] <= 2
+
+def test_not_retried(sleeps):
+    t = transport(Response(404))
+    assert get(t).status_code == 404
+    assert sleeps == []
+
+def test_gives_up(sleeps):
+    t = transport(*[Response(500)] * 3, max_retries=2)
+    # the last response comes back for the caller to raise on
+    assert get(t).status_code == 500
+    assert t.stats["rankings"]["failures"] == 1
+    assert len(sleeps) == 2
+
+def test_connection_errors(sleeps):
+    t = transport(requests.ConnectionError(), requests.Timeout(), Response(200))
+    assert get(t).status_code == 200
+    t = transport(*[requests.ConnectionError()] * 2, max_retries=1)
+    with pytest.raises(requests.ConnectionError):
+        get(t)
+
+def test_retry_after_seconds(sleeps):
+    t = transport(Response(503, {"Retry-After": "7"}), Response(200))
+    get(t)
+    assert sleeps == [7.0]
+    t = transport(Response(503, {"Retry-After": "600"}), Response(200), max_backoff=30)
+    get(t)
+    assert sleeps[-1] == 30
+
+def test_retry_after_date(sleeps):
+    when = email.utils.formatdate(time.time() + 20, usegmt=True)
+    t = transport(Response(503, {"Retry-After": when}), Response(200))
+    get(t)
+    assert 15 <= sleeps[0] <= 20
+
+def test_429_holds_off_everyone(sleeps):
+    limiter = RateLimiter(10, 10)
+    t = transport(Response(429, {"Retry-After": "5"}), Response(200), rate_limiter=limiter)
+    get(t)
+    assert sleeps[0] == 5
+    # the bucket went negative by about 5 seconds' worth of tokens, so the next caller waits too
+    limiter.acquire()
+    assert sleeps[-1] >= 4
@@ -0,0 +1,52 @@
+import threading
+import wave
+
+import numpy as np
+import pytest
+
+from recap.frontend import tts_daemon
+
+class FakeSynthesizer:
+    output_sample_rate = 22050
+
+    def tts(self, text, *voice):
+        return np.full(1000, 0.25, dtype=np.float32)
+
+@pytest.fixture
+def daemon(tmp_path):
+    def start(**kwargs):
+        socket_path = str(tmp_path / "tts.sock")
+        server = tts_daemon.TTSDaemon(FakeSynthesizer(), socket_path, **kwargs)
+        thread = threading.Thread(target=server.serve)
+        thread.start()
+        started.append((socket_path, thread))
+        return socket_path
+    started = []
+    yield start
+    for socket_path, thread in started:
+        tts_daemon.shutdown(socket_path)
+        thread.join()
+
+def peak(path):
+    with wave.open(str(path)) as f:
+        return int(np.max(np.abs(np.frombuffer(f.readframes(f.getnframes()), dtype="<i2"))))
+
+def test_gain(daemon, tmp_path):
+    socket_path = daemon()
+    out = tmp_path / "out.wav"
+    # peak normalized by default
+    tts_daemon.synthesize("Hello.", str(out), socket_path)
+    assert peak(out) == 32767
+    tts_daemon.synthesize("Hello.", str(out), socket_path, gain=2.0)
+    assert peak(out) == int(0.5 * 32767)
+
+def test_daemon_gain(daemon, tmp_path):
+    socket_path = daemon(gain=1.0)
+    out = tmp_path / "out.wav"
+    tts_daemon.synthesize("Hello.", str(out), socket_path)
+    assert peak(out) == int(0.25 * 32767)
+
+def test_already_running(daemon, tmp_path):
+    socket_path = daemon()
+    with pytest.raises(RuntimeError, match="already running"):
+        tts_daemon.TTSDaemon(FakeSynthesizer(), socket_path)
@@ -0,0 +1,26 @@
+import io
+
+import pytest
+
+from recap.frontend.video import list_footage, write_concat_list
+
+def test_concat_list_uses_real_lengths():
+    f = io.StringIO()
+    write_concat_list(f, [("a.mp4", 5.0), ("clip.mp4", 42.5)], max_seconds=100)
+    lines = f.getvalue().splitlines()
+    assert lines[0] == "ffconcat version 1.0"
+    durations = [float(line.split()[1]) for line in lines if line.startswith("duration")]
+    # whole cycles until there's at least 100 seconds
+    assert durations == [5.0, 42.5] * 3
+
+def test_concat_list_empty_footage():
+    with pytest.raises(ValueError):
+        write_concat_list(io.StringIO(), [("clip.mp4", 0.0)], max_seconds=10)
+
+def test_list_footage(tmp_path):
+    for name in ("b.png", "a.JPG", "c.mp4", "notes.txt", "EVENT/d.png"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).touch()
+    assert [p.split("/")[-1] for p in list_footage(str(tmp_path))] == ["a.JPG", "b.png", "c.mp4"]
+    assert [p.split("/")[-1] for p in list_footage(str(tmp_path), "EVENT")] == ["d.png"]
+    assert len(list_footage(str(tmp_path), "OTHER")) == 3
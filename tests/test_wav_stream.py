@@ -0,0 +1,47 @@
+import wave
+
+import numpy as np
+
+from recap.frontend.synthesis import save_wav
+from recap.frontend.wav_stream import OUTPUT_GAIN, WavStreamWriter, to_pcm
+
+def read_wav(path):
+    with wave.open(str(path)) as f:
+        return f.getframerate(), np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+
+def vocoder_like(n=22050, peak=0.8, seed=0):
+    wav = np.random.RandomState(seed).randn(n).astype(np.float32)
+    return wav * (peak / np.max(np.abs(wav)))
+
+def clipped(pcm):
+    return int(np.count_nonzero(np.abs(pcm.astype(np.int32)) >= 32767))
+
+def test_save_wav_peak_normalizes(tmp_path):
+    for peak in (0.05, 0.8, 1.6):
+        save_wav(vocoder_like(peak=peak), tmp_path / "out.wav", 22050)
+        rate, pcm = read_wav(tmp_path / "out.wav")
+        assert rate == 22050
+        # the loudest sample lands on full scale and nothing else does
+        assert clipped(pcm) == 1
+
+def test_save_wav_fixed_gain(tmp_path):
+    wav = vocoder_like(peak=0.8)
+    save_wav(wav, tmp_path / "out.wav", 22050, gain=2.0)
+    _, pcm = read_wav(tmp_path / "out.wav")
+    assert clipped(pcm) == np.count_nonzero(np.abs(wav * 2.0) >= 1.0)
+
+def test_default_gain_doesnt_clip():
+    # vocoders output in [-1, 1], the streamed default has to leave all of it alone
+    pcm = np.frombuffer(to_pcm(vocoder_like(peak=0.999)), dtype="<i2")
+    assert clipped(pcm) == 0
+    assert OUTPUT_GAIN == 1.0
+
+def test_streamed_matches_one_write(tmp_path):
+    wav = vocoder_like(50000)
+    with WavStreamWriter(str(tmp_path / "a.wav"), 22050) as writer:
+        writer.write(wav)
+    with WavStreamWriter(str(tmp_path / "b.wav"), 22050) as writer:
+        for i in range(0, len(wav), 7000):
+            writer.write(wav[i:i + 7000])
+    assert (tmp_path / "a.wav").read_bytes() == (tmp_path / "b.wav").read_bytes()
+    assert len(read_wav(tmp_path / "b.wav")[1]) == len(wav)